@@ -19,6 +19,7 @@ import json
 import math
 import logging
 
+from django.http import StreamingHttpResponse
 from django.utils.translation import gettext as _
 
 from beeswax import common, conf
@@ -50,11 +51,13 @@ def download(handle, format, db, id=None, file_name='query_result', user_agent=N
   resp = export_csvxls.make_response(generator, format, file_name, user_agent=user_agent)
 
   if id:
+    # The rows of a streamed response are only exported after its headers are sent, so whether they were truncated is unknown
+    is_streamed = isinstance(resp, StreamingHttpResponse)
     resp.set_cookie(
       'download-%s' % id,
       json.dumps({
-        'truncated': content_generator.is_truncated,
-        'row_counter': content_generator.row_counter
+        'truncated': None if is_streamed else content_generator.is_truncated,
+        'row_counter': None if is_streamed else content_generator.row_counter
       }),
       max_age=DOWNLOAD_COOKIE_AGE
     )
@@ -75,8 +78,7 @@ def upload(path, handle, user, db, fs, max_rows=-1, max_bytes=-1):
 
   content_generator = DataAdapter(db, handle=handle, max_rows=max_rows, start_over=True, max_bytes=max_bytes)
   for header, data in content_generator:
-    dataset = export_csvxls.dataset(None, data)
-    fs.do_as_user(user.username, fs.append, path, dataset.csv)
+    fs.do_as_user(user.username, fs.append, path, export_csvxls.csv_dataset(None, data))
 
 
 class DataAdapter(object):
@@ -57,6 +57,7 @@ from notebook.connectors.base import get_interpreter
 LOG = logging.getLogger()
 IMPALA_RESULTSET_CACHE_SIZE = 'impala.resultset.cache.size'
 DEFAULT_USER = DEFAULT_USER.get()
+NULL_BITS_POSITIONS = [tuple(bit for bit in range(8) if n & (1 << bit)) for n in range(256)]
 
 
 class HiveServerTable(Table):
@@ -282,6 +283,9 @@ class HiveServerTRowSet2(object):
 
     return cols_rows
 
+  def columnar(self):
+    return HiveServerTColumnarBatch2(self.row_set.columns)
+
   def __iter__(self):
     return self
 
@@ -292,6 +296,30 @@ class HiveServerTRowSet2(object):
       raise StopIteration
 
 
+class HiveServerTColumnarBatch2(object):
+  """
+  Decodes all the columns of a TRowSet at once.
+
+  Each column is unwrapped and has its nulls applied a single time, rows are then produced by transposing the
+  columns instead of popping the first value of every column for each row.
+  """
+  def __init__(self, columns):
+    self._columns = columns or []
+    self._values = None
+
+  @property
+  def columns(self):
+    if self._values is None:
+      self._values = [HiveServerTColumnValue2(column).val or [] for column in self._columns]
+    return self._values
+
+  def __len__(self):
+    return min(len(values) for values in self.columns) if self.columns else 0
+
+  def rows(self):
+    return map(list, zip(*self.columns))
+
+
 class HiveServerTRow2(object):
   def __init__(self, cols, schema):
     self.cols = cols
@@ -368,6 +396,19 @@ class HiveServerTColumnValue2(object):
       yield n & 0x40
       yield n & 0x80
 
+  @classmethod
+  def null_positions(cls, bytestring):
+    if isinstance(bytestring, bytes):
+      mask = bytearray(bytestring)
+    else:
+      bitstring = python_util.from_string_to_bits(bytestring)
+      mask = python_util.get_bytes_from_bits(bitstring)
+
+    for offset, n in enumerate(mask):
+      if n:
+        for bit in NULL_BITS_POSITIONS[n]:
+          yield offset * 8 + bit
+
   @classmethod
   def set_nulls(cls, values, nulls):
     can_decode = True
@@ -381,9 +422,12 @@ class HiveServerTColumnValue2(object):
     if bytestring == '' or (can_decode and re.match('^(\x00)+$', bytestring)):  # HS2 has just \x00 or '', Impala can have \x00\x00...
       return values
     else:
-      _values = [None if is_null else value for value, is_null in zip(values, cls.mark_nulls(values, nulls))]
-      if len(values) != len(_values):  # HS2 can have just \x00\x01 instead of \x00\x01\x00...
-        _values.extend(values[len(_values):])
+      _values = list(values)  # HS2 can have just \x00\x01 instead of \x00\x01\x00...
+      size = len(_values)
+      for position in cls.null_positions(nulls):
+        if position >= size:
+          break
+        _values[position] = None
       return _values
 
 
@@ -410,6 +454,11 @@ class HiveServerDataTable(DataTable):
       return []
 
   def rows(self):
+    if isinstance(self.row_set, HiveServerTRowSet2):
+      for row in self.row_set.columnar().rows():
+        yield row
+      return
+
     for row in self.row_set:
       try:
         yield row.fields()
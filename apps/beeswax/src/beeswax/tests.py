@@ -29,7 +29,7 @@ import logging
 import tempfile
 import threading
 from io import BytesIO as string_io
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 from django.db import transaction
@@ -56,6 +56,7 @@ from beeswax.server.dbms import QueryServerException
 from beeswax.server.hive_server2_lib import (
   HiveServerClient,
   HiveServerTable,
+  HiveServerTColumnarBatch2,
   HiveServerTColumnValue2,
   PartitionKeyCompatible,
   PartitionValueCompatible,
@@ -2326,6 +2327,18 @@ def test_hive_site_null_hs2krb():
     shutil.rmtree(tmpdir)
 
 
+def test_download_streamed_results_cookie():
+  content_generator = Mock(is_truncated=True, row_counter=10)
+  content_generator.__iter__ = Mock(return_value=iter([(['col'], [['value']])]))
+
+  with patch('beeswax.data_export.DataAdapter', return_value=content_generator):
+    for format in ('csv', 'xls'):
+      resp = download(Mock(), format, Mock(), id='1')
+
+      # Not known yet when the streaming starts
+      assert {'truncated': None, 'row_counter': None} == json.loads(resp.cookies['download-1'].value)
+
+
 def test_collapse_whitespace():
   assert "" == collapse_whitespace("\t\n\n  \n\t \n")
   assert "x" == collapse_whitespace("\t\nx\n  \n\t \n")
@@ -2659,6 +2672,24 @@ class TestHiveServer2API(object):
     nulls = '\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00'
     assert data is not HiveServerTColumnValue2.set_nulls(data, nulls)
 
+  def test_columnar_batch_rows(self):
+    ints = Mock(values=[1, 2, 3], nulls=b'\x02')
+    strings = Mock(values=['a', 'b', 'c'], nulls=b'')
+    columns = [
+      Mock(stringVal=None, i16Val=None, i32Val=ints),
+      Mock(stringVal=strings)
+    ]
+
+    batch = HiveServerTColumnarBatch2(columns)
+
+    assert 3 == len(batch)
+    assert [[1, None, 3], ['a', 'b', 'c']] == batch.columns
+    assert [[1, 'a'], [None, 'b'], [3, 'c']] == list(batch.rows())
+    assert [[1, 'a'], [None, 'b'], [3, 'c']] == list(batch.rows())  # Decoded only once
+
+    assert 0 == len(HiveServerTColumnarBatch2([]))
+    assert [] == list(HiveServerTColumnarBatch2(None).rows())
+
   def test_bits_to_bytes_conversion(self):
     if sys.version_info[0] < 3:
       pytest.skip("Skipping Test")
@@ -17,6 +17,7 @@
 
 import os
 import json
+import uuid
 import logging
 import operator
 import mimetypes
@@ -53,6 +54,7 @@ from filebrowser.conf import (
   SHOW_DOWNLOAD_BUTTON,
 )
 from filebrowser.lib.rwx import compress_mode, filetype, rwx
+from filebrowser.listing_cache import CACHED_SCHEMES, SORT_FIELDS, DirectoryListing, get_listing_cache
 from filebrowser.utils import parse_broker_url
 from filebrowser.views import (
   DEFAULT_CHUNK_SIZE_BYTES,
@@ -109,12 +111,16 @@ def api_error_handler(view_fn):
   Decorator to handle exceptions and return a JSON response with an error message.
   """
 
-  def decorator(*args, **kwargs):
+  def decorator(request, *args, **kwargs):
     try:
-      return view_fn(*args, **kwargs)
+      return view_fn(request, *args, **kwargs)
     except Exception as e:
       LOG.exception(f'Error running {view_fn.__name__}: {str(e)}')
       return JsonResponse({'error': str(e)}, status=500)
+    finally:
+      # Any modification of the files makes the cached listings of the user stale
+      if request.method != 'GET':
+        get_listing_cache().invalidate(request.user.username)
 
   return decorator
 
@@ -288,45 +294,52 @@ def listdir_paged(request):
   if hasattr(request, 'doas'):
     do_as = request.doas
 
-  # Get stats for all files in the directory
-  try:
-    if do_as:
-      all_stats = request.fs.do_as_user(do_as, request.fs.listdir_stats, path)
-    else:
-      all_stats = request.fs.listdir_stats(path)
-  except (S3ListAllBucketsException, GSListAllBucketsException) as e:
-    return HttpResponse(f'Bucket listing is not allowed: {e}', status=403)
-
-  # Apply filter first if specified
   filter_string = request.GET.get('filter')
-  if filter_string:
-    all_stats = [sb for sb in all_stats if filter_string in sb['name']]
-
-  # Next, sort with proper handling of None values
   sortby = request.GET.get('sortby', 'name')
   descending = coerce_bool(request.GET.get('descending', False))
-  valid_sort_fields = {'type', 'name', 'atime', 'mtime', 'user', 'group', 'size'}
 
-  if sortby not in valid_sort_fields:
+  if sortby not in SORT_FIELDS:
     LOG.info(f"Ignoring invalid sort attribute '{sortby}' for list directory operation.")
-  else:
-    numeric_fields = {'size', 'atime', 'mtime'}
-
-    def sorting_key(item):
-      """Generate a sorting key that handles None values for different field types."""
-      value = getattr(item, sortby)
-      if sortby in numeric_fields:
-        # Treat None as 0 for numeric fields for comparison
-        return 0 if value is None else value
-      else:
-        # Treat None as an empty string for non-numeric fields
-        return '' if value is None else value
+    sortby = None
+
+  # Get stats for all files in the directory, from the cached listing when the directory was not modified since
+  listing_cache = get_listing_cache()
+  listing_key = (request.user.username, do_as, path)
+  scheme = request.fs._get_scheme(path)
+  is_cached = listing_cache.ttl > 0 and scheme in CACHED_SCHEMES
+  mtime = _do_as_user(request, do_as, request.fs.stats, path).mtime if is_cached else None
+  listing = listing_cache.get(listing_key, mtime) if is_cached else None
+  if listing is None:
+    listing = DirectoryListing(mtime)
 
+  try:
+    if scheme == 'hdfs':
+      # HDFS lists directories by name in batches, only the batches up to the requested page are needed when sorting by name
+      needed = pagenum * pagesize if sortby == 'name' and not descending and not filter_string else None
+      listing.fetch_batches(
+        lambda start_after: _do_as_user(request, do_as, request.fs.listdir_stats_batch, path, start_after=start_after), needed
+      )
+    elif not listing.complete:
+      listing.set_stats(_do_as_user(request, do_as, request.fs.listdir_stats, path))
+  except (S3ListAllBucketsException, GSListAllBucketsException) as e:
+    return HttpResponse(f'Bucket listing is not allowed: {e}', status=403)
+
+  if is_cached:
+    listing_cache.set(listing_key, listing)
+
+  if not listing.complete:
+    all_stats = listing  # Only the first entries by name are listed, along with the total count
+  elif sortby:
     try:
-      all_stats = sorted(all_stats, key=sorting_key, reverse=descending)
+      all_stats = listing.sorted(sortby, descending)
     except Exception as sort_error:
       LOG.error(f"Error during sorting with attribute '{sortby}': {sort_error}")
       return HttpResponse("An error occurred while sorting the directory contents.", status=500)
+  else:
+    all_stats = listing.stats
+
+  if filter_string:
+    all_stats = [sb for sb in all_stats if filter_string in sb['name']]
 
   # Do pagination
   try:
@@ -346,6 +359,12 @@ def listdir_paged(request):
   return JsonResponse(response)
 
 
+def _do_as_user(request, do_as, fn, *args, **kwargs):
+  if do_as:
+    return request.fs.do_as_user(do_as, fn, *args, **kwargs)
+  return fn(*args, **kwargs)
+
+
 @api_error_handler
 def display(request):
   """
@@ -398,7 +417,7 @@ def display(request):
     return HttpResponse(f'Cannot request chunks greater than {MAX_CHUNK_SIZE_BYTES} bytes.', status=400)
 
   # Read out based on meta.
-  _, offset, length, contents = read_contents(compression, path, request.fs, offset, length)
+  _, offset, length, contents = read_contents(compression, path, request.fs, offset, length, columns=request.GET.getlist('columns') or None)
 
   # Get contents as string for text mode, or at least try
   file_contents = None
@@ -745,6 +764,20 @@ def move(request):
   if validation_response:
     return validation_response
 
+  # Moving between two filesystems copies all the data, let the task server do it and report the progress.
+  if TASK_SERVER_V2.ENABLED.get() and request.fs._get_scheme(source_path) != request.fs._get_scheme(destination_path):
+    from filebrowser.tasks import error_handler, move_task
+
+    task_id = str(uuid.uuid4())
+    task_kwargs = {
+      'qquuid': task_id,
+      'user_id': request.user.id,
+      'source_path': source_path,
+      'destination_path': destination_path,
+    }
+    move_task.apply_async(task_id=task_id, kwargs=task_kwargs, link_error=error_handler.s(), queue="default")
+    return JsonResponse({'task_id': task_id}, status=202)
+
   request.fs.rename(source_path, destination_path)
   return HttpResponse(status=200)
 
@@ -768,8 +801,21 @@ def copy(request):
   if validation_response:
     return validation_response
 
-  # Copy method for Ozone FS returns a string of skipped files if their size is greater than configured chunk size.
-  if source_path.startswith('ofs://'):
+  if TASK_SERVER_V2.ENABLED.get() and not source_path.startswith('ofs://') and request.fs.isdir(source_path):
+    # Copying a directory can take long, let the task server do it and report the progress.
+    from filebrowser.tasks import copy_task, error_handler
+
+    task_id = str(uuid.uuid4())
+    task_kwargs = {
+      'qquuid': task_id,
+      'user_id': request.user.id,
+      'source_path': source_path,
+      'destination_path': destination_path,
+    }
+    copy_task.apply_async(task_id=task_id, kwargs=task_kwargs, link_error=error_handler.s(), queue="default")
+    return JsonResponse({'task_id': task_id}, status=202)
+  elif source_path.startswith('ofs://'):
+    # Copy method for Ozone FS returns a string of skipped files if their size is greater than configured chunk size.
     ofs_skip_files = request.fs.copy(source_path, destination_path, recursive=True, owner=request.user)
     if ofs_skip_files:
       return JsonResponse({'skipped_files': ofs_skip_files}, status=500)  # TODO: Status code?
@@ -967,6 +1013,7 @@ def bulk_op(request, op):
   path_list = request.POST.getlist('source_path') if op in (copy, move) else request.POST.getlist('path')
 
   error_dict = {}
+  task_ids = {}
   for p in path_list:
     tmp_dict = bulk_dict
     if op in (copy, move):
@@ -977,7 +1024,9 @@ def bulk_op(request, op):
     request.POST = tmp_dict
     response = op(request)
 
-    if response.status_code != 200:
+    if response.status_code == 202:  # Running in the task server
+      task_ids[p] = json.loads(response.content)['task_id']
+    elif response.status_code != 200:
       # TODO: Improve the error handling with new error UX
       # Currently, we are storing the error in the error_dict based on response type for each path
       res_content = response.content.decode('utf-8')
@@ -989,6 +1038,10 @@ def bulk_op(request, op):
   if error_dict:
     return JsonResponse(error_dict, status=500)  # TODO: Check if we need diff status code or diff json structure?
 
+  if task_ids:
+    # The operations are not done yet, their progress and result are reported by the task server.
+    return JsonResponse({'task_ids': task_ids}, status=202)
+
   return HttpResponse(status=200)  # TODO: Check if we need to send some message or diff status code?
 
 
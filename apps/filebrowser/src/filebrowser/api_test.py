@@ -20,11 +20,14 @@ from io import BytesIO as string_io
 from unittest.mock import MagicMock, Mock, patch
 
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.http import HttpResponseNotModified, HttpResponseRedirect, StreamingHttpResponse
+from django.http import HttpResponse, HttpResponseNotModified, HttpResponseRedirect, StreamingHttpResponse
 
 from aws.s3.s3fs import S3ListAllBucketsException
-from filebrowser.api import copy, download, get_all_filesystems, listdir_paged, mkdir, move, rename, touch, upload_file
+from desktop.conf import TASK_SERVER_V2
+from desktop.lib.django_util import JsonResponse
+from filebrowser.api import bulk_op, copy, download, get_all_filesystems, listdir_paged, mkdir, move, rename, touch, upload_file
 from filebrowser.conf import MAX_FILE_SIZE_UPLOAD_LIMIT, REDIRECT_DOWNLOAD, RESTRICT_FILE_EXTENSIONS, SHOW_DOWNLOAD_BUTTON
+from filebrowser.listing_cache import ListingCache
 from hadoop.fs.exceptions import WebHdfsException
 
 
@@ -605,6 +608,33 @@ class TestMoveAPI:
     assert response.status_code == 200
     request.fs.rename.assert_called_once_with('s3a://test-bucket/test-user/src_dir/source.txt', 's3a://test-bucket/test-user/dst_dir')
 
+  def test_move_between_filesystems_with_task_server(self):
+    request = Mock(
+      method='POST',
+      POST={'source_path': 's3a://test-bucket/test-user/src_dir', 'destination_path': 'abfs://test-container/dst_dir'},
+      fs=Mock(
+        exists=Mock(side_effect=[True, False]),
+        isdir=Mock(return_value=True),
+        parent_path=Mock(return_value='s3a://test-bucket/test-user'),
+        join=Mock(return_value='abfs://test-container/dst_dir/src_dir'),
+        normpath=Mock(side_effect=['s3a://test-bucket/test-user/src_dir', 'abfs://test-container/dst_dir', 'abfs://test-container/dst_dir']),
+        _get_scheme=Mock(side_effect=lambda path: path.split(':')[0]),
+        rename=Mock(),
+      ),
+      user=Mock(id=1),
+    )
+    tasks = Mock()
+    reset = TASK_SERVER_V2.ENABLED.set_for_testing(True)
+    try:
+      with patch.dict('sys.modules', {'filebrowser.tasks': tasks}):
+        response = move(request)
+    finally:
+      reset()
+
+    assert response.status_code == 202
+    assert json.loads(response.content)['task_id'] == tasks.move_task.apply_async.call_args.kwargs['task_id']
+    request.fs.rename.assert_not_called()
+
   def test_move_no_source_path(self):
     request = Mock(
       method='POST',
@@ -820,6 +850,103 @@ class TestCopyAPI:
       's3a://test-bucket/test-user/src_dir/source.txt', 's3a://test-bucket/test-user/dst_dir', recursive=True, owner=request.user
     )
 
+  def test_copy_with_task_server(self):
+    request = Mock(
+      method='POST',
+      POST={'source_path': 's3a://test-bucket/test-user/src_dir', 'destination_path': 's3a://test-bucket/test-user/dst_dir'},
+      fs=Mock(
+        exists=Mock(side_effect=[True, False]),
+        isdir=Mock(return_value=True),
+        parent_path=Mock(return_value='s3a://test-bucket/test-user'),
+        join=Mock(return_value='s3a://test-bucket/test-user/dst_dir/src_dir'),
+        normpath=Mock(
+          side_effect=[
+            's3a://test-bucket/test-user/src_dir',
+            's3a://test-bucket/test-user/dst_dir',
+            's3a://test-bucket/test-user/dst_dir',
+          ]
+        ),
+        copy=Mock(),
+        user=Mock(),
+      ),
+      user=Mock(id=1),
+    )
+    # filebrowser.tasks can only be imported with a configured task server
+    tasks = Mock()
+    copy_task = tasks.copy_task
+    reset = TASK_SERVER_V2.ENABLED.set_for_testing(True)
+    try:
+      with patch.dict('sys.modules', {'filebrowser.tasks': tasks}):
+        response = copy(request)
+    finally:
+      reset()
+
+    assert response.status_code == 202
+    task_id = json.loads(response.content)['task_id']
+    copy_task.apply_async.assert_called_once()
+    assert task_id == copy_task.apply_async.call_args.kwargs['task_id']
+    assert {
+      'qquuid': task_id,
+      'user_id': 1,
+      'source_path': 's3a://test-bucket/test-user/src_dir',
+      'destination_path': 's3a://test-bucket/test-user/dst_dir',
+    } == copy_task.apply_async.call_args.kwargs['kwargs']
+    request.fs.copy.assert_not_called()
+
+  def test_copy_file_with_task_server(self):
+    request = Mock(
+      method='POST',
+      POST={'source_path': 's3a://test-bucket/test-user/src_dir/source.txt', 'destination_path': 's3a://test-bucket/test-user/dst_dir'},
+      fs=Mock(
+        exists=Mock(side_effect=[True, False]),
+        isdir=Mock(side_effect=lambda path: path == 's3a://test-bucket/test-user/dst_dir'),
+        parent_path=Mock(return_value='s3a://test-bucket/test-user/src_dir'),
+        join=Mock(return_value='s3a://test-bucket/test-user/dst_dir/source.txt'),
+        normpath=Mock(
+          side_effect=[
+            's3a://test-bucket/test-user/src_dir/source.txt',
+            's3a://test-bucket/test-user/dst_dir',
+            's3a://test-bucket/test-user/dst_dir',
+          ]
+        ),
+        copy=Mock(),
+        user=Mock(),
+      ),
+      user=Mock(id=1),
+    )
+    tasks = Mock()
+    reset = TASK_SERVER_V2.ENABLED.set_for_testing(True)
+    try:
+      with patch.dict('sys.modules', {'filebrowser.tasks': tasks}):
+        response = copy(request)
+    finally:
+      reset()
+
+    # A single file is copied right away
+    assert response.status_code == 200
+    tasks.copy_task.apply_async.assert_not_called()
+    request.fs.copy.assert_called_once_with(
+      's3a://test-bucket/test-user/src_dir/source.txt', 's3a://test-bucket/test-user/dst_dir', recursive=True, owner=request.user
+    )
+
+  def test_bulk_copy_returns_task_ids(self):
+    request = Mock(
+      method='POST',
+      POST=Mock(
+        copy=Mock(return_value={'destination_path': 's3a://test-bucket/test-user/dst_dir'}),
+        getlist=Mock(return_value=['s3a://test-bucket/test-user/src_dir', 's3a://test-bucket/test-user/source.txt']),
+      ),
+    )
+    responses = {
+      's3a://test-bucket/test-user/src_dir': JsonResponse({'task_id': 'task-1'}, status=202),
+      's3a://test-bucket/test-user/source.txt': HttpResponse(status=200),
+    }
+    with patch('filebrowser.api.copy', side_effect=lambda request: responses[request.POST['source_path']]) as copy_op:
+      response = bulk_op(request, copy_op)
+
+    assert response.status_code == 202
+    assert {'task_ids': {'s3a://test-bucket/test-user/src_dir': 'task-1'}} == json.loads(response.content)
+
   def test_copy_ofs_success(self):
     request = Mock(
       method='POST',
@@ -1180,6 +1307,131 @@ class TestListAPI:
         assert response_data['files'][2]['size'] == 200
         assert response_data['files'][3]['size'] == 100
 
+  def test_listdir_paged_hdfs_batches(self):
+    with patch('filebrowser.api.is_admin') as is_admin:
+      with patch('filebrowser.api.get_listing_cache', return_value=ListingCache(ttl=30, max_entries=1000)):
+        is_admin.return_value = False
+
+        batches = [
+          [self._create_mock_file_stats('file%d.txt' % i, '/user/test/file%d.txt' % i, i, 'user1', 'group1') for i in range(0, 3)],
+          [self._create_mock_file_stats('file%d.txt' % i, '/user/test/file%d.txt' % i, i, 'user1', 'group1') for i in range(3, 6)],
+        ]
+        request = Mock(
+          method='GET',
+          GET={'pagenum': '1', 'pagesize': '2', 'path': '/user/test', 'sortby': 'name'},
+          user=Mock(username='test', has_hue_permission=Mock(return_value=False)),
+          fs=Mock(
+            isdir=Mock(return_value=True),
+            stats=Mock(return_value=Mock(mtime=1)),
+            _get_scheme=Mock(return_value='hdfs'),
+            listdir_stats_batch=Mock(side_effect=[(batches[0], 3), (batches[1], 0)]),
+            normpath=Mock(side_effect=lambda path: path),
+          ),
+          spec=['method', 'GET', 'user', 'fs'],
+        )
+
+        response_data = json.loads(listdir_paged(request).content)
+
+        assert [f['path'] for f in response_data['files']] == ['/user/test/file0.txt', '/user/test/file1.txt']
+        assert response_data['page'] == {'page_number': 1, 'page_size': 2, 'total_pages': 3, 'total_size': 6}
+        request.fs.listdir_stats_batch.assert_called_once_with('/user/test', start_after=None)
+
+        # Sorting by another attribute lists the rest of the directory
+        request.GET = {'pagenum': '1', 'pagesize': '2', 'path': '/user/test', 'sortby': 'size', 'descending': 'true'}
+        response_data = json.loads(listdir_paged(request).content)
+
+        assert [f['path'] for f in response_data['files']] == ['/user/test/file5.txt', '/user/test/file4.txt']
+        request.fs.listdir_stats_batch.assert_called_with('/user/test', start_after='file2.txt')
+        assert request.fs.listdir_stats_batch.call_count == 2
+
+  def test_listdir_paged_cached_listing(self):
+    with patch('filebrowser.api.is_admin') as is_admin:
+      with patch('filebrowser.api.get_listing_cache', return_value=ListingCache(ttl=30, max_entries=1000)):
+        is_admin.return_value = False
+
+        all_stats = [
+          self._create_mock_file_stats('file1.txt', 'hdfs://test-dir/file1.txt', 100, 'user1', 'group1'),
+          self._create_mock_file_stats('file2.txt', 'hdfs://test-dir/file2.txt', 200, 'user1', 'group1'),
+        ]
+        request = Mock(
+          method='GET',
+          GET={'pagenum': '1', 'pagesize': '30', 'path': 'hdfs://test-dir', 'sortby': 'size'},
+          user=Mock(username='test', has_hue_permission=Mock(return_value=False)),
+          fs=Mock(
+            isdir=Mock(return_value=True),
+            stats=Mock(return_value=Mock(mtime=1)),
+            _get_scheme=Mock(return_value='hdfs'),
+            listdir_stats_batch=Mock(return_value=(all_stats, 0)),
+            normpath=Mock(side_effect=lambda path: path),
+          ),
+          spec=['method', 'GET', 'user', 'fs'],
+        )
+
+        listdir_paged(request)
+        listdir_paged(request)
+        assert request.fs.listdir_stats_batch.call_count == 1
+
+        # The directory was modified
+        request.fs.stats.return_value = Mock(mtime=2)
+        listdir_paged(request)
+        assert request.fs.listdir_stats_batch.call_count == 2
+
+        # The user modified some files
+        mkdir_request = Mock(method='POST', user=request.user, POST={}, fs=Mock(isdir=Mock(return_value=True)))
+        mkdir(mkdir_request)
+        listdir_paged(request)
+        assert request.fs.listdir_stats_batch.call_count == 3
+
+  def test_listdir_paged_object_store_listing_not_cached(self):
+    with patch('filebrowser.api.is_admin') as is_admin:
+      with patch('filebrowser.api.get_listing_cache', return_value=ListingCache(ttl=30, max_entries=1000)):
+        is_admin.return_value = False
+
+        all_stats = [
+          self._create_mock_file_stats('file1.txt', 's3a://test-bucket/test-dir/file1.txt', 100, 'user1', 'group1'),
+        ]
+        request = Mock(
+          method='GET',
+          GET={'pagenum': '1', 'pagesize': '30', 'path': 's3a://test-bucket/test-dir'},
+          user=Mock(username='test', has_hue_permission=Mock(return_value=False)),
+          fs=Mock(
+            isdir=Mock(return_value=True),
+            _get_scheme=Mock(return_value='s3a'),
+            listdir_stats=Mock(return_value=all_stats),
+            normpath=Mock(side_effect=lambda path: path),
+          ),
+          spec=['method', 'GET', 'user', 'fs'],
+        )
+
+        listdir_paged(request)
+        listdir_paged(request)
+        assert request.fs.listdir_stats.call_count == 2
+        assert not request.fs.stats.called
+
+  def test_listdir_paged_cached_listing_stats_as_user(self):
+    with patch('filebrowser.api.is_admin') as is_admin:
+      with patch('filebrowser.api.get_listing_cache', return_value=ListingCache(ttl=30, max_entries=1000)):
+        is_admin.return_value = True
+
+        request = Mock(
+          method='GET',
+          GET={'pagenum': '1', 'pagesize': '30', 'path': 'hdfs://test-dir', 'doas': 'other'},
+          user=Mock(username='test', has_hue_permission=Mock(return_value=False)),
+          fs=Mock(
+            isdir=Mock(return_value=True),
+            _get_scheme=Mock(return_value='hdfs'),
+            listdir_stats_batch=Mock(return_value=([], 0)),
+            normpath=Mock(side_effect=lambda path: path),
+            do_as_user=Mock(side_effect=lambda user, fn, *args, **kwargs: fn(*args, **kwargs)),
+          ),
+          spec=['method', 'GET', 'user', 'fs'],
+        )
+        request.fs.stats.return_value = Mock(mtime=1)
+
+        listdir_paged(request)
+
+        assert request.fs.do_as_user.call_args_list[0][0][:3] == ('other', request.fs.stats, 'hdfs://test-dir')
+
   def test_listdir_paged_invalid_path(self):
     request = Mock(
       method='GET',
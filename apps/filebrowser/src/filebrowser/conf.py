@@ -111,3 +111,21 @@ RESTRICT_FILE_EXTENSIONS = Config(
     'Specify file extensions that are not allowed, separated by commas. For example: .exe, .zip, .rar, .tar, .gz'
   ),
 )
+
+LISTING_CACHE_TTL = Config(
+  key='listing_cache_ttl',
+  default=30,
+  type=int,
+  help=_(
+    'Number of seconds the HDFS directory listings of the file browser are cached for, per user. '
+    'Listings are refreshed earlier when the directory is modified, but not when one of its files is appended to or overwritten. '
+    'A value of 0 disables the cache.'
+  ),
+)
+
+LISTING_CACHE_MAX_ENTRIES = Config(
+  key='listing_cache_max_entries',
+  default=500000,
+  type=int,
+  help=_('Maximum total number of files and directories kept in the cache of directory listings.'),
+)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+In memory cache of the directory listings of the file browser API.
+
+Listings are kept per user and path for a few seconds and are dropped as soon as the modification time of the directory
+changes. Each listing keeps its entries sorted by every attribute they were requested by, so paging through a big directory
+does not list and sort it again on every page.
+
+The cache lives in each process and only the process handling a modification drops the listings of its user right away, the
+other ones rely on the modification time of the directory. This is why only the listings of filesystems with real directory
+modification times are cached: the directories of S3, GS or ABFS have none. On HDFS, a file growing or being overwritten does not
+modify its directory either, so the sizes of the listing can be stale for up to the TTL.
+
+Listings can also be filled in batches, so that the first pages sorted by name are served before the whole directory is listed.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from filebrowser.conf import LISTING_CACHE_MAX_ENTRIES, LISTING_CACHE_TTL
+
+LOG = logging.getLogger()
+
+SORT_FIELDS = ('type', 'name', 'atime', 'mtime', 'user', 'group', 'size')
+CACHED_SCHEMES = ('hdfs',)  # Filesystems whose directories are modified when an entry is added, removed or renamed
+NUMERIC_SORT_FIELDS = ('size', 'atime', 'mtime')
+
+
+def sorting_key(sortby):
+  """Generate a sorting key that handles None values for different field types."""
+  def key(item):
+    value = getattr(item, sortby)
+    if sortby in NUMERIC_SORT_FIELDS:
+      # Treat None as 0 for numeric fields for comparison
+      return 0 if value is None else value
+    else:
+      # Treat None as an empty string for non-numeric fields
+      return '' if value is None else value
+
+  return key
+
+
+class DirectoryListing(object):
+  """
+  Stats of the entries of a directory, in the order of the filesystem.
+
+  A listing filled with fetch_batches() can be partial: `remaining` is then the number of entries not listed yet and only the
+  listed entries can be read by index.
+  """
+
+  def __init__(self, mtime=None):
+    self.mtime = mtime
+    self.created = time.time()
+    self.stats = []
+    self.remaining = None
+    self.complete = False
+    self.lock = threading.RLock()
+    self._views = {}
+
+  @property
+  def count(self):
+    return len(self.stats) + (self.remaining or 0)
+
+  def __len__(self):
+    # The length of a partial listing is the number of entries of the directory, so that it can be paginated
+    return self.count
+
+  def __getitem__(self, index):
+    return self.stats[index]
+
+  def set_stats(self, stats):
+    with self.lock:
+      self.stats = list(stats)
+      self.remaining = 0
+      self.complete = True
+      self._views = {}
+
+  def fetch_batches(self, list_batch, needed=None):
+    """
+    Lists the next batches of entries until at least `needed` entries are listed, or the whole directory if None.
+
+    list_batch(start_after) returns the stats of the entries after the one named `start_after` and the number of entries left.
+    """
+    with self.lock:
+      while not self.complete and (needed is None or len(self.stats) < needed):
+        start_after = self.stats[-1].name if self.stats else None
+        stats, remaining = list_batch(start_after)
+        self.stats.extend(stats)
+        self.remaining = remaining
+        self.complete = not stats or not remaining
+      if self.complete:
+        self.remaining = 0
+
+  def sorted(self, sortby, descending=False):
+    """Returns the entries sorted by the `sortby` attribute. The listing must be complete."""
+    with self.lock:
+      if (sortby, descending) not in self._views:
+        self._views[(sortby, descending)] = sorted(self.stats, key=sorting_key(sortby), reverse=descending)
+      return self._views[(sortby, descending)]
+
+
+class ListingCache(object):
+  """
+  Keeps the most recently used directory listings, as long as they are not older than `ttl` seconds and their directory was
+  not modified. The total number of cached entries is bounded by `max_entries`.
+  """
+
+  def __init__(self, ttl, max_entries):
+    self.ttl = ttl
+    self.max_entries = max_entries
+    self._listings = OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, key, mtime=None):
+    with self._lock:
+      listing = self._listings.get(key)
+      if listing is None:
+        return None
+      if time.time() - listing.created > self.ttl or listing.mtime != mtime:
+        del self._listings[key]
+        return None
+      self._listings.move_to_end(key)
+      return listing
+
+  def set(self, key, listing):
+    if self.ttl <= 0 or listing.count > self.max_entries:
+      return
+
+    with self._lock:
+      self._listings[key] = listing
+      self._listings.move_to_end(key)
+
+      size = sum(cached.count for cached in self._listings.values())
+      while size > self.max_entries:
+        evicted_key, evicted = self._listings.popitem(last=False)
+        LOG.debug('Evicting listing of %s from the listing cache.' % (evicted_key,))
+        size -= evicted.count
+
+  def invalidate(self, user):
+    """Drops all the listings of a user, e.g. after the user modified some files."""
+    with self._lock:
+      for key in [key for key in self._listings if key[0] == user]:
+        del self._listings[key]
+
+  def clear(self):
+    with self._lock:
+      self._listings.clear()
+
+
+LISTING_CACHE = None
+
+
+def get_listing_cache():
+  global LISTING_CACHE
+  if LISTING_CACHE is None:
+    LISTING_CACHE = ListingCache(ttl=LISTING_CACHE_TTL.get(), max_entries=LISTING_CACHE_MAX_ENTRIES.get())
+  return LISTING_CACHE
@@ -104,6 +104,56 @@ def upload_file_task(**kwargs):
   return None
 
 
+@app.task()
+def copy_task(**kwargs):
+  def copy(request, progress_callback):
+    request.fs.copy(kwargs["source_path"], kwargs["destination_path"], recursive=True, owner=request.user,
+                    progress_callback=progress_callback)
+
+  return _run_fs_task(copy_task, "filecopy", copy, **kwargs)
+
+
+@app.task()
+def move_task(**kwargs):
+  def move(request, progress_callback):
+    request.fs.rename(kwargs["source_path"], kwargs["destination_path"], progress_callback=progress_callback)
+
+  return _run_fs_task(move_task, "filemove", move, **kwargs)
+
+
+def _run_fs_task(task, task_name, operation, **kwargs):
+  """Runs operation(request, progress_callback) as the user of the task and publishes its progress in the state of the task."""
+  task_id = kwargs.get("qquuid")
+  request = _get_request(user_id=kwargs["user_id"])
+  request.fs.setuser(request.user.username)
+  kwargs["username"] = request.user.username
+  kwargs["task_name"] = task_name
+  kwargs["state"] = "STARTED"
+  kwargs["progress"] = "0%"
+  kwargs["task_start"] = timezone.now().astimezone(pytz.timezone(TIME_ZONE)).strftime("%Y-%m-%dT%H:%M:%S")
+  task.update_state(task_id=task_id, state='STARTED', meta=kwargs)
+
+  def progress_callback(done, total):
+    progress = "%d%%" % (done * 100 // total)
+    if progress != kwargs["progress"]:
+      kwargs["state"] = "RUNNING"
+      kwargs["progress"] = progress
+      task.update_state(task_id=task_id, state='RUNNING', meta=kwargs)
+
+  try:
+    operation(request, progress_callback)
+  except Exception as err:
+    kwargs["state"] = "FAILURE"
+    task.update_state(task_id=task_id, state='FAILURE', meta=kwargs)
+    raise Exception("%s failed %s" % (operation.__name__.capitalize(), err))
+
+  kwargs["state"] = "SUCCESS"
+  kwargs["task_end"] = timezone.now().astimezone(pytz.timezone(TIME_ZONE)).strftime("%Y-%m-%dT%H:%M:%S.%f")
+  kwargs["progress"] = "100%"
+  task.update_state(task_id=task_id, state='SUCCESS', meta=kwargs)
+  return None
+
+
 def _get_request(postdict=None, user_id=None, scheme=None):
   request = HttpRequest()
   request.POST = postdict
@@ -33,10 +33,12 @@ from bz2 import decompress
 from datetime import datetime
 from functools import partial
 from gzip import decompress as decompress_gzip
-from io import BytesIO, StringIO as string_io
+from io import StringIO as string_io
 from urllib.parse import quote as urllib_quote, unquote as urllib_unquote, urlparse as lib_urlparse
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from avro import datafile, io
 from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers, StopUpload
 from django.core.paginator import EmptyPage, InvalidPage, Page, Paginator
@@ -122,6 +124,9 @@ MAX_FILEEDITOR_SIZE = 256 * 1024
 # Parquet files start with a specific 4-byte magic number: 'PAR1'
 PARQUET_MAGIC_NUMBER = b'PAR1'
 
+# Small reads of the Parquet footer and page headers are served from a buffer of this size instead of one remote read each
+PARQUET_READ_AHEAD_SIZE = 1024 * 1024  # 1MB
+
 INLINE_DISPLAY_MIMETYPE = re.compile(
     r'video/|image/|audio/|application/pdf|application/msword|application/excel|application/vnd\.ms|application/vnd\.openxmlformats'
 )
@@ -805,7 +810,9 @@ def display(request, path):
   if mode == 'binary':
     compression = 'none'
     # Read out based on meta.
-  compression, offset, length, contents = read_contents(compression, path, request.fs, offset, length)
+  compression, offset, length, contents = read_contents(
+    compression, path, request.fs, offset, length, columns=request.GET.getlist('columns') or None
+  )
 
   # Get contents as string for text mode, or at least try
   uni_contents = None
@@ -867,7 +874,7 @@ def _can_inline_display(path):
   return mimetype is not None and INLINE_DISPLAY_MIMETYPE.search(mimetype) and INLINE_DISPLAY_MIMETYPE_EXCEPTIONS.search(mimetype) is None
 
 
-def read_contents(codec_type, path, fs, offset, length):
+def read_contents(codec_type, path, fs, offset, length, columns=None):
   """
   Reads contents of a passed path, by appropriately decoding the data.
   Arguments:
@@ -876,6 +883,7 @@ def read_contents(codec_type, path, fs, offset, length):
      fs - The FileSystem instance to use to read.
      offset - Offset to seek to before read begins.
      length - Amount of bytes to read after offset.
+     columns - Names of the columns to read, for columnar formats (All if None).
      Returns: A tuple of codec_type, offset, length and contents read.
   """
   contents = ''
@@ -917,7 +925,7 @@ def read_contents(codec_type, path, fs, offset, length):
     elif codec_type == 'avro':
       contents = _read_avro(fhandle, path, offset, length, stats)
     elif codec_type == 'parquet':
-      contents = _read_parquet(fhandle, path, offset, length, stats)
+      contents = _read_parquet(fhandle, path, offset, length, stats, columns=columns)
     elif codec_type == 'snappy':
       contents = _read_snappy(fhandle, path, offset, length, stats)
     else:
@@ -978,18 +986,122 @@ def _read_avro(fhandle, path, offset, length, stats):
   return contents
 
 
-def _read_parquet(fhandle, path, offset, length, stats):
-  try:
-    size = 1 * 128 * 1024 * 1024  # Buffer file stream to 128 MiB chunks
+class ParquetFileReader(object):
+  """
+  Read-only and seekable file object over a remote file handle, for pyarrow.
 
-    fhandle.seek(offset)
-    file_data = BytesIO(fhandle.read(size))
+  Reads smaller than PARQUET_READ_AHEAD_SIZE are served from a read ahead buffer, bigger ones like column chunks go directly
+  to the remote file, so only the parts of the file that are needed are downloaded.
+  """
+
+  def __init__(self, fhandle, size=None):
+    self._fhandle = fhandle
+    self._size = size
+    self._pos = 0
+    self._buffer = b''
+    self._buffer_start = 0
+    self.closed = False
 
-    data_frame = pd.read_parquet(file_data, engine='pyarrow')
+  def readable(self):
+    return True
+
+  def seekable(self):
+    return True
+
+  def writable(self):
+    return False
+
+  def size(self):
+    if self._size is None:
+      self._fhandle.seek(0, os.SEEK_END)
+      self._size = self._fhandle.tell()
+    return self._size
+
+  def seek(self, offset, whence=os.SEEK_SET):
+    if whence == os.SEEK_SET:
+      self._pos = offset
+    elif whence == os.SEEK_CUR:
+      self._pos += offset
+    elif whence == os.SEEK_END:
+      self._pos = self.size() + offset
+    else:
+      raise IOError(errno.EINVAL, _("Invalid argument to seek for whence"))
+    return self._pos
+
+  def tell(self):
+    return self._pos
+
+  def read(self, length=-1):
+    if length is None or length < 0:
+      length = self.size() - self._pos
+
+    start = self._pos - self._buffer_start
+    if 0 <= start and start + length <= len(self._buffer):
+      data = self._buffer[start:start + length]
+    elif length >= PARQUET_READ_AHEAD_SIZE:
+      self._fhandle.seek(self._pos)
+      data = self._fhandle.read(length)
+    else:
+      self._fhandle.seek(self._pos)
+      self._buffer = self._fhandle.read(PARQUET_READ_AHEAD_SIZE)
+      self._buffer_start = self._pos
+      data = self._buffer[:length]
+
+    self._pos += len(data)
+    return data
+
+  def close(self):
+    self.closed = True
+
+
+def _read_parquet(fhandle, path, offset, length, stats, columns=None):
+  """
+  Returns the rows `offset` to `offset + length` of a Parquet file as text, with only the given columns if any.
+
+  Only the footer and the column chunks of the row groups holding these rows are read, one row group at a time.
+  """
+  try:
+    parquet_file = pq.ParquetFile(ParquetFileReader(fhandle, stats.size if stats else None))
+    metadata = parquet_file.metadata
+
+    row_groups = []
+    first_row = 0
+    row_group_start = 0
+    for row_group in range(metadata.num_row_groups):
+      num_rows = metadata.row_group(row_group).num_rows
+      if row_group_start + num_rows > offset and row_group_start < offset + length:
+        if not row_groups:
+          first_row = row_group_start
+        row_groups.append(row_group)
+      row_group_start += num_rows
+
+    batches = []
+    skip = offset - first_row
+    remaining = length
+    if row_groups:
+      for batch in parquet_file.iter_batches(row_groups=row_groups, columns=columns, use_pandas_metadata=True):
+        if skip >= batch.num_rows:
+          skip -= batch.num_rows
+          continue
+        batch = batch.slice(skip, remaining)
+        batches.append(batch)
+        skip = 0
+        remaining -= batch.num_rows
+        if remaining <= 0:
+          break
+
+    if batches:
+      table = pa.Table.from_batches(batches)
+    else:
+      table = parquet_file.schema_arrow.empty_table()
+      if columns:
+        table = table.select(columns)
 
-    data_chunk = data_frame.iloc[offset:offset + length].to_string()
+    data_frame = table.to_pandas()
+    if isinstance(data_frame.index, pd.RangeIndex):
+      data_frame.index = pd.RangeIndex(offset, offset + len(data_frame))
 
-    return data_chunk
+    return data_frame.to_string()
   except Exception as e:
     logging.exception('Could not read parquet file at "%s": %s' % (path, e))
     raise PopupException(_("Failed to read Parquet file."))
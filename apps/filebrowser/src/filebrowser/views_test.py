@@ -1862,6 +1862,40 @@ class TestReadParquet:
 
     assert result == expected_chunk
 
+  def test_read_parquet_row_groups(self):
+    test_df = pd.DataFrame({
+        'column1': list(range(1000)),
+        'column2': ['value%d' % i for i in range(1000)]
+    })
+    buffer = BytesIO()
+    pq.write_table(pa.Table.from_pandas(test_df), buffer, row_group_size=100)
+    buffer.seek(0)
+
+    result = _read_parquet(buffer, self.path, 195, 10, self.stats, columns=['column2'])
+
+    assert result == test_df[['column2']].iloc[195:205].to_string()
+
+  def test_read_parquet_reads_only_needed_row_groups(self):
+    test_df = pd.DataFrame({
+        'column1': list(range(100000)),
+        'column2': [os.urandom(32).hex() for _ in range(100000)]
+    })
+    buffer = BytesIO()
+    pq.write_table(pa.Table.from_pandas(test_df), buffer, row_group_size=5000, compression='none')
+    file_size = buffer.tell()
+    bytes_read = []
+
+    class RemoteFile(BytesIO):
+      def read(self, size=-1):
+        data = super(RemoteFile, self).read(size)
+        bytes_read.append(len(data))
+        return data
+
+    result = _read_parquet(RemoteFile(buffer.getvalue()), self.path, 50000, 5, Mock(size=file_size))
+
+    assert result == test_df.iloc[50000:50005].to_string()
+    assert sum(bytes_read) < file_size / 4
+
   def test_read_parquet_invalid_file(self):
     # Create an invalid file (not a Parquet file)
     invalid_file_data = BytesIO(b"Not a valid Parquet file")
@@ -33,6 +33,7 @@ from desktop.lib.exceptions_renderable import PopupException
 from desktop.lib.rest.http_client import RestException
 from hadoop.cluster import rm_ha
 from hadoop.conf import YARN_CLUSTERS
+from jobbrowser.apps_snapshot import get_apps
 from jobbrowser.conf import SHARE_JOBS
 from jobbrowser.yarn_models import Application, Container, Job as YarnJob, KilledJob as KilledYarnJob, SparkJob, YarnV2Job
 
@@ -102,7 +103,7 @@ class YarnApi(JobBrowserApi):
       filters['startedTimeBegin'] = self._get_started_time_begin(kwargs.get('time_value'), kwargs.get('time_unit'))
 
     if self.resource_manager_api:  # This happens when yarn is not configured, but we need jobbrowser for Impala
-      json = self.resource_manager_api.apps(**filters)
+      json = get_apps(self.resource_manager_api, **filters)
     else:
       json = {}
     if type(json) is str and 'This is standby RM' in json:
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Snapshot of the applications of the Resource Manager shared by all the users of the job browser.
+
+Instead of listing the applications from the Resource Manager for every refresh of every job browser, they are listed as the Hue
+service user at most every APPS_SNAPSHOT.TTL seconds and the listings are filtered from the snapshot. After the first refresh, only
+the applications started or finished since the previous one and the running ones are listed again.
+"""
+
+import time
+import logging
+import threading
+
+from desktop.conf import DEFAULT_USER
+from jobbrowser.conf import APPS_SNAPSHOT
+
+LOG = logging.getLogger()
+
+RUNNING_STATES = ('NEW', 'NEW_SAVING', 'SUBMITTED', 'ACCEPTED', 'RUNNING')
+SUPPORTED_FILTERS = ('user', 'finalStatus', 'states', 'queue', 'limit', 'startedTimeBegin')
+WINDOW_MARGIN = 60 * 60  # Seconds before the window also listed from the snapshot, e.g. by the job browser flooring its time filter
+
+
+class AppsSnapshot(object):
+  """
+  The applications started in the last `window` seconds, with a margin, or still running, indexed by user, state and queue. The
+  margin lets the listings starting around the beginning of the window use the snapshot, and it is extended by the TTL as the
+  window moves forward between two refreshes.
+
+  The next refreshes list the applications started or finished since the latest start and finish times seen in the previous ones,
+  so they do not depend on the clock of Hue.
+  """
+
+  def __init__(self, ttl, window):
+    self.ttl = ttl
+    self.window = window
+    self._kept_window = window + ttl + WINDOW_MARGIN
+    self._apps = {}  # Id -> application
+    self._indexes = {'user': {}, 'state': {}, 'queue': {}}  # Field -> value -> ids
+    self._refreshed = None
+    self._started_time = None
+    self._finished_time = None
+    self._lock = threading.Lock()
+    self._refresh_lock = threading.Lock()
+
+  def apps(self, rm_api, **filters):
+    """
+    Returns the applications matching the filters of ResourceManagerApi.apps() in the same format, or None when the snapshot does
+    not contain all of them.
+    """
+    if not self.can_list(**filters):
+      return None
+
+    self.refresh(rm_api)
+
+    with self._lock:
+      ids = None
+      if filters.get('user'):
+        ids = self._lookup('user', [filters['user']], ids)
+      if filters.get('states'):
+        ids = self._lookup('state', filters['states'].split(','), ids)
+      if filters.get('queue'):
+        ids = self._lookup('queue', [filters['queue']], ids)
+      apps = [self._apps[_id] for _id in ids] if ids is not None else list(self._apps.values())
+
+    if filters.get('finalStatus'):
+      apps = [app for app in apps if app.get('finalStatus') == filters['finalStatus']]
+    if filters.get('startedTimeBegin'):
+      apps = [app for app in apps if app.get('startedTime', 0) >= int(filters['startedTimeBegin'])]
+
+    apps.sort(key=lambda app: app['id'], reverse=True)
+    if filters.get('limit'):
+      apps = apps[:int(filters['limit'])]
+
+    return {'apps': {'app': apps} if apps else None}
+
+  def can_list(self, **filters):
+    """Only the applications started in the window or still running are in the snapshot."""
+    if any(key not in SUPPORTED_FILTERS for key in filters):
+      return False
+
+    if filters.get('startedTimeBegin'):
+      return int(filters['startedTimeBegin']) >= (time.time() - self.window - WINDOW_MARGIN) * 1000
+    elif filters.get('states'):
+      return all(state in RUNNING_STATES for state in filters['states'].split(','))
+    else:
+      return filters.get('finalStatus') == 'UNDEFINED'
+
+  def refresh(self, rm_api):
+    """Refreshes the snapshot if older than the TTL. Another thread already refreshing it returns the current snapshot."""
+    if self._refreshed is not None and time.time() - self._refreshed <= self.ttl:
+      return
+
+    if not self._refresh_lock.acquire(blocking=self._refreshed is None):
+      return
+
+    try:
+      if self._refreshed is None or time.time() - self._refreshed > self.ttl:
+        self._refresh(rm_api)
+    finally:
+      self._refresh_lock.release()
+
+  def clear(self):
+    with self._lock:
+      self._apps = {}
+      self._indexes = {'user': {}, 'state': {}, 'queue': {}}
+      self._refreshed = self._started_time = self._finished_time = None
+
+  def _refresh(self, rm_api):
+    now = time.time()
+    window_begin = int((now - self._kept_window) * 1000)
+
+    user = rm_api.setuser(DEFAULT_USER.get())
+    try:
+      if self._refreshed is None:
+        apps = _list_apps(rm_api, startedTimeBegin=window_begin)
+      else:
+        apps = _list_apps(rm_api, startedTimeBegin=self._started_time or window_begin)
+        apps += _list_apps(rm_api, finishedTimeBegin=self._finished_time or window_begin)
+      running = _list_apps(rm_api, states=','.join(RUNNING_STATES))
+    finally:
+      rm_api.setuser(user)
+
+    LOG.debug('Refreshing the snapshot of the YARN applications with %d applications' % (len(apps) + len(running)))
+
+    with self._lock:
+      for app in apps + running:
+        self._set(app)
+        self._started_time = max(self._started_time or 0, app.get('startedTime') or 0)
+        self._finished_time = max(self._finished_time or 0, app.get('finishedTime') or 0)
+
+      running_ids = set(app['id'] for app in running)
+      for app in list(self._apps.values()):
+        if (app['state'] in RUNNING_STATES and app['id'] not in running_ids) or \
+            (app['state'] not in RUNNING_STATES and app.get('startedTime', 0) < window_begin):
+          self._delete(app['id'])
+
+      self._refreshed = now
+
+  def _lookup(self, field, values, ids):
+    matches = set()
+    for value in values:
+      matches |= self._indexes[field].get(value, set())
+    return matches if ids is None else ids & matches
+
+  def _set(self, app):
+    self._delete(app['id'])
+    self._apps[app['id']] = app
+    for field, value in (('user', app.get('user')), ('state', app.get('state')), ('queue', app.get('queue'))):
+      self._indexes[field].setdefault(value, set()).add(app['id'])
+
+  def _delete(self, app_id):
+    app = self._apps.pop(app_id, None)
+    if app is not None:
+      for field, value in (('user', app.get('user')), ('state', app.get('state')), ('queue', app.get('queue'))):
+        self._indexes[field].get(value, set()).discard(app_id)
+
+
+def _list_apps(rm_api, **filters):
+  json = rm_api.apps(**filters)
+  if type(json) is str and 'This is standby RM' in json:
+    raise Exception(json)
+  return list(json['apps']['app']) if json.get('apps') else []
+
+
+APPS_SNAPSHOT_INSTANCE = None
+
+
+def get_apps_snapshot():
+  global APPS_SNAPSHOT_INSTANCE
+  if APPS_SNAPSHOT_INSTANCE is None:
+    APPS_SNAPSHOT_INSTANCE = AppsSnapshot(ttl=APPS_SNAPSHOT.TTL.get(), window=APPS_SNAPSHOT.WINDOW.get() * 24 * 60 * 60)
+  return APPS_SNAPSHOT_INSTANCE
+
+
+def get_apps(rm_api, **filters):
+  """Returns rm_api.apps(**filters), from the snapshot when possible."""
+  snapshot = get_apps_snapshot()
+  if snapshot.ttl > 0:
+    json = snapshot.apps(rm_api, **filters)
+    if json is not None:
+      return json
+  return rm_api.apps(**filters)
@@ -104,6 +104,27 @@ QUERY_STORE = ConfigSection(
   )
 )
 
+APPS_SNAPSHOT = ConfigSection(
+  key="apps_snapshot",
+  help=_("Snapshot of the YARN applications shared by all the users of the job browser, refreshed incrementally from the Resource "
+         "Manager instead of listing the applications for each user and each refresh."),
+  members=dict(
+    TTL=Config(
+      key="ttl",
+      default=0,
+      type=int,
+      help=_("Number of seconds between two refreshes of the snapshot. The applications are listed as the Hue service user and then "
+             "filtered by user. 0 disables the snapshot.")
+    ),
+    WINDOW=Config(
+      key="window",
+      default=7,
+      type=int,
+      help=_("Number of days of finished applications kept in the snapshot. Older applications are listed from the Resource Manager.")
+    ),
+  )
+)
+
 USE_PROXY = Config(
   key="use_proxy",
   help=_("Use the proxy API instead of the ORM to access the query_store."),
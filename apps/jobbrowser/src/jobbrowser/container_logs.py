@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Incremental reading of the container logs served by the NodeManagers and the JobHistory server.
+
+The logs are only appended to, so they are read by byte ranges with the `start` and `end` parameters of the log pages: a viewer
+keeps the offset of the end of what it already has and only asks for the bytes written since. A range entirely written is never
+modified anymore and its rendering is cached, which lets the other viewers of the same log skip the log server.
+"""
+
+import re
+import hashlib
+import logging
+import urllib.parse
+
+from django.core.cache import caches
+from lxml import html
+
+from desktop.lib.rest.resource import Resource
+from desktop.settings import CACHES_JOBBROWSER_LOG_SEGMENTS_KEY
+from hadoop.yarn.clients import get_log_client
+from jobbrowser.models import LinkJobLogs
+
+LOG = logging.getLogger()
+
+LOG_SEGMENT_SIZE = 1024 * 1024  # Maximum number of bytes read at once
+LOG_SEGMENT_CACHE_TIMEOUT = 60 * 60
+
+cache = caches[CACHES_JOBBROWSER_LOG_SEGMENTS_KEY]  # Bounded apart from the default cache, the segments are big
+
+# Printed by the log pages when they do not return the whole log
+TOTAL_LENGTH_RE = re.compile(r'Showing\s+(-?\d+)\s+bytes\s+of\s+(\d+)\s+total')
+
+
+class LogSegment(object):
+  """Bytes [start, end) of a log of `total` bytes, rendered as HTML with links or as plain text."""
+
+  def __init__(self, log, start, end, total):
+    self.log = log
+    self.start = start
+    self.end = end
+    self.total = total
+
+  def to_dict(self):
+    return {
+      'log': self.log,
+      'offset': self.end,
+      'total': self.total,
+    }
+
+
+def get_log_segment(log_link, name, username, start, end=None, is_embeddable=False, rendered=True):
+  """
+  Returns the segment of the log of the container from the `start` offset to `end` or at most LOG_SEGMENT_SIZE bytes after it.
+  A negative `start` is relative to the end of the log.
+  """
+  if end is None and start >= 0:
+    end = start + LOG_SEGMENT_SIZE
+
+  cache_key = _get_cache_key(log_link, name, start, end, is_embeddable, rendered) if start >= 0 else None
+  if cache_key:
+    segment = cache.get(cache_key)
+    if segment is not None:
+      return segment
+
+  text, actual_start, total = _fetch_log_range(log_link, name, username, start, end)
+  actual_end = min(end, total) if end is not None else total
+
+  segment = LogSegment(LinkJobLogs._make_hdfs_links(text, is_embeddable) if rendered else text, actual_start, actual_end, total)
+
+  if cache_key and actual_end == end:  # Entirely written
+    cache.set(cache_key, segment, LOG_SEGMENT_CACHE_TIMEOUT)
+
+  return segment
+
+
+def stream_log(log_link, name, username, start=0):
+  """Yields the plain text of the log from the `start` offset to its current end, one segment at a time."""
+  while True:
+    segment = get_log_segment(log_link, name, username, start, rendered=False)
+    if segment.log:
+      yield segment.log
+    if segment.end <= start or segment.end >= segment.total:
+      break
+    start = segment.end
+
+
+def _fetch_log_range(log_link, name, username, start, end):
+  """Returns the text of the bytes [start, end) of the log, the actual start offset and the current length of the log."""
+  params = {
+    'doAs': username,
+    'start': start,
+  }
+  if end is not None:
+    params['end'] = end
+
+  root = Resource(get_log_client(log_link), urllib.parse.urlsplit(log_link)[2], urlencode=False)
+  page = html.fromstring(root.get('/%s/' % name, params=params), parser=html.HTMLParser())
+  content = page.xpath('/html/body/table/tbody/tr/td[2]')[0]
+
+  pre = content.xpath('.//pre')
+  text = pre[0].text_content() if pre else content.text_content()
+
+  match = TOTAL_LENGTH_RE.search(content.text_content())
+  if match:
+    total = int(match.group(2))
+    start = min(max(start if start >= 0 else total + start, 0), total)
+  else:  # The whole log was returned
+    total = len(text.encode('utf-8'))
+    start = 0
+
+  return text, start, total
+
+
+def _get_cache_key(log_link, name, start, end, is_embeddable, rendered):
+  link = hashlib.sha256(log_link.encode('utf-8')).hexdigest()
+  return 'jobbrowser:log_segment:%s:%s:%d:%d:%s' % (link, name, start, end, 'html%d' % is_embeddable if rendered else 'text')
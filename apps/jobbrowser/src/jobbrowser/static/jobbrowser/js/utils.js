@@ -40,6 +40,18 @@ function appendAndScroll(element, logs) {
   }
 }
 
+function appendLogsAndScroll(element, logs, reset) {
+  if (reset) {
+    element.html(logs);
+  }
+  else {
+    element.append(logs);
+  }
+  if (element.data("logsAtEnd")) {
+    element.scrollTop(element[0].scrollHeight - element.height());
+  }
+}
+
 function resizeLogs(element) {
   element.css("overflow", "auto").height($(window).height() - element.offset().top - 80);
 }
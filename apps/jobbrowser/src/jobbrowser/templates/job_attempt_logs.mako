@@ -116,37 +116,31 @@ ${ comps.menubar() }
     initLogsElement($("#stdout-container"));
     initLogsElement($("#stderr-container"));
 
-    function refreshSyslogs() {
-      $.getJSON("${ url("jobbrowser:job_attempt_logs_json", job=job.jobId, attempt_index=attempt_index, name='syslog', offset=log_offset) }", function (data) {
-        if (data && data.log) {
-          appendAndScroll($("#syslog-container"), data.log);
-          window.setTimeout(refreshSyslogs, 5000);
+    var logUrls = {
+      syslog: "${ url("jobbrowser:job_attempt_logs_tail", job=job.jobId, attempt_index=attempt_index, name='syslog') }",
+      stdout: "${ url("jobbrowser:job_attempt_logs_tail", job=job.jobId, attempt_index=attempt_index, name='stdout') }",
+      stderr: "${ url("jobbrowser:job_attempt_logs_tail", job=job.jobId, attempt_index=attempt_index, name='stderr') }"
+    };
+
+    // Only asks for the part of the log written since the last refresh
+    function refreshLog(name, start, reset) {
+      $.getJSON(logUrls[name], { start: start }, function (data) {
+        if (data && data.status == 0 && data.offset !== undefined) {
+          appendLogsAndScroll($("#" + name + "-container"), data.log, reset);
+          window.setTimeout(function () {
+            refreshLog(name, data.offset, false);
+          }, data.offset < data.total ? 0 : 5000);
         }
-      });
-    }
-
-    function refreshStdout() {
-      $.getJSON("${ url("jobbrowser:job_attempt_logs_json", job=job.jobId, attempt_index=attempt_index, name='stdout', offset=log_offset) }", function (data) {
-        if (data && data.log) {
-          appendAndScroll($("#stdout-container"), data.log);
-          window.setTimeout(refreshStdout, 5000);
-        }
-      });
-    }
-
-    function refreshStderr() {
-      $.getJSON("${ url("jobbrowser:job_attempt_logs_json", job=job.jobId, attempt_index=attempt_index, name='stderr', offset=log_offset) }", function (data) {
-        if (data && data.log) {
-          appendAndScroll($("#stderr-container"), data.log);
-          window.setTimeout(refreshStderr, 5000);
+        else if (data && data.log) {
+          $("#" + name + "-container").text(data.log);
         }
       });
     }
 
     function refreshLogs() {
-      refreshSyslogs();
-      refreshStdout();
-      refreshStderr();
+      refreshLog("syslog", ${ log_offset }, true);
+      refreshLog("stdout", ${ log_offset }, true);
+      refreshLog("stderr", ${ log_offset }, true);
     }
 
     $(document).on("resized", function () {
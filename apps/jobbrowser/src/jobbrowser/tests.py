@@ -24,6 +24,7 @@ import logging
 import unittest
 from builtins import object, range
 from datetime import datetime
+from unittest.mock import Mock, patch
 
 import pytz
 import pytest
@@ -39,8 +40,8 @@ from hadoop.conf import YARN_CLUSTERS
 from hadoop.pseudo_hdfs4 import is_live_cluster
 from hadoop.yarn import history_server_api, mapreduce_api, resource_manager_api, spark_history_server_api
 from hadoop.yarn.spark_history_server_api import SparkHistoryServerApi
-from jobbrowser import views
-from jobbrowser.api import get_api
+from jobbrowser import apps_snapshot, container_logs, views
+from jobbrowser.api import YarnApi, get_api
 from jobbrowser.apis import job_api
 from jobbrowser.apis.query_api import QueryApi
 from jobbrowser.conf import SHARE_JOBS
@@ -63,6 +64,71 @@ class TestBrowser(object):
     assert "A Bbb Ccc" == views.format_counter_name("A_BBB_CCC")
 
 
+class TestContainerLogs(object):
+
+  LOG_LINK = 'http://nm:8042/node/containerlogs/container_1_0001_01_000001/test'
+
+  def setup_method(self):
+    container_logs.cache.clear()
+    self.log = 'line 1 /user/test/data.csv\n' * 10  # 270 bytes
+    self.patchers = [
+      patch('jobbrowser.container_logs.LOG_SEGMENT_SIZE', 100),
+      patch('jobbrowser.container_logs.get_log_client'),
+      patch('jobbrowser.container_logs.Resource', return_value=Mock(get=Mock(side_effect=self._log_page))),
+    ]
+    self.resource = [patcher.start() for patcher in self.patchers][2].return_value
+
+  def teardown_method(self):
+    for patcher in self.patchers:
+      patcher.stop()
+    container_logs.cache.clear()
+
+  def _log_page(self, relpath, params):
+    start, end = params['start'], params.get('end', len(self.log))
+    start = max(len(self.log) + start, 0) if start < 0 else min(start, len(self.log))
+    end = min(end, len(self.log))
+    showing = '<p>Showing %d bytes of %d total. Click <a href="#">here</a> for the full log.</p>' % (end - start, len(self.log))
+    return '<html><body><table><tbody><tr><td>Menu</td><td>%s<pre>%s</pre></td></tr></tbody></table></body></html>' % (
+      showing if end - start < len(self.log) else '', self.log[start:end]
+    )
+
+  def test_tail(self):
+    segment = container_logs.get_log_segment(self.LOG_LINK, 'syslog', 'test', -54)
+    assert (216, 270, 270) == (segment.start, segment.end, segment.total)
+    assert 'line 1 <a href="/filebrowser/view=/user/test/data.csv">/user/test/data.csv</a>\n' * 2 == segment.log
+
+    segment = container_logs.get_log_segment(self.LOG_LINK, 'syslog', 'test', 270)
+    assert ('', 270, 270) == (segment.log, segment.end, segment.total)
+
+    self.log += 'line 2\n'
+    segment = container_logs.get_log_segment(self.LOG_LINK, 'syslog', 'test', 270)
+    assert ('line 2\n', 277, 277) == (segment.log, segment.end, segment.total)
+    assert {'start': 270, 'end': 370, 'doAs': 'test'} == self.resource.get.call_args[1]['params']
+
+  def test_complete_segments_cached(self):
+    segment = container_logs.get_log_segment(self.LOG_LINK, 'syslog', 'test', 0)
+    assert self.log[:100] == container_logs.get_log_segment(self.LOG_LINK, 'syslog', 'test', 0, rendered=False).log
+    assert (0, 100) == (segment.start, segment.end)
+    assert segment.log == container_logs.get_log_segment(self.LOG_LINK, 'syslog', 'test', 0).log
+    assert 2 == self.resource.get.call_count
+
+    container_logs.get_log_segment(self.LOG_LINK, 'syslog', 'test', 200)  # Being written
+    container_logs.get_log_segment(self.LOG_LINK, 'syslog', 'test', 200)
+    assert 4 == self.resource.get.call_count
+
+  def test_stream_log(self):
+    assert self.log == ''.join(container_logs.stream_log(self.LOG_LINK, 'stdout', 'test'))
+    assert 3 == self.resource.get.call_count
+
+  def test_logs_tail_invalid_start(self):
+    request = Mock(GET={'start': 'end'})
+
+    response = views.job_attempt_logs_tail.__wrapped__(request, job=Mock())
+
+    assert -1 == json.loads(response.content)['status']
+    assert not self.resource.get.called
+
+
 def get_hadoop_job_id(oozie_api, oozie_jobid, action_index=1, timeout=60, step=5):
   hadoop_job_id = None
   start = time.time()
@@ -77,6 +143,108 @@ def get_hadoop_job_id(oozie_api, oozie_jobid, action_index=1, timeout=60, step=5
   return hadoop_job_id
 
 
+class TestAppsSnapshot(object):
+
+  def setup_method(self):
+    self.now = 1000000.0
+    self.rm_apps = [
+      {'id': 'application_1_0001', 'user': 'test', 'state': 'FINISHED', 'finalStatus': 'SUCCEEDED', 'queue': 'default',
+       'startedTime': 999000000, 'finishedTime': 999500000},
+      {'id': 'application_1_0002', 'user': 'test', 'state': 'RUNNING', 'finalStatus': 'UNDEFINED', 'queue': 'default',
+       'startedTime': 999600000, 'finishedTime': 0},
+      {'id': 'application_1_0003', 'user': 'other', 'state': 'RUNNING', 'finalStatus': 'UNDEFINED', 'queue': 'etl',
+       'startedTime': 999700000, 'finishedTime': 0},
+    ]
+    self.rm_api = Mock(apps=Mock(side_effect=self._apps), setuser=Mock(return_value='test'))
+    self.patcher = patch('jobbrowser.apps_snapshot.time')
+    self.patcher.start().time.side_effect = lambda: self.now
+    self.snapshot = apps_snapshot.AppsSnapshot(ttl=10, window=24 * 60 * 60)
+
+  def teardown_method(self):
+    self.patcher.stop()
+
+  def _apps(self, **filters):
+    apps = [dict(app) for app in self.rm_apps]
+    if filters.get('startedTimeBegin'):
+      apps = [app for app in apps if app['startedTime'] >= filters['startedTimeBegin']]
+    if filters.get('finishedTimeBegin'):
+      apps = [app for app in apps if app['finishedTime'] >= filters['finishedTimeBegin']]
+    if filters.get('states'):
+      apps = [app for app in apps if app['state'] in filters['states'].split(',')]
+    return {'apps': {'app': apps} if apps else None}
+
+  def _ids(self, **filters):
+    json = self.snapshot.apps(self.rm_api, **filters)
+    return [app['id'] for app in json['apps']['app']] if json['apps'] else []
+
+  def test_filters(self):
+    assert ['application_1_0003', 'application_1_0002', 'application_1_0001'] == self._ids(startedTimeBegin=998000000)
+    assert ['application_1_0002', 'application_1_0001'] == self._ids(user='test', startedTimeBegin=998000000)
+    assert ['application_1_0003'] == self._ids(states='RUNNING', queue='etl')
+    assert ['application_1_0002'] == self._ids(user='test', finalStatus='UNDEFINED')
+    assert ['application_1_0003'] == self._ids(startedTimeBegin=998000000, limit=1)
+
+    assert None is self.snapshot.apps(self.rm_api, startedTimeBegin=1000)  # Before the window
+    assert None is self.snapshot.apps(self.rm_api, user='test')
+    assert None is self.snapshot.apps(self.rm_api, states='FINISHED')
+
+    self.rm_api.setuser.assert_any_call('hue')
+    self.rm_api.setuser.assert_called_with('test')
+
+  def test_incremental_refresh(self):
+    self._ids(startedTimeBegin=998000000)
+    self._ids(startedTimeBegin=998000000)
+    assert 2 == self.rm_api.apps.call_count
+
+    self.rm_apps[1].update(state='FINISHED', finalStatus='FAILED', finishedTime=1000005000)
+    del self.rm_apps[2]  # Forgotten by the Resource Manager
+    self.rm_apps.append({
+      'id': 'application_1_0004', 'user': 'test', 'state': 'ACCEPTED', 'finalStatus': 'UNDEFINED', 'queue': 'default',
+      'startedTime': 1000008000, 'finishedTime': 0
+    })
+    self.now += 11
+
+    assert ['application_1_0004', 'application_1_0002', 'application_1_0001'] == self._ids(startedTimeBegin=998000000)
+    assert [] == self._ids(user='test', states='RUNNING')
+    assert ['application_1_0004'] == self._ids(states='ACCEPTED')
+    assert ['application_1_0002'] == self._ids(finalStatus='FAILED', startedTimeBegin=998000000)
+
+    self.rm_api.apps.assert_any_call(startedTimeBegin=999700000)
+    self.rm_api.apps.assert_any_call(finishedTimeBegin=999500000)
+    assert 5 == self.rm_api.apps.call_count
+
+  def test_jobs_of_the_last_days(self):
+    self.now = time.time()  # The job browser computes the beginning of its time filter with the actual time
+    for app in self.rm_apps:
+      app['startedTime'] += int(self.now * 1000) - 1000000000
+      app['finishedTime'] and app.update(finishedTime=app['finishedTime'] + int(self.now * 1000) - 1000000000)
+    snapshot = apps_snapshot.AppsSnapshot(ttl=10, window=7 * 24 * 60 * 60)
+    user = Mock(username='test')
+
+    with patch('jobbrowser.apps_snapshot.get_apps_snapshot', return_value=snapshot):
+      with patch('jobbrowser.api.YARN_CLUSTERS', {'default': Mock()}):
+        with patch('jobbrowser.api.resource_manager_api.get_resource_manager', return_value=self.rm_api):
+          with patch('jobbrowser.api.mapreduce_api.get_mapreduce_api'):
+            with patch('jobbrowser.api.history_server_api.get_history_server_api'):
+              with patch('jobbrowser.api.spark_history_server_api.get_history_server_api'):
+                with patch('jobbrowser.api.Application', side_effect=lambda app: Mock(**app)):
+                  api = YarnApi(user)
+
+                  for i in range(3):
+                    self.now += 5
+                    jobs = api.get_jobs(user, username='test', state='all', text='', time_value=7, time_unit='days')
+                    assert ['application_1_0002', 'application_1_0001'] == [job.id for job in jobs]
+
+    assert 2 == self.rm_api.apps.call_count  # Only the first refresh of the snapshot
+    assert all('user' not in call[1] for call in self.rm_api.apps.call_args_list)
+
+  def test_get_apps_disabled(self):
+    with patch('jobbrowser.apps_snapshot.get_apps_snapshot', return_value=apps_snapshot.AppsSnapshot(ttl=0, window=60)):
+      apps_snapshot.get_apps(self.rm_api, user='test', finalStatus='UNDEFINED')
+
+    self.rm_api.apps.assert_called_once_with(user='test', finalStatus='UNDEFINED')
+
+
 @pytest.mark.requires_hadoop
 @pytest.mark.integration
 class TestJobBrowserWithHadoop(TestCase, OozieServerProvider):
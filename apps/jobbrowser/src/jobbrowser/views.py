@@ -27,7 +27,7 @@ import urllib.request
 from builtins import filter, str
 from urllib.parse import quote_plus
 
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, StreamingHttpResponse
 from django.urls import reverse
 from django.utils.functional import wraps
 from django.utils.translation import gettext as _
@@ -46,6 +46,7 @@ from desktop.views import register_status_bar_view
 from hadoop import cluster
 from hadoop.yarn import resource_manager_api as resource_manager_api
 from hadoop.yarn.clients import get_log_client
+from jobbrowser import container_logs
 from jobbrowser.api import ApplicationNotRunning, JobExpired, get_api
 from jobbrowser.conf import LOG_OFFSET, SHARE_JOBS
 from jobbrowser.models import LinkJobLogs, can_kill_job, can_view_job
@@ -357,32 +358,9 @@ def job_attempt_logs(request, job, attempt_index=0):
 @check_job_permission
 def job_attempt_logs_json(request, job, attempt_index=0, name='syslog', offset=LOG_OFFSET_BYTES, is_embeddable=False):
   """For async log retrieval as Yarn servers are very slow"""
-  log_link = None
   response = {'status': -1}
 
-  try:
-    jt = get_api(request.user, request.jt)
-    app = jt.get_application(job.jobId)
-
-    if app['applicationType'] == 'MAPREDUCE':
-      if app['finalStatus'] in ('SUCCEEDED', 'FAILED', 'KILLED'):
-        attempt_index = int(attempt_index)
-        if not job.job_attempts['jobAttempt']:
-          response = {'status': 0, 'log': _('Job has no tasks')}
-        else:
-          attempt = job.job_attempts['jobAttempt'][attempt_index]
-
-          log_link = attempt['logsLink']
-          # Reformat log link to use YARN RM, replace node addr with node ID addr
-          log_link = log_link.replace(attempt['nodeHttpAddress'], attempt['nodeId'])
-      elif app['state'] == 'RUNNING':
-        log_link = app['amContainerLogs']
-    elif app.get('amContainerLogs'):
-      log_link = app.get('amContainerLogs')
-  except (KeyError, RestException) as e:
-    raise KeyError(_("Cannot find job attempt '%(id)s'.") % {'id': job.jobId}, e)
-  except Exception as e:
-    raise Exception(_("Failed to get application for job %s: %s") % (job.jobId, e))
+  log_link = _get_job_attempt_log_link(request, job, attempt_index, response)
 
   if log_link:
     link = '/%s/' % name
@@ -416,6 +394,68 @@ def job_attempt_logs_json(request, job, attempt_index=0, name='syslog', offset=L
   return JsonResponse(response)
 
 
+@check_job_permission
+def job_attempt_logs_tail(request, job, attempt_index=0, name='syslog'):
+  """
+  Returns the part of the log written after the `start` offset, at most LOG_SEGMENT_SIZE bytes, and the `offset` to ask for next.
+
+  A negative `start` returns the end of the log. With format=text, the log is streamed as plain text from `start` to its end.
+  """
+  response = {'status': -1}
+  try:
+    start = int(request.GET.get('start', LOG_OFFSET_BYTES))
+  except ValueError:
+    response['message'] = _('Invalid start offset: %s') % request.GET.get('start')
+    return JsonResponse(response)
+
+  log_link = _get_job_attempt_log_link(request, job, attempt_index, response)
+
+  if log_link and request.GET.get('format') == 'text':
+    stream = container_logs.stream_log(log_link, name, request.user.username, start=start)
+    return StreamingHttpResponse(stream, content_type='text/plain; charset=utf-8')
+  elif log_link:
+    try:
+      segment = container_logs.get_log_segment(log_link, name, request.user.username, start)
+      response.update(segment.to_dict())
+      response['status'] = 0
+    except Exception as e:
+      LOG.exception('Failed to retrieve log %s of %s' % (name, log_link))
+      response['log'] = _('Failed to retrieve log: %s' % e)
+
+  return JsonResponse(response)
+
+
+def _get_job_attempt_log_link(request, job, attempt_index, response):
+  """Returns the link to the logs of the attempt, or None and sets the message of the response when the job has no tasks."""
+  log_link = None
+
+  try:
+    jt = get_api(request.user, request.jt)
+    app = jt.get_application(job.jobId)
+
+    if app['applicationType'] == 'MAPREDUCE':
+      if app['finalStatus'] in ('SUCCEEDED', 'FAILED', 'KILLED'):
+        attempt_index = int(attempt_index)
+        if not job.job_attempts['jobAttempt']:
+          response.update({'status': 0, 'log': _('Job has no tasks')})
+        else:
+          attempt = job.job_attempts['jobAttempt'][attempt_index]
+
+          log_link = attempt['logsLink']
+          # Reformat log link to use YARN RM, replace node addr with node ID addr
+          log_link = log_link.replace(attempt['nodeHttpAddress'], attempt['nodeId'])
+      elif app['state'] == 'RUNNING':
+        log_link = app['amContainerLogs']
+    elif app.get('amContainerLogs'):
+      log_link = app.get('amContainerLogs')
+  except (KeyError, RestException) as e:
+    raise KeyError(_("Cannot find job attempt '%(id)s'.") % {'id': job.jobId}, e)
+  except Exception as e:
+    raise Exception(_("Failed to get application for job %s: %s") % (job.jobId, e))
+
+  return log_link
+
+
 @check_job_permission
 def job_single_logs(request, job, offset=LOG_OFFSET_BYTES):
   """
@@ -43,6 +43,13 @@ DEFAULT_USER_GROUP = Config(
     type=str,
     default='default')
 
+PERMISSION_CACHE_TTL = Config(
+    key="permission_cache_ttl",
+    help=_("Number of seconds the permissions of a user are reused across requests. They are dropped as soon as a group or a "
+           "permission is modified through this server. 0 looks them up once per request."),
+    type=int,
+    default=10)
+
 PASSWORD_POLICY = ConfigSection(
   key="password_policy",
   help=_("Configuration options for user password policy"),
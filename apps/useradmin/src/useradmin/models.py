@@ -39,6 +39,7 @@ elaborations to manipulate this row by row. This does not map nicely onto action
 """
 import sys
 import json
+import time
 import logging
 import collections
 from datetime import datetime
@@ -57,7 +58,7 @@ from desktop.lib.connectors.models import Connector, _get_installed_connectors
 from desktop.lib.exceptions_renderable import PopupException
 from desktop.lib.idbroker.conf import is_idbroker_enabled
 from desktop.monkey_patches import monkey_patch_username_validator
-from useradmin.conf import DEFAULT_USER_GROUP
+from useradmin.conf import DEFAULT_USER_GROUP, PERMISSION_CACHE_TTL
 from useradmin.permissions import GroupPermission, HuePermission, LdapGroup
 
 if ENABLE_ORGANIZATIONS.get():
@@ -73,6 +74,8 @@ else:
 
 LOG = logging.getLogger()
 
+PERMISSIONS_VERSION_KEY = 'permissions_version'
+
 
 class UserProfile(models.Model):
   """
@@ -101,13 +104,35 @@ class UserProfile(models.Model):
       cache.set('perms', perms, 60 * 60)
     return perms.get('%s:%s' % (app, action))
 
+  def _get_permission_keys(self):
+    """
+    The 'app:action' keys of the permissions granted to the groups of the user.
+
+    They are looked up once per profile, i.e. once per request, and cached for PERMISSION_CACHE_TTL seconds across requests,
+    until the version of the permissions changes.
+    """
+    version = get_permissions_version()
+    cached = getattr(self, '_cached_permission_keys', None)
+
+    if cached is None or cached[0] != version:
+      cache_key = 'user_permissions:%s:%s' % (self.user.id, version)
+      permission_keys = cache.get(cache_key) if PERMISSION_CACHE_TTL.get() > 0 else None
+
+      if permission_keys is None:
+        permission_keys = frozenset(
+          '%s:%s' % permission
+          for permission in GroupPermission.objects.filter(
+            group__in=self.user.groups.all()
+          ).values_list('hue_permission__app', 'hue_permission__action')
+        )
+        if PERMISSION_CACHE_TTL.get() > 0:
+          cache.set(cache_key, permission_keys, PERMISSION_CACHE_TTL.get())
+
+      cached = self._cached_permission_keys = (version, permission_keys)
+
+    return cached[1]
+
   def has_hue_permission(self, action=None, app=None, perm=None):
-    if perm is None:
-      try:
-        perm = self._lookup_permission(app, action)
-      except HuePermission.DoesNotExist:
-        LOG.exception("Permission object %s - %s not available. Was Django migrate command run after installation?" % (app, action))
-        return self.user.is_superuser
     if self.user.is_superuser:
       return True
     if ENABLE_CONNECTORS.get() and app in ('jobbrowser', 'metastore', 'filebrowser', 'indexer', 'useradmin', 'notebook'):
@@ -116,8 +141,9 @@ class UserProfile(models.Model):
       else:
         return True
 
-    group_ids = self.user.groups.values_list('id', flat=True)
-    return GroupPermission.objects.filter(group__id__in=group_ids, hue_permission=perm).exists()
+    if perm is not None:
+      app, action = perm.app, perm.action
+    return '%s:%s' % (app, action) in self._get_permission_keys()
 
   def get_permissions(self):
     return HuePermission.objects.filter(groups__user=self.user)
@@ -163,6 +189,26 @@ def get_profile(user):
     return profile
 
 
+def get_permissions_version():
+  """Version of the groups and permissions, changed each time a permission is granted or revoked."""
+  version = cache.get(PERMISSIONS_VERSION_KEY)
+  if version is None:
+    version = _new_permissions_version()
+  return version
+
+
+def _new_permissions_version():
+  version = time.time_ns()
+  cache.set(PERMISSIONS_VERSION_KEY, version, None)
+  return version
+
+
+def _permissions_changed(**kwargs):
+  _new_permissions_version()
+  # Permissions looked up by other requests until the change is committed are the previous ones
+  transaction.on_commit(_new_permissions_version)
+
+
 def group_has_permission(group, perm):
   return GroupPermission.objects.filter(group=group, hue_permission=perm).exists()
 
@@ -310,6 +356,11 @@ def update_app_permissions(**kwargs):
 
 if not ENABLE_CONNECTORS.get():
   models.signals.post_migrate.connect(update_app_permissions)
+
+models.signals.post_save.connect(_permissions_changed, sender=GroupPermission)
+models.signals.post_delete.connect(_permissions_changed, sender=GroupPermission)
+models.signals.post_delete.connect(_permissions_changed, sender=Group)
+models.signals.m2m_changed.connect(_permissions_changed, sender=User.groups.through)
 # models.signals.post_migrate.connect(get_default_user_group)
 
 
@@ -369,6 +369,32 @@ class TestUserProfile(BaseUserAdminTests):
     userprofile = get_profile(user)
     assert 'es' == userprofile.data['language_preference']
 
+  def test_permissions_looked_up_once(self):
+    user = create_user(username='test', password='test', is_superuser=False)
+    group = Group.objects.create(name='test_permissions_looked_up_once')
+    user.groups.add(group)
+    perm, created = HuePermission.objects.get_or_create(app='beeswax', action='access', defaults={'description': 'Launch this application'})
+    GroupPermission.objects.create(group=group, hue_permission=perm)
+
+    profile = get_profile(user)
+    with patch.object(GroupPermission.objects, 'filter', wraps=GroupPermission.objects.filter) as lookup:
+      assert profile.has_hue_permission(action='access', app='beeswax')
+      assert profile.has_hue_permission(perm=perm)
+      assert not profile.has_hue_permission(action='write', app='beeswax')
+      assert 1 == lookup.call_count
+
+      assert get_profile(User.objects.get(id=user.id)).has_hue_permission(action='access', app='beeswax')  # Next request
+      assert 1 == lookup.call_count
+
+    GroupPermission.objects.filter(group=group, hue_permission=perm).delete()
+    assert not profile.has_hue_permission(action='access', app='beeswax')
+
+    GroupPermission.objects.create(group=group, hue_permission=perm)
+    assert profile.has_hue_permission(action='access', app='beeswax')
+
+    user.groups.remove(group)
+    assert not profile.has_hue_permission(action='access', app='beeswax')
+
 
 @pytest.mark.django_db
 class TestSAMLGroupsCheck(BaseUserAdminTests):
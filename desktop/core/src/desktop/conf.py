@@ -1087,6 +1087,15 @@ ENABLE_SMART_THRIFT_POOL = Config(
   default=False
 )
 
+THRIFT_POOL_IDLE_TIMEOUT = Config(
+  key="thrift_pool_idle_timeout",
+  help=_("Number of seconds after which a Thrift connection left unused in the connection pool of a service is closed. "
+         "Pools open their connections when needed, up to cherrypy_server_threads connections per service. "
+         "0 keeps the connections open."),
+  type=int,
+  default=0
+)
+
 
 # See python's documentation for time.tzset for valid values.
 TIME_ZONE = Config(
@@ -1947,6 +1956,17 @@ ENABLE_WORKFLOW_CREATION_ACTION = Config(
   default=True,
 )
 
+DOCUMENT_SEARCH_INDEX = Config(
+  key="document_search_index",
+  help=_(
+    'How the documents and the query history are searched: "database" matches the text anywhere in their name, description or '
+    'statement, "native" uses the full text search of PostgreSQL or MySQL, and "local" keeps an inverted index of the documents '
+    'in the memory of each Hue process. "native" and "local" match the words of the text by prefix and rank the documents by '
+    'relevance. On MySQL, run the create_document_search_index command first.'),
+  type=str,
+  default='database',
+)
+
 USE_NEW_ASSIST_PANEL = Config(
   key='use_new_assist_panel',
   default=False,
@@ -2081,6 +2101,19 @@ TASK_SERVER = ConfigSection(
       default='{"BACKEND": "django_redis.cache.RedisCache", "LOCATION": "redis://localhost:6379/0", '
       '"OPTIONS": {"CLIENT_CLASS": "django_redis.client.DefaultClient"},"KEY_PREFIX": "queries"}'
     ),
+    RESULT_CACHE_BLOCK_SIZE=Config(
+      key='result_cache_block_size',
+      default=1000,
+      type=coerce_positive_integer,
+      help=_('Number of query result rows stored together under a single key of the result cache.')
+    ),
+    RESULT_CACHE_MAX_SIZE=Config(
+      key='result_cache_max_size',
+      default=256 * 1024 * 1024,
+      type=coerce_positive_integer,
+      help=_('Approximate maximum size in bytes of all the query results kept in the result cache. '
+      'The least recently read results are evicted first.')
+    ),
     RESULT_STORAGE=Config(
       key='result_storage',
       type=str,
@@ -2495,7 +2528,36 @@ RAZ = ConfigSection(
       key='is_raz_gs_enabled',
       default=False,
       type=coerce_bool
-    )
+    ),
+    CACHE_TTL=Config(
+      key='cache_ttl',
+      help=_('Number of seconds a denial of RAZ, or the signature of an identical S3 or GS read request, is reused. ADLS SAS tokens are '
+             'reused until they expire. 0 disables the cache.'),
+      type=int,
+      default=60,
+    ),
+  )
+)
+
+
+FILESYSTEM_TRANSFER = ConfigSection(
+  key='filesystem_transfer',
+  help=_("""Configuration of the copies and moves of files between two different filesystems, e.g. from HDFS to S3."""),
+  members=dict(
+    PARALLELISM=Config(
+      key='parallelism',
+      help=_('Number of files transferred at the same time. Each transfer holds at most two chunks of the upload chunk size of the '
+             'destination filesystem in memory.'),
+      type=coerce_positive_integer,
+      default=4,
+    ),
+    VERIFY_CHECKSUM=Config(
+      key='verify_checksum',
+      help=_('Read back each transferred file and compare its MD5 checksum with the one of its source. The size of the files is '
+             'always verified.'),
+      type=coerce_bool,
+      default=False,
+    ),
   )
 )
 
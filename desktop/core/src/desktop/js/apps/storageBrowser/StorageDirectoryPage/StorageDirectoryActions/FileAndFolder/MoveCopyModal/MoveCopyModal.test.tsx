@@ -15,12 +15,14 @@
 // limitations under the License.
 
 import React from 'react';
-import { render, fireEvent, waitFor } from '@testing-library/react';
+import { render, fireEvent, waitFor, act } from '@testing-library/react';
 import '@testing-library/jest-dom';
 import MoveCopyModal from './MoveCopyModal';
 import { ActionType } from '../FileAndFolderActions.util';
 import { BULK_COPY_API_URL, BULK_MOVE_API_URL } from '../../../../api';
 import { StorageDirectoryTableData } from '../../../../types';
+import useSaveData from '../../../../../../utils/hooks/useSaveData/useSaveData';
+import { GET_TASKS_URL } from '../../../../../../reactComponents/TaskServer/constants';
 
 const mockFiles: StorageDirectoryTableData[] = [
   {
@@ -64,8 +66,22 @@ jest.mock('../../../../../../utils/hooks/useSaveData/useSaveData', () => ({
   }))
 }));
 
+const mockGet = jest.fn();
+jest.mock('../../../../../../api/utils', () => ({
+  ...jest.requireActual('../../../../../../api/utils'),
+  get: (...args: unknown[]) => mockGet(...args)
+}));
+
 const currentPath = 'test/path';
 
+// Calls the onSuccess option given to useSaveData as a save running in the task server would
+const mockSaveWithTasks = () => {
+  mockSave.mockImplementationOnce(() => {
+    const calls = (useSaveData as jest.Mock).mock.calls;
+    calls[calls.length - 1][1].onSuccess({ task_ids: { 'test/path/folder1': 'task-1' } });
+  });
+};
+
 describe('MoveCopy Action Component', () => {
   const mockOnSuccess = jest.fn();
   const mockOnError = jest.fn();
@@ -239,4 +255,86 @@ describe('MoveCopy Action Component', () => {
       expect(mockSave).toHaveBeenCalledWith(formData, { url: BULK_MOVE_API_URL });
     });
   });
+
+  describe('Task server', () => {
+    afterEach(() => {
+      mockGet.mockReset();
+      jest.useRealTimers();
+    });
+
+    it('should call onSuccess once the copy tasks succeeded', async () => {
+      mockSaveWithTasks();
+      mockGet.mockResolvedValueOnce([{ taskId: 'task-1', status: 'SUCCESS' }]);
+      const { getByText } = render(
+        <MoveCopyModal
+          isOpen={true}
+          action={ActionType.Copy}
+          currentPath={currentPath}
+          files={mockFiles}
+          onSuccess={mockOnSuccess}
+          onError={mockOnError}
+          onClose={mockOnClose}
+        />
+      );
+
+      fireEvent.click(getByText('folder1'));
+      fireEvent.click(getByText('Copy'));
+
+      await waitFor(() => {
+        expect(mockGet).toHaveBeenCalledWith(GET_TASKS_URL);
+        expect(mockOnSuccess).toHaveBeenCalledTimes(1);
+      });
+      expect(mockOnError).not.toHaveBeenCalled();
+    });
+
+    it('should call onError when a move task failed', async () => {
+      mockSaveWithTasks();
+      mockGet.mockResolvedValueOnce([{ taskId: 'task-1', status: 'FAILURE' }]);
+      const { getByText } = render(
+        <MoveCopyModal
+          isOpen={true}
+          action={ActionType.Move}
+          currentPath={currentPath}
+          files={mockFiles}
+          onSuccess={mockOnSuccess}
+          onError={mockOnError}
+          onClose={mockOnClose}
+        />
+      );
+
+      fireEvent.click(getByText('folder1'));
+      fireEvent.click(getByText('Move'));
+
+      await waitFor(() => expect(mockOnError).toHaveBeenCalledTimes(1));
+      expect(mockOnSuccess).not.toHaveBeenCalled();
+    });
+
+    it('should call onError when a task stays missing from the task server', async () => {
+      jest.useFakeTimers();
+      mockSaveWithTasks();
+      mockGet.mockResolvedValue([{ taskId: 'other-task', status: 'RUNNING' }]);
+      const { getByText } = render(
+        <MoveCopyModal
+          isOpen={true}
+          action={ActionType.Copy}
+          currentPath={currentPath}
+          files={mockFiles}
+          onSuccess={mockOnSuccess}
+          onError={mockOnError}
+          onClose={mockOnClose}
+        />
+      );
+
+      fireEvent.click(getByText('folder1'));
+      fireEvent.click(getByText('Copy'));
+
+      await act(async () => {
+        await jest.advanceTimersByTimeAsync(2 * 5000);
+      });
+
+      expect(mockGet).toHaveBeenCalledTimes(3);
+      expect(mockOnError).toHaveBeenCalledTimes(1);
+      expect(mockOnSuccess).not.toHaveBeenCalled();
+    });
+  });
 });
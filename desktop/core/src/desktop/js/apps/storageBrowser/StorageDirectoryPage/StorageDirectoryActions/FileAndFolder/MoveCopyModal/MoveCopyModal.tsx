@@ -16,12 +16,27 @@
 
 import React from 'react';
 import { i18nReact } from '../../../../../../utils/i18nReact';
+import huePubSub from '../../../../../../utils/huePubSub';
 import useSaveData from '../../../../../../utils/hooks/useSaveData/useSaveData';
+import { getStatusHashMap } from '../../../../../../utils/hooks/useFileUpload/utils';
+import { get } from '../../../../../../api/utils';
+import { GET_TASKS_URL } from '../../../../../../reactComponents/TaskServer/constants';
+import { TaskServerResponse, TaskStatus } from '../../../../../../reactComponents/TaskServer/types';
 import { ActionType } from '../FileAndFolderActions.util';
 import { BULK_COPY_API_URL, BULK_MOVE_API_URL } from '../../../../api';
 import FileChooserModal from '../../../../FileChooserModal/FileChooserModal';
 import { FileStats, StorageDirectoryTableData } from '../../../../types';
 
+const TASK_POLL_INTERVAL = 5000;
+// Polls in a row after which a task missing from the task server, e.g. expired, has failed
+const MAX_MISSING_TASK_POLLS = 3;
+const REVOKED_TASK_STATUS = 'REVOKED';
+
+interface BulkOperationResponse {
+  // Operations running in the task server, by source path
+  task_ids?: Record<string, string>;
+}
+
 interface MoveCopyModalProps {
   isOpen?: boolean;
   action: ActionType.Copy | ActionType.Move;
@@ -43,9 +58,52 @@ const MoveCopyModal = ({
 }: MoveCopyModalProps): JSX.Element => {
   const { t } = i18nReact.useTranslation();
 
-  const { save } = useSaveData(undefined, {
+  // Resolves once all the tasks succeeded, rejects when one failed, was revoked or stayed missing
+  const waitForTasks = async (taskIds: string[]): Promise<void> => {
+    const missingPolls: Record<string, number> = {};
+    let pendingTaskIds = taskIds;
+    while (pendingTaskIds.length) {
+      const statusMap = getStatusHashMap(await get<TaskServerResponse[]>(GET_TASKS_URL));
+      pendingTaskIds.forEach(taskId => {
+        missingPolls[taskId] = statusMap[taskId] ? 0 : (missingPolls[taskId] ?? 0) + 1;
+      });
+      const hasFailed = pendingTaskIds.some(
+        taskId =>
+          statusMap[taskId] === TaskStatus.Failure ||
+          String(statusMap[taskId]) === REVOKED_TASK_STATUS ||
+          missingPolls[taskId] >= MAX_MISSING_TASK_POLLS
+      );
+      if (hasFailed) {
+        throw new Error(
+          action === ActionType.Move
+            ? t('Failed to move some of the files and folders')
+            : t('Failed to copy some of the files and folders')
+        );
+      }
+      pendingTaskIds = pendingTaskIds.filter(taskId => statusMap[taskId] !== TaskStatus.Success);
+      if (pendingTaskIds.length) {
+        await new Promise(resolve => setTimeout(resolve, TASK_POLL_INTERVAL));
+      }
+    }
+  };
+
+  const handleSuccess = (response?: BulkOperationResponse) => {
+    const taskIds = Object.values(response?.task_ids ?? {});
+    if (!taskIds.length) {
+      return onSuccess();
+    }
+    huePubSub.publish('hue.global.info', {
+      message:
+        action === ActionType.Move
+          ? t('Moving in the background, the task server reports the progress')
+          : t('Copying in the background, the task server reports the progress')
+    });
+    waitForTasks(taskIds).then(onSuccess).catch(onError);
+  };
+
+  const { save } = useSaveData<BulkOperationResponse>(undefined, {
     skip: !files.length,
-    onSuccess: onSuccess,
+    onSuccess: handleSuccess,
     onError: onError
   });
 
@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Search of the documents and of the query history.
+
+The index is selected by DOCUMENT_SEARCH_INDEX:
+  database: substring matching of the name, description and searchable text of the documents, which scans the whole table.
+  native: full text search of PostgreSQL or MySQL, substring matching on the other databases.
+  local: inverted index of the words of the documents, kept in the memory of the process. It is updated when a document is
+         saved or deleted by the process and catches up with the documents modified by the other processes before each search.
+
+native and local match the documents containing all the words of the text, by prefix, and can rank them by relevance.
+"""
+
+import re
+import bisect
+import logging
+import threading
+from collections import OrderedDict
+
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.signals import post_delete, post_save
+
+from desktop.conf import DOCUMENT_SEARCH_INDEX
+
+LOG = logging.getLogger()
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# Weights of the fields of a document in the relevance of a match
+NAME_WEIGHT = 4
+DESCRIPTION_WEIGHT = 2
+SEARCH_WEIGHT = 1
+EXACT_WORD_WEIGHT = 1  # Added when a word of the text is a whole word of the document
+
+LOCAL_MAX_RESULTS = 1000
+LOCAL_MATCHES_CHUNK_SIZE = 500  # Matches looked up at once in the documents of the user
+
+TEXT_COLUMNS = ('name', 'description', 'search')
+
+
+def tokenize(text):
+  """Returns the lowercased words of the text. The parts of the words joined by underscores, like in web_logs, are words too."""
+  words = []
+  for word in WORD_RE.findall(text.lower()) if text else []:
+    words.append(word)
+    if '_' in word:
+      words.extend(part for part in word.split('_') if part)
+  return list(OrderedDict.fromkeys(words))
+
+
+class DatabaseSearchIndex(object):
+  """Matches the text anywhere in the name, description or searchable text of the documents."""
+
+  def search(self, documents, text, ranked=False):
+    """
+    Returns the documents of the queryset matching the text.
+
+    When `ranked`, they are ordered by relevance then by last modification.
+    """
+    documents = documents.filter(Q(name__icontains=text) | Q(description__icontains=text) | Q(search__icontains=text))
+
+    if ranked:
+      documents = documents.annotate(
+        search_rank=Case(
+          When(name__icontains=text, then=Value(NAME_WEIGHT)),
+          When(description__icontains=text, then=Value(DESCRIPTION_WEIGHT)),
+          default=Value(SEARCH_WEIGHT),
+          output_field=IntegerField()
+        )
+      ).order_by('-search_rank', '-last_modified')
+
+    return documents
+
+  def update(self, document):
+    pass
+
+  def remove(self, document_id):
+    pass
+
+
+class NativeSearchIndex(DatabaseSearchIndex):
+  """
+  Full text search of PostgreSQL or MySQL.
+
+  The query history is only searched quickly with an index on the text of the documents, which is created by the
+  create_document_search_index command. MySQL requires it and does not match words shorter than its ft_min_word_len.
+  """
+
+  VENDORS = ('postgresql', 'mysql')
+
+  def search(self, documents, text, ranked=False):
+    words = WORD_RE.findall(text.lower())  # The databases split or not the words joined by underscores themselves
+    connection = connections[documents.db]
+
+    if not words or connection.vendor not in self.VENDORS:
+      return super(NativeSearchIndex, self).search(documents, text, ranked=ranked)
+
+    match, params = self.match_sql(connection, documents.model._meta.db_table, words)
+    documents = documents.extra(where=[match], params=params)
+
+    if ranked:
+      rank = self.rank_sql(connection, documents.model._meta.db_table)
+      documents = documents.extra(select={'search_rank': rank}, select_params=params).order_by('-search_rank', '-last_modified')
+
+    return documents
+
+  @classmethod
+  def match_sql(cls, connection, table, words):
+    if connection.vendor == 'postgresql':
+      return '%s @@ to_tsquery(\'simple\', %%s)' % cls.document_sql(connection, table), [' & '.join('%s:*' % word for word in words)]
+    else:
+      return '%s AGAINST (%%s IN BOOLEAN MODE)' % cls.document_sql(connection, table), [' '.join('+%s*' % word for word in words)]
+
+  @classmethod
+  def rank_sql(cls, connection, table):
+    if connection.vendor == 'postgresql':
+      return 'ts_rank(%s, to_tsquery(\'simple\', %%s))' % cls.document_sql(connection, table)
+    else:
+      return '%s AGAINST (%%s IN BOOLEAN MODE)' % cls.document_sql(connection, table)
+
+  @classmethod
+  def document_sql(cls, connection, table):
+    """The text of a document, which must be the expression of the index for it to be used."""
+    columns = [connection.ops.quote_name(table) + '.' + connection.ops.quote_name(column) for column in TEXT_COLUMNS]
+
+    if connection.vendor == 'postgresql':
+      return 'to_tsvector(\'simple\', %s)' % ' || \' \' || '.join('COALESCE(%s, \'\')' % column for column in columns)
+    else:
+      return 'MATCH (%s)' % ', '.join(columns)
+
+  @classmethod
+  def create_index_sql(cls, connection, table):
+    quoted_table = connection.ops.quote_name(table)
+    index = connection.ops.quote_name('%s_search_idx' % table)
+
+    if connection.vendor == 'postgresql':
+      columns = ' || \' \' || '.join('COALESCE(%s, \'\')' % connection.ops.quote_name(column) for column in TEXT_COLUMNS)
+      return 'CREATE INDEX CONCURRENTLY IF NOT EXISTS %s ON %s USING GIN (to_tsvector(\'simple\', %s))' % (index, quoted_table, columns)
+    elif connection.vendor == 'mysql':
+      columns = ', '.join(connection.ops.quote_name(column) for column in TEXT_COLUMNS)
+      return 'CREATE FULLTEXT INDEX %s ON %s (%s)' % (index, quoted_table, columns)
+
+
+class LocalSearchIndex(DatabaseSearchIndex):
+  """
+  Inverted index of the words of the name, description and searchable text of the documents.
+
+  Searches return at most LOCAL_MAX_RESULTS documents, the most relevant then the most recent ones.
+  """
+
+  def __init__(self):
+    self._postings = {}  # Word -> {document id: weight of the word in the document}
+    self._words = []  # Sorted words, for matching by prefix
+    self._document_words = {}  # Document id -> words of the document
+    self._built = False
+    self._last_modified = None  # Of the last document indexed by _catch_up()
+    self._lock = threading.RLock()
+
+  def search(self, documents, text, ranked=False):
+    words = tokenize(text)
+    if not words:
+      return super(LocalSearchIndex, self).search(documents, text, ranked=ranked)
+
+    with self._lock:
+      self._catch_up(documents.model)
+      scores = self._scores(words)
+
+    # Only the documents of the queryset are kept before truncating, common words match the documents of many other users. The best
+    # matches are looked up in the queryset chunk by chunk until there are enough of them.
+    ranked_ids = sorted(scores, key=lambda document_id: (scores[document_id], document_id), reverse=True)
+    matches = []
+    for start in range(0, len(ranked_ids), LOCAL_MATCHES_CHUNK_SIZE):
+      chunk = ranked_ids[start:start + LOCAL_MATCHES_CHUNK_SIZE]
+      allowed_ids = set(documents.filter(id__in=chunk).values_list('id', flat=True))
+      matches.extend(document_id for document_id in chunk if document_id in allowed_ids)
+      if len(matches) >= LOCAL_MAX_RESULTS:
+        break
+    matches = matches[:LOCAL_MAX_RESULTS]
+    documents = documents.filter(id__in=matches)
+
+    if ranked:
+      ids_by_score = {}
+      for document_id in matches:
+        ids_by_score.setdefault(scores[document_id], []).append(document_id)
+
+      documents = documents.annotate(
+        search_rank=Case(
+          *[When(id__in=ids, then=Value(score)) for score, ids in ids_by_score.items()],
+          default=Value(0),
+          output_field=IntegerField()
+        )
+      ).order_by('-search_rank', '-last_modified')
+
+    return documents
+
+  def update(self, document):
+    weights = {}
+    for text, weight in ((document.name, NAME_WEIGHT), (document.description, DESCRIPTION_WEIGHT), (document.search, SEARCH_WEIGHT)):
+      for word in tokenize(text):
+        weights[word] = max(weights.get(word, 0), weight)
+
+    with self._lock:
+      self._remove(document.id)
+
+      for word, weight in weights.items():
+        if word not in self._postings:
+          self._postings[word] = {}
+          bisect.insort(self._words, word)
+        self._postings[word][document.id] = weight
+      self._document_words[document.id] = tuple(weights)
+
+  def remove(self, document_id):
+    with self._lock:
+      self._remove(document_id)
+
+  def clear(self):
+    with self._lock:
+      self._postings = {}
+      self._words = []
+      self._document_words = {}
+      self._built = False
+      self._last_modified = None
+
+  def _remove(self, document_id):
+    for word in self._document_words.pop(document_id, ()):
+      postings = self._postings[word]
+      postings.pop(document_id, None)
+      if not postings:
+        del self._postings[word]
+        del self._words[bisect.bisect_left(self._words, word)]
+
+  def _scores(self, words):
+    """Returns the ids of the documents matching all the words, with their relevance."""
+    scores = None
+
+    for word in words:
+      word_scores = {}
+      start = bisect.bisect_left(self._words, word)
+      for indexed_word in self._words[start:]:
+        if not indexed_word.startswith(word):
+          break
+        bonus = EXACT_WORD_WEIGHT if indexed_word == word else 0
+        for document_id, weight in self._postings[indexed_word].items():
+          if scores is None or document_id in scores:
+            word_scores[document_id] = max(word_scores.get(document_id, 0), weight + bonus)
+
+      if scores is None:
+        scores = word_scores
+      else:
+        scores = {document_id: scores[document_id] + score for document_id, score in word_scores.items()}
+      if not scores:
+        break
+
+    return scores
+
+  def _catch_up(self, model):
+    """Indexes the documents modified since the last indexed one, e.g. by the other processes."""
+    documents = model._base_manager.only('id', 'name', 'description', 'search', 'last_modified').order_by('last_modified')
+    if not self._built:
+      LOG.info('Building the local search index of the documents')
+    elif self._last_modified is not None:
+      # Some documents saved at the same time as the last indexed one might not have been indexed yet
+      documents = documents.filter(last_modified__gte=self._last_modified)
+
+    for document in documents.iterator(chunk_size=2000):
+      self.update(document)
+      self._last_modified = document.last_modified
+
+    self._built = True
+
+
+SEARCH_INDEX = None
+
+
+def get_search_index():
+  global SEARCH_INDEX
+  if SEARCH_INDEX is None:
+    index = DOCUMENT_SEARCH_INDEX.get()
+    if index == 'native':
+      SEARCH_INDEX = NativeSearchIndex()
+    elif index == 'local':
+      SEARCH_INDEX = LocalSearchIndex()
+    else:
+      if index != 'database':
+        LOG.warning('Unknown document search index %s, searching the database instead.' % index)
+      SEARCH_INDEX = DatabaseSearchIndex()
+  return SEARCH_INDEX
+
+
+def _document_saved(sender, instance, **kwargs):
+  get_search_index().update(instance)
+
+
+def _document_deleted(sender, instance, **kwargs):
+  get_search_index().remove(instance.id)
+
+
+post_save.connect(_document_saved, sender='desktop.Document2', dispatch_uid='document_search_update')
+post_delete.connect(_document_deleted, sender='desktop.Document2', dispatch_uid='document_search_remove')
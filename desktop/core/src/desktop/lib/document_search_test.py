@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+import pytest
+from django.utils import timezone
+
+from desktop.lib.django_test_util import make_logged_in_client
+from desktop.lib.document_search import DatabaseSearchIndex, LocalSearchIndex, NativeSearchIndex, tokenize
+from desktop.models import Document2
+from useradmin.models import User
+
+
+def test_tokenize():
+  assert ['select', 'count', 'from', 'web_logs', 'web', 'logs', 'été'] == tokenize('SELECT count(*) FROM web_logs -- Été from')
+  assert [] == tokenize(None)
+  assert [] == tokenize('%*')
+
+
+def test_native_index_sql():
+  postgresql = Mock(vendor='postgresql', ops=Mock(quote_name=lambda name: '"%s"' % name))
+  mysql = Mock(vendor='mysql', ops=Mock(quote_name=lambda name: '`%s`' % name))
+
+  assert (
+    'to_tsvector(\'simple\', COALESCE("doc"."name", \'\') || \' \' || COALESCE("doc"."description", \'\') || \' \' || '
+    'COALESCE("doc"."search", \'\')) @@ to_tsquery(\'simple\', %s)',
+    ['web_logs:* & count:*']
+  ) == NativeSearchIndex.match_sql(postgresql, 'doc', ['web_logs', 'count'])
+  assert (
+    'MATCH (`doc`.`name`, `doc`.`description`, `doc`.`search`) AGAINST (%s IN BOOLEAN MODE)',
+    ['+web_logs* +count*']
+  ) == NativeSearchIndex.match_sql(mysql, 'doc', ['web_logs', 'count'])
+
+  assert (
+    'CREATE FULLTEXT INDEX `doc_search_idx` ON `doc` (`name`, `description`, `search`)' == NativeSearchIndex.create_index_sql(mysql, 'doc')
+  )
+  assert NativeSearchIndex.create_index_sql(Mock(vendor='sqlite'), 'doc') is None
+
+
+@pytest.mark.django_db
+class TestSearchIndex(object):
+
+  def setup_method(self):
+    self.client = make_logged_in_client(username='test_document_search', recreate=True, is_superuser=False)
+    self.user = User.objects.get(username='test_document_search')
+
+    self.customers = Document2.objects.create(
+      name='Customers', type='query-hive', owner=self.user, search='SELECT * FROM customers WHERE country = "FR"'
+    )
+    self.history = Document2.objects.create(
+      name='Unsaved', type='query-hive', owner=self.user, is_history=True, search='SELECT name FROM customers_archive'
+    )
+    self.orders = Document2.objects.create(
+      name='Orders', type='query-impala', owner=self.user, description='Orders of the customers', search='SELECT * FROM orders'
+    )
+
+    self.local_index = LocalSearchIndex()
+
+  def _search(self, index, text, **kwargs):
+    return list(index.search(Document2.objects.filter(owner=self.user), text, **kwargs))
+
+  def test_database_index(self):
+    index = DatabaseSearchIndex()
+
+    assert [self.customers, self.history, self.orders] == sorted(self._search(index, 'customers'), key=lambda doc: doc.id)
+    assert [self.customers, self.orders, self.history] == self._search(index, 'customers', ranked=True)
+
+  def test_local_index_matches_all_words_by_prefix(self):
+    assert {self.customers, self.history, self.orders} == set(self._search(self.local_index, 'custom'))
+    assert [self.history] == self._search(self.local_index, 'cust arch')
+    assert [self.customers] == self._search(self.local_index, 'country fr')
+    assert [] == self._search(self.local_index, 'customers unknown')
+
+  def test_local_index_ranking(self):
+    # Name, then exact word in the description, then prefix in the statement
+    assert [self.customers, self.orders, self.history] == self._search(self.local_index, 'customers', ranked=True)
+
+  def test_local_index_updated_on_save_and_delete(self):
+    with patch('desktop.lib.document_search.get_search_index', return_value=self.local_index):
+      assert [] == self._search(self.local_index, 'invoices')
+
+      self.orders.name = 'Invoices'
+      self.orders.save()
+      assert [self.orders] == self._search(self.local_index, 'invoices')
+
+      invoices = Document2.objects.create(name='Invoices 2024', type='query-hive', owner=self.user)
+      assert {self.orders, invoices} == set(self._search(self.local_index, 'invoices'))
+
+      invoices.delete()
+      assert [self.orders] == self._search(self.local_index, 'invoices')
+
+  def test_local_index_catches_up_with_other_processes(self):
+    assert [] == self._search(self.local_index, 'payments')
+
+    Document2.objects.filter(id=self.orders.id).update(name='Payments', last_modified=timezone.now() + timedelta(seconds=1))
+
+    assert [self.orders] == self._search(self.local_index, 'payments')
+
+  def test_local_index_truncates_after_filtering(self):
+    other_user = User.objects.create(username='test_document_search_other')
+    for i in range(3):
+      Document2.objects.create(name='Customers %d' % i, type='query-hive', owner=other_user)
+
+    with patch('desktop.lib.document_search.LOCAL_MAX_RESULTS', 1):
+      assert [self.customers] == self._search(self.local_index, 'customers', ranked=True)
+
+      with patch('desktop.lib.document_search.LOCAL_MATCHES_CHUNK_SIZE', 2):
+        assert [self.customers] == self._search(self.local_index, 'customers', ranked=True)
+
+  def test_local_index_falls_back_without_words(self):
+    Document2.objects.filter(id=self.orders.id).update(description='100%')
+
+    assert [self.orders] == self._search(self.local_index, '%')
+
+  def test_search_documents_ranked_without_order(self):
+    with patch('desktop.models.get_search_index', return_value=self.local_index):
+      documents = Document2.objects.documents(self.user, include_history=True)
+
+      assert [self.customers, self.orders, self.history] == list(documents.search_documents(search_text='customers'))
+      assert [self.orders, self.history, self.customers] == list(documents.search_documents(search_text='customers', order_by='-id'))
@@ -18,25 +18,27 @@
 """
 Common library to export either CSV or XLS.
 """
-import gc
 import re
+import csv
 import logging
 import numbers
-from io import BytesIO as string_io
+from io import StringIO
 from urllib.parse import quote
 
 import six
 import tablib
-import openpyxl
 from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.encoding import smart_str
 
 from desktop.lib import i18n
+from desktop.lib.export_xlsx import XlsxStreamWriter
 
 LOG = logging.getLogger()
 
 DOWNLOAD_CHUNK_SIZE = 1 * 1024 * 1024  # 1MB
 ILLEGAL_CHARS = r'[\000-\010]|[\013-\014]|[\016-\037]'
+ILLEGAL_CHARS_PATTERN = re.compile(ILLEGAL_CHARS)
+HYPERLINK_PATTERN = re.compile('^(https?://.+)', re.IGNORECASE)
 FORMAT_TO_CONTENT_TYPE = {
     'csv': 'application/csv',
     'xls': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
@@ -64,9 +66,9 @@ def encode_row(row, encoding=None, make_excel_links=False):
 
   for cell in row:
     if isinstance(cell, six.string_types):
-      cell = re.sub(ILLEGAL_CHARS, '?', cell)
+      cell = ILLEGAL_CHARS_PATTERN.sub('?', cell)
       if make_excel_links:
-        cell = re.compile('^(https?://.+)', re.IGNORECASE).sub(r'=HYPERLINK("\1")', cell)
+        cell = HYPERLINK_PATTERN.sub(r'=HYPERLINK("\1")', cell)
     cell = nullify(cell)
     if not isinstance(cell, numbers.Number):
       cell = smart_str(cell, encoding, strings_only=True, errors='replace')
@@ -74,6 +76,56 @@ def encode_row(row, encoding=None, make_excel_links=False):
   return encoded_row
 
 
+def encode_rows(rows, encoding=None, make_excel_links=False):
+  """
+  encode_rows(rows) -> list of encoded rows
+
+  Same as encode_row but for a batch of rows. The rows are encoded column by column so that the checks are only done for
+  the types actually present in each column: numeric columns are kept as is and string columns skip the conversions.
+  """
+  rows = rows if isinstance(rows, list) else list(rows)
+  if not rows or len(set(map(len, rows))) != 1:
+    return [encode_row(row, encoding, make_excel_links) for row in rows]
+
+  encoding = encoding or i18n.get_site_encoding()
+  columns = [_encode_column(column, encoding, make_excel_links) for column in zip(*rows)]
+
+  return [list(row) for row in zip(*columns)]
+
+
+def _encode_column(column, encoding, make_excel_links):
+  types = set(map(type, column))
+  has_nulls = type(None) in types
+  types.discard(type(None))
+
+  if all(issubclass(_type, numbers.Number) for _type in types):
+    return [nullify(cell) for cell in column] if has_nulls else column
+  elif types == {str}:
+    if make_excel_links:
+      encode = lambda cell: HYPERLINK_PATTERN.sub(r'=HYPERLINK("\1")', ILLEGAL_CHARS_PATTERN.sub('?', cell))
+    else:
+      encode = lambda cell: ILLEGAL_CHARS_PATTERN.sub('?', cell)
+    return [encode(cell) if cell is not None else 'NULL' for cell in column]
+  else:
+    return [encode_row([cell], encoding, make_excel_links)[0] for cell in column]
+
+
+def csv_dataset(headers, data, encoding=None):
+  """
+  csv_dataset(headers, data) -> str
+
+  Return the rows, preceded by the headers if any, as CSV.
+  """
+  output = StringIO()
+  writer = csv.writer(output)
+
+  if headers:
+    writer.writerow(encode_row(headers, encoding))
+  writer.writerows(encode_rows(data, encoding))
+
+  return output.getvalue()
+
+
 def dataset(headers, data, encoding=None):
   """
   dataset(headers, data) -> Dataset object
@@ -85,48 +137,35 @@ def dataset(headers, data, encoding=None):
   if headers:
     dataset.headers = encode_row(headers, encoding)
 
-  for row in data:
-    dataset.append(encode_row(row, encoding))
+  for row in encode_rows(data, encoding):
+    dataset.append(row)
 
   return dataset
 
 
-class XlsWrapper(object):
-  def __init__(self, xls):
-    self.xls = xls
-
-
-def xls_dataset(workbook):
-  output = string_io()
-  workbook.save(output)
-  output.seek(0)
-  return XlsWrapper(output.read())
-
-
 def create_generator(content_generator, format, encoding=None):
   if format == 'csv':
     show_headers = True
     for headers, data in content_generator:
-      yield dataset(show_headers and headers or None, data, encoding).csv
+      yield csv_dataset(show_headers and headers or None, data, encoding)
       show_headers = False
   elif format == 'xls':
-    workbook = openpyxl.Workbook(write_only=True)
-    worksheet = workbook.create_sheet()
-    row_ctr = 0
+    worksheet = XlsxStreamWriter()
 
     for _headers, _data in content_generator:
       # Write headers to workbook once
-      if _headers and row_ctr == 0:
+      if _headers and worksheet.row_count == 0:
         worksheet.append(encode_row(_headers, encoding))
-        row_ctr += 1
 
       # Write row data to workbook
-      for row in _data:
-        worksheet.append(encode_row(row, encoding, make_excel_links=True))
-        row_ctr += 1
+      for row in encode_rows(_data, encoding, make_excel_links=True):
+        worksheet.append(row)
 
-    yield xls_dataset(workbook).xls
-    gc.collect()
+      chunk = worksheet.collect()
+      if chunk:
+        yield chunk
+
+    yield worksheet.close()
   else:
     raise Exception("Unknown format: %s" % format)
 
@@ -139,15 +178,14 @@ def make_response(generator, format, name, encoding=None, user_agent=None):  # T
   @param encoding Unicode encoding for data
   """
   content_type = FORMAT_TO_CONTENT_TYPE.get(format, 'application/octet-stream')
-  if format == 'csv':
+  if format in ('csv', 'xls'):
     resp = StreamingHttpResponse(generator, content_type=content_type)
     try:
       del resp['Content-Length']
     except KeyError:
       pass
-  elif format == 'xls':
-    format = 'xlsx'
-    resp = HttpResponse(next(generator), content_type=content_type)
+    if format == 'xls':
+      format = 'xlsx'
   elif format == 'json' or format == 'txt':
     resp = HttpResponse(generator, content_type=content_type)
   else:
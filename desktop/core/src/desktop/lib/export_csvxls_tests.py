@@ -20,7 +20,7 @@ from io import BytesIO as string_io
 
 from openpyxl import load_workbook
 
-from desktop.lib.export_csvxls import create_generator, make_response
+from desktop.lib.export_csvxls import create_generator, encode_row, encode_rows, make_response
 
 
 def content_generator(header, data):
@@ -80,8 +80,41 @@ def test_export_xls():
   assert 'attachment; filename="foo.xlsx"' == response["content-disposition"]
 
 
+def test_export_xls_streaming():
+  headers = ["x", "y"]
+
+  def chunked_content_generator():
+    yield headers, [[1, "a"], [2, "b"]]
+    yield headers, [[3, None], [4.5, "=1+1"]]
+
+  generator = create_generator(chunked_content_generator(), "xls")
+  response = make_response(generator, "xls", "foo")
+
+  assert response.streaming
+  assert [["x", "y"], [1, "a"], [2, "b"], [3, "NULL"], [4.5, "=1+1"]] == _read_xls_sheet_data(response)
+
+
+def test_encode_rows():
+  rows = [
+    [1, 'a\x01b', None, 2.5, b'bytes', 'http://gethue.com', None],
+    [None, None, 'c', None, 'd', 'e', None],
+  ]
+
+  assert [encode_row(row) for row in rows] == encode_rows(rows)
+  assert [encode_row(row, make_excel_links=True) for row in rows] == encode_rows(rows, make_excel_links=True)
+  assert [
+    [1, 'a?b', 'NULL', 2.5, 'bytes', 'http://gethue.com', 'NULL'],
+    ['NULL', 'NULL', 'c', 'NULL', 'd', 'e', 'NULL']
+  ] == encode_rows(rows)
+
+  numbers = [[1, 2.5], [3, 4]]
+  assert numbers == encode_rows(numbers)
+  assert [] == encode_rows([])
+  assert [['a'], ['b', 'NULL']] == encode_rows([['a'], ['b', None]])
+
+
 def _read_xls_sheet_data(response):
-  content = bytes(response.content)
+  content = b''.join(response.streaming_content) if response.streaming else bytes(response.content)
 
   data = string_io()
   data.write(content)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Streaming writer of single sheet XLSX documents.
+
+The sheet is compressed into the zip container while the rows are appended and the compressed bytes can be collected at any
+time, so a whole workbook never needs to be held in memory.
+"""
+
+import math
+import numbers
+import zipfile
+import datetime
+from xml.sax.saxutils import escape
+
+from openpyxl.utils import get_column_letter
+
+CONTENT_TYPES = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>\
+<Default Extension="xml" ContentType="application/xml"/>\
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>\
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>\
+</Types>'''
+
+RELS = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" \
+Target="xl/workbook.xml"/>\
+</Relationships>'''
+
+WORKBOOK = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" \
+xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">\
+<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>\
+</workbook>'''
+
+WORKBOOK_RELS = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" \
+Target="worksheets/sheet1.xml"/>\
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>\
+</Relationships>'''
+
+STYLES = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">\
+<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>\
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>\
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>\
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>\
+<cellXfs count="4">\
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>\
+<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>\
+<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>\
+<xf numFmtId="21" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>\
+</cellXfs>\
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>\
+</styleSheet>'''
+
+SHEET_HEADER = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'''
+
+SHEET_FOOTER = '</sheetData></worksheet>'
+
+EPOCH = datetime.datetime(1899, 12, 30)
+DATE_STYLE = 1
+DATETIME_STYLE = 2
+TIME_STYLE = 3
+
+
+class _StreamBuffer(object):
+  """Write-only and non seekable file object that keeps what was written until it is collected."""
+
+  def __init__(self):
+    self.chunks = []
+
+  def write(self, data):
+    self.chunks.append(bytes(data))
+    return len(data)
+
+  def flush(self):
+    pass
+
+  def collect(self):
+    data = b''.join(self.chunks)
+    self.chunks = []
+    return data
+
+
+class XlsxStreamWriter(object):
+  """
+  Appends rows to the only sheet of a workbook.
+
+  As with openpyxl, strings starting with '=' are written as formulas and dates and times as serial numbers with a date
+  format. collect() returns the bytes of the document produced so far and close() the remaining ones.
+  """
+
+  def __init__(self):
+    self._buffer = _StreamBuffer()
+    self._zip = zipfile.ZipFile(self._buffer, 'w', compression=zipfile.ZIP_DEFLATED)
+    self._zip.writestr('[Content_Types].xml', CONTENT_TYPES)
+    self._zip.writestr('_rels/.rels', RELS)
+    self._zip.writestr('xl/workbook.xml', WORKBOOK)
+    self._zip.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+    self._zip.writestr('xl/styles.xml', STYLES)
+
+    self._sheet = self._zip.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True)
+    self._sheet.write(SHEET_HEADER.encode('utf-8'))
+    self._columns = []
+    self.row_count = 0
+
+  def append(self, row):
+    self.row_count += 1
+    while len(self._columns) < len(row):
+      self._columns.append(get_column_letter(len(self._columns) + 1))
+
+    cells = ''.join(self._cell(self._columns[i], self.row_count, value) for i, value in enumerate(row))
+    self._sheet.write(('<row r="%d">%s</row>' % (self.row_count, cells)).encode('utf-8'))
+
+  def collect(self):
+    return self._buffer.collect()
+
+  def close(self):
+    self._sheet.write(SHEET_FOOTER.encode('utf-8'))
+    self._sheet.close()
+    self._zip.close()
+    return self._buffer.collect()
+
+  def _cell(self, column, row_number, value):
+    reference = '%s%d' % (column, row_number)
+
+    if isinstance(value, bool):
+      return '<c r="%s" t="b"><v>%d</v></c>' % (reference, value)
+    elif isinstance(value, numbers.Number) and not (isinstance(value, float) and not math.isfinite(value)):
+      return '<c r="%s"><v>%s</v></c>' % (reference, value)
+    elif isinstance(value, datetime.datetime):
+      serial = (value.replace(tzinfo=None) - EPOCH).total_seconds() / 86400
+      return '<c r="%s" s="%d"><v>%s</v></c>' % (reference, DATETIME_STYLE, serial)
+    elif isinstance(value, datetime.date):
+      return '<c r="%s" s="%d"><v>%d</v></c>' % (reference, DATE_STYLE, (value - EPOCH.date()).days)
+    elif isinstance(value, datetime.time):
+      serial = (value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6) / 86400
+      return '<c r="%s" s="%d"><v>%s</v></c>' % (reference, TIME_STYLE, serial)
+
+    value = str(value)
+    if len(value) > 1 and value.startswith('='):
+      return '<c r="%s"><f>%s</f></c>' % (reference, escape(value[1:]))
+    else:
+      return '<c r="%s" t="inlineStr"><is><t xml:space="preserve">%s</t></is></c>' % (reference, escape(value))
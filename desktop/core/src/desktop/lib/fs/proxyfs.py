@@ -13,6 +13,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import errno
 import logging
 from builtins import object
 from urllib.parse import urlparse as lib_urlparse
@@ -27,6 +28,7 @@ from desktop.auth.backend import is_admin
 from desktop.conf import DEFAULT_USER, ENABLE_ORGANIZATIONS, is_ofs_enabled, is_raz_gs
 from desktop.lib.fs.gc.gs import get_gs_home_directory
 from desktop.lib.fs.ozone import OFS_ROOT
+from desktop.lib.fs.transfer import FileTransfer
 from useradmin.models import User
 
 LOG = logging.getLogger()
@@ -149,6 +151,9 @@ class ProxyFS(object):
   def listdir_stats(self, path, **kwargs):
     return self._get_fs(path).listdir_stats(path, **kwargs)
 
+  def listdir_stats_batch(self, path, start_after=None):
+    return self._get_fs(path).listdir_stats_batch(path, start_after=start_after)
+
   def listdir(self, path, glob=None):
     return self._get_fs(path).listdir(path, glob)
 
@@ -263,7 +268,7 @@ class ProxyFS(object):
     return op(src, dst, *args, **kwargs)
 
   def _copy_between_filesystems(self, src, dst, recursive=False, *args, **kwargs):
-    raise NotImplementedError("Will be addressed in HUE-2934")
+    self._get_transfer(src, dst, **kwargs).copy(src, dst, recursive=recursive, progress_callback=kwargs.get('progress_callback'))
 
   def copyfile(self, src, dst, *args, **kwargs):
     src_fs, dst_fs = self._get_fs_pair(src, dst)
@@ -271,7 +276,7 @@ class ProxyFS(object):
     return op(src, dst, *args, **kwargs)
 
   def _copyfile_between_filesystems(self, src, dst, *args, **kwargs):
-    raise NotImplementedError("Will be addressed in HUE-2934")
+    self._get_transfer(src, dst, **kwargs).copyfile(src, dst)
 
   def copy_remote_dir(self, src, dst, *args, **kwargs):
     src_fs, dst_fs = self._get_fs_pair(src, dst)
@@ -279,15 +284,17 @@ class ProxyFS(object):
     return op(src, dst, *args, **kwargs)
 
   def _copy_remote_dir_between_filesystems(self, src, dst, *args, **kwargs):
-    raise NotImplementedError("Will be addressed in HUE-2934")
+    self._get_transfer(src, dst, **kwargs).copy_remote_dir(src, dst, progress_callback=kwargs.get('progress_callback'))
 
-  def rename(self, old, new):
+  def rename(self, old, new, progress_callback=None):
     old_fs, new_fs = self._get_fs_pair(old, new)
-    op = old_fs.rename if old_fs is new_fs else self._rename_between_filesystems
-    return op(old, new)
+    if old_fs is new_fs:
+      return old_fs.rename(old, new)
+    return self._rename_between_filesystems(old, new, progress_callback=progress_callback)
 
-  def _rename_between_filesystems(self, old, new):
-    raise NotImplementedError("Will be addressed in HUE-2934")
+  def _rename_between_filesystems(self, old, new, progress_callback=None):
+    self._get_transfer(old, new).copy(old, new, recursive=True, progress_callback=progress_callback)
+    self._get_fs(old).rmtree(old)
 
   def rename_star(self, old_dir, new_dir):
     old_fs, new_fs = self._get_fs_pair(old_dir, new_dir)
@@ -295,7 +302,18 @@ class ProxyFS(object):
     return op(old_dir, new_dir)
 
   def _rename_star_between_filesystems(self, old, new):
-    raise NotImplementedError("Will be addressed in HUE-2934")
+    old_fs = self._get_fs(old)
+    if not old_fs.isdir(old):
+      raise IOError(errno.ENOTDIR, "'%s' is not a directory" % old)
+
+    self._get_transfer(old, new).copy_remote_dir(old, new)
+    for entry in old_fs.listdir(old):
+      old_fs.rmtree(old_fs.join(old, entry))
+
+  def _get_transfer(self, src, dst, resume=False, **kwargs):
+    """Returns the streaming copier of the files of the filesystem of `src` to the one of `dst`."""
+    src_fs, dst_fs = self._get_fs_pair(src, dst)
+    return FileTransfer(src_fs, dst_fs, self.getuser(), resume=resume)
 
   # Deprecated
   def upload(self, file, path, *args, **kwargs):
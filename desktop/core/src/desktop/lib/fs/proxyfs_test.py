@@ -114,9 +114,16 @@ def test_multi_fs_selection():
     ofs.copyfile.assert_called_once_with('ofs://volume/bucket/key', 'key2')
     assert not hdfs.copyfile.called
 
-    # Exception can only be thrown if scheme is specified, else default to 1st scheme
-    with pytest.raises(NotImplementedError):
+    # Transfer between filesystems only if the scheme is specified, else default to 1st scheme
+    with patch('desktop.lib.fs.proxyfs.FileTransfer') as FileTransfer:
       proxy_fs.copy_remote_dir('s3a://bucket/key', 'adl://tmp/dir')
+      FileTransfer.assert_called_once_with(s3fs, adls, 'test', resume=False)
+      FileTransfer.return_value.copy_remote_dir.assert_called_once_with('s3a://bucket/key', 'adl://tmp/dir', progress_callback=None)
+      assert not s3fs.copy_remote_dir.called
+
+      proxy_fs.rename('hdfs:///tmp/file', 's3a://bucket/dir', progress_callback=None)
+      FileTransfer.return_value.copy.assert_called_once_with('hdfs:///tmp/file', 's3a://bucket/dir', recursive=True, progress_callback=None)
+      hdfs.rmtree.assert_called_once_with('hdfs:///tmp/file')
 
 
 def test_constructor_given_invalid_arguments():
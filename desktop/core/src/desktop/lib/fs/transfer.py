@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Streaming transfer of files and directories between two different filesystems, e.g. from HDFS to S3.
+
+The files are read by ranged reads of the upload chunk size of the destination: the next chunk is read in the background while the
+current one is written, so a transfer holds at most two chunks in memory whatever the size of the file. The files of a directory are
+transferred by a pool of threads.
+"""
+
+import errno
+import hashlib
+import logging
+import posixpath
+from builtins import object
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+from urllib.parse import urlparse as lib_urlparse
+
+from aws.s3.s3fs import S3FileSystem
+from azure.abfs.abfs import ABFS
+from desktop.conf import FILESYSTEM_TRANSFER
+
+LOG = logging.getLogger()
+
+
+class FileTransfer(object):
+  """
+  Copies files and directories from the filesystem `src_fs` to the filesystem `dst_fs` as `user`.
+
+  With `resume`, the destination files already fully written are skipped and the partial ones are completed when the destination
+  filesystem supports appends.
+  """
+
+  def __init__(self, src_fs, dst_fs, user, parallelism=None, verify_checksum=None, resume=False):
+    self.src_fs = src_fs
+    self.dst_fs = dst_fs
+    self.user = user
+    self.parallelism = parallelism or FILESYSTEM_TRANSFER.PARALLELISM.get()
+    self.verify_checksum = FILESYSTEM_TRANSFER.VERIFY_CHECKSUM.get() if verify_checksum is None else verify_checksum
+    self.resume = resume
+
+  def copy(self, src, dst, recursive=False, progress_callback=None):
+    """
+    Copies the file or directory `src` into `dst` when `dst` is an existing directory, as `dst` otherwise. Directories are only copied
+    when `recursive`. ``progress_callback(copied, total)`` is called each time a file is copied.
+    """
+    src_stats = self.src_fs.stats(src)
+
+    if self.dst_fs.isdir(dst):
+      dst = self.dst_fs.join(dst, posixpath.basename(src.rstrip('/')))
+    elif src_stats.isDir and self.dst_fs.exists(dst):
+      raise IOError(errno.EEXIST, "Destination file %s exists and is not a directory." % dst)
+
+    if src_stats.isDir:
+      if not recursive:
+        LOG.debug('Skipping contents of %s' % src)
+        return
+      self.copy_remote_dir(src, dst, progress_callback=progress_callback)
+    else:
+      self.copyfile(src, dst, size=src_stats.size)
+      if progress_callback is not None:
+        progress_callback(1, 1)
+
+  def copyfile(self, src, dst, size=None):
+    """Copies the file `src` as the file `dst`."""
+    if size is None:
+      size = self.src_fs.stats(src).size
+    self._copy_file(src, dst, size)
+
+  def copy_remote_dir(self, src, dst, progress_callback=None):
+    """
+    Copies the content of the directory `src` into the directory `dst`. The directories are created first, then the files are copied by
+    a pool of `parallelism` threads. ``progress_callback(copied, total)`` is called each time a file is copied.
+    """
+    files = list(self._copy_dir_structure(src, dst))
+
+    failures = []
+    with ThreadPoolExecutor(max_workers=self.parallelism) as executor:
+      futures = dict((executor.submit(self._copy_file, src_file, dst_file, size), src_file) for src_file, dst_file, size in files)
+      for copied, future in enumerate(as_completed(futures), 1):
+        try:
+          future.result()
+        except Exception as e:
+          LOG.exception('Failed to copy %s' % futures[future])
+          failures.append((futures[future], e))
+        if progress_callback is not None:
+          progress_callback(copied, len(files))
+
+    if failures:
+      raise IOError(errno.EIO, 'Failed to copy %d of %d files, e.g. %s: %s' % (len(failures), len(files), failures[0][0], failures[0][1]))
+
+  def _copy_dir_structure(self, src, dst):
+    """Creates the directories of the copy and yields the (source, destination, size) of each file to copy."""
+    if not self.dst_fs.isdir(dst):
+      self.dst_fs.mkdir(dst)
+
+    for stats in self.src_fs.listdir_stats(src):
+      src_path = self.src_fs.join(src, stats.name)
+      dst_path = self.dst_fs.join(dst, stats.name)
+      if stats.isDir:
+        for src_dir_file in self._copy_dir_structure(src_path, dst_path):
+          yield src_dir_file
+      else:
+        yield src_path, dst_path, stats.size
+
+  def _copy_file(self, src, dst, size):
+    # The threads of the pools do not inherit the user of the filesystems, e.g. it is thread local in WebHdfs
+    self.dst_fs.setuser(self.user)
+    size = int(size or 0)
+    chunk_size = self.dst_fs.get_upload_chuck_size()
+    writer = get_writer(self.dst_fs, dst, size)
+
+    offset = self._get_resume_offset(writer, dst, size) if self.resume else 0
+    if offset == size and offset:
+      LOG.debug('Skipping %s, already copied as %s' % (src, dst))
+    else:
+      if offset:
+        LOG.info('Resuming the copy of %s as %s at offset %d of %d' % (src, dst, offset, size))
+      self._write(writer, src, offset, size, chunk_size)
+
+    self._verify(src, dst, size, chunk_size)
+
+  def _write(self, writer, src, offset, size, chunk_size):
+    def read(offset):
+      self.src_fs.setuser(self.user)
+      return self.src_fs.read(src, offset, min(chunk_size, size - offset))
+
+    writer.open(offset)
+    try:
+      with ThreadPoolExecutor(max_workers=1) as reader:
+        next_data = reader.submit(read, offset) if offset < size else None
+
+        while next_data is not None:
+          data = next_data.result()
+          if not data:
+            raise IOError(errno.EIO, 'Unexpected end of %s at offset %d of %d' % (src, offset, size))
+          offset += len(data)
+          next_data = reader.submit(read, offset) if offset < size else None
+          writer.write(data)
+
+      writer.close()
+    except Exception:
+      writer.abort()
+      raise
+
+  def _get_resume_offset(self, writer, dst, size):
+    """Returns the number of bytes of the source already written to `dst`."""
+    if not self.dst_fs.exists(dst):
+      return 0
+
+    dst_size = self.dst_fs.stats(dst).size or 0
+    if dst_size == size or (dst_size < size and writer.can_resume):
+      return dst_size
+    return 0
+
+  def _verify(self, src, dst, size, chunk_size):
+    dst_size = self.dst_fs.stats(dst).size or 0
+    if dst_size != size:
+      raise IOError(errno.EIO, 'Size of %s is %d bytes instead of the %d bytes of %s' % (dst, dst_size, size, src))
+
+    if self.verify_checksum and _md5(self.src_fs, src, size, chunk_size) != _md5(self.dst_fs, dst, size, chunk_size):
+      raise IOError(errno.EIO, 'Checksum of %s does not match the one of %s' % (dst, src))
+
+
+def _md5(fs, path, size, chunk_size):
+  md5 = hashlib.md5()
+  for offset in range(0, size, chunk_size):
+    md5.update(fs.read(path, offset, min(chunk_size, size - offset)))
+  return md5.hexdigest()
+
+
+def get_writer(fs, path, size):
+  if isinstance(fs, S3FileSystem):  # Also GS
+    return MultipartWriter(fs, path, size)
+  elif isinstance(fs, ABFS):
+    return ABFSWriter(fs, path, size)
+  else:
+    return AppendWriter(fs, path, size)
+
+
+class AppendWriter(object):
+  """Writes a file of a filesystem supporting appends, e.g. HDFS or Ozone."""
+
+  can_resume = True
+
+  def __init__(self, fs, path, size):
+    self.fs = fs
+    self.path = path
+    self.size = size
+    self.offset = 0
+
+  def open(self, offset):
+    self.offset = offset
+
+  def write(self, data):
+    if self.offset == 0:
+      self.fs.create(self.path, overwrite=True, data=data)
+    else:
+      self.fs.append(self.path, data)
+    self.offset += len(data)
+
+  def close(self):
+    if self.size == 0:
+      self.fs.create(self.path, overwrite=True)
+
+  def abort(self):
+    pass  # The data written is kept for resuming the copy
+
+
+class ABFSWriter(AppendWriter):
+  """Writes a file of ABFS: the data is appended by chunks and committed at once by a flush."""
+
+  def open(self, offset):
+    if offset == 0:
+      self.fs.create(self.path, overwrite=True)
+    self.offset = offset
+
+  def write(self, data):
+    self.fs._append(self.path, data, size=len(data), params={'position': self.offset})
+    self.offset += len(data)
+
+  def close(self):
+    self.fs.flush(self.path, {'position': self.offset})
+
+  def abort(self):
+    try:
+      self.close()  # The data appended is kept for resuming the copy
+    except Exception as e:
+      LOG.warning('Failed to flush %s: %s' % (self.path, e))
+
+
+class MultipartWriter(AppendWriter):
+  """Writes an object of S3 or GS, by a multipart upload of one part per chunk when it is larger than one chunk."""
+
+  can_resume = False
+
+  def open(self, offset):
+    self.offset = offset
+    self._upload = None
+    self._part_num = 0
+
+    if self.size > self.fs.get_upload_chuck_size():
+      split = lib_urlparse(self.path)
+      self._upload = self.fs._get_bucket(split.netloc).initiate_multipart_upload(split.path.lstrip('/'))
+
+  def write(self, data):
+    if self._upload is None:
+      self.fs.create(self.path, overwrite=True, data=data)
+    else:
+      self._part_num += 1
+      self._upload.upload_part_from_file(fp=BytesIO(data), part_num=self._part_num)
+    self.offset += len(data)
+
+  def close(self):
+    if self._upload is not None:
+      self._upload.complete_upload()
+    elif self.size == 0:
+      self.fs.create(self.path, overwrite=True)
+
+  def abort(self):
+    if self._upload is not None:
+      self._upload.cancel_upload()
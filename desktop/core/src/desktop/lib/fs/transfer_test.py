@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import posixpath
+from unittest.mock import MagicMock, Mock
+
+import pytest
+
+from aws.s3.s3fs import S3FileSystem
+from desktop.lib.fs.transfer import FileTransfer, MultipartWriter, get_writer
+
+
+class MemoryFs(object):
+  """A filesystem supporting appends keeping its files in memory."""
+
+  def __init__(self, files=None, chunk_size=4):
+    self.files = dict(files or {})
+    self.dirs = set(posixpath.dirname(path) for path in self.files)
+    self.chunk_size = chunk_size
+    self.reads = 0
+
+  def setuser(self, user):
+    pass
+
+  def get_upload_chuck_size(self):
+    return self.chunk_size
+
+  def join(self, first, *comp_list):
+    return posixpath.join(first, *comp_list)
+
+  def exists(self, path):
+    return path in self.files or self.isdir(path)
+
+  def isdir(self, path):
+    return path in self.dirs
+
+  def mkdir(self, path):
+    self.dirs.add(path)
+
+  def stats(self, path):
+    stats = Mock(isDir=self.isdir(path), size=len(self.files.get(path, b'')))
+    stats.name = posixpath.basename(path)
+    return stats
+
+  def listdir_stats(self, path):
+    children = set(name for name in self.files if posixpath.dirname(name) == path)
+    children.update(name for name in self.dirs if posixpath.dirname(name) == path)
+    return [self.stats(child) for child in sorted(children)]
+
+  def read(self, path, offset, length):
+    self.reads += 1
+    return self.files[path][offset:offset + length]
+
+  def create(self, path, overwrite=False, data=None):
+    self.files[path] = data or b''
+
+  def append(self, path, data):
+    self.files[path] += data
+
+
+class TestFileTransfer(object):
+
+  def setup_method(self):
+    self.src_fs = MemoryFs({
+      'hdfs:///user/test/data/a.csv': b'0123456789',
+      'hdfs:///user/test/data/logs/b.log': b'abc',
+      'hdfs:///user/test/data/logs/empty.log': b'',
+    })
+    self.src_fs.dirs.add('hdfs:///user/test/data')
+    self.dst_fs = MemoryFs()
+    self.dst_fs.mkdir('s3a://bucket/dst')
+    self.transfer = FileTransfer(self.src_fs, self.dst_fs, 'test', parallelism=2, verify_checksum=False)
+
+  def test_copy_file_into_directory(self):
+    self.transfer.copy('hdfs:///user/test/data/a.csv', 's3a://bucket/dst')
+
+    assert b'0123456789' == self.dst_fs.files['s3a://bucket/dst/a.csv']
+    assert 3 == self.src_fs.reads  # By chunks of 4 bytes
+
+  def test_copy_directory(self):
+    progress_callback = Mock()
+
+    self.transfer.copy('hdfs:///user/test/data', 's3a://bucket/dst', recursive=True, progress_callback=progress_callback)
+
+    assert {
+      's3a://bucket/dst/data/a.csv': b'0123456789',
+      's3a://bucket/dst/data/logs/b.log': b'abc',
+      's3a://bucket/dst/data/logs/empty.log': b'',
+    } == self.dst_fs.files
+    assert self.dst_fs.isdir('s3a://bucket/dst/data/logs')
+    assert [((1, 3),), ((2, 3),), ((3, 3),)] == progress_callback.call_args_list
+
+  def test_copy_directory_not_recursive(self):
+    self.transfer.copy('hdfs:///user/test/data', 's3a://bucket/dst')
+
+    assert {} == self.dst_fs.files
+
+  def test_copy_directory_failures(self):
+    self.src_fs.files['hdfs:///user/test/data/logs/b.log'] = b'abcdefgh'
+    self.src_fs.read = Mock(return_value=b'')
+
+    with pytest.raises(IOError, match='Failed to copy 2 of 3 files'):
+      self.transfer.copy('hdfs:///user/test/data', 's3a://bucket/dst', recursive=True)
+
+  def test_resume(self):
+    self.dst_fs.files['s3a://bucket/dst/data/a.csv'] = b'01234'
+    self.dst_fs.files['s3a://bucket/dst/data/logs/b.log'] = b'abc'
+    self.dst_fs.mkdir('s3a://bucket/dst/data')
+    self.transfer.resume = True
+
+    self.transfer.copy('hdfs:///user/test/data', 's3a://bucket/dst', recursive=True)
+
+    assert b'0123456789' == self.dst_fs.files['s3a://bucket/dst/data/a.csv']
+    assert b'abc' == self.dst_fs.files['s3a://bucket/dst/data/logs/b.log']
+    assert 2 == self.src_fs.reads  # Only the 5 last bytes of a.csv
+
+  def test_verify_checksum(self):
+    self.transfer.verify_checksum = True
+    self.transfer.copy('hdfs:///user/test/data/a.csv', 's3a://bucket/dst')
+
+    self.src_fs.files['hdfs:///user/test/data/logs/b.log'] = b'abcdefgh'
+    self.dst_fs.append = Mock(side_effect=lambda path, data: self.dst_fs.files.__setitem__(path, self.dst_fs.files[path] + data.upper()))
+    with pytest.raises(IOError, match='Checksum of s3a://bucket/dst/b.log does not match'):
+      self.transfer.copyfile('hdfs:///user/test/data/logs/b.log', 's3a://bucket/dst/b.log')
+
+
+class TestMultipartWriter(object):
+
+  def test_multipart_upload(self):
+    fs = MagicMock(spec=S3FileSystem)
+    fs.get_upload_chuck_size.return_value = 4
+    upload = fs._get_bucket.return_value.initiate_multipart_upload.return_value
+
+    writer = get_writer(fs, 's3a://bucket/dst/a.csv', 10)
+    assert isinstance(writer, MultipartWriter)
+
+    writer.open(0)
+    for data in (b'0123', b'4567', b'89'):
+      writer.write(data)
+    writer.close()
+
+    fs._get_bucket.assert_called_once_with('bucket')
+    fs._get_bucket.return_value.initiate_multipart_upload.assert_called_once_with('dst/a.csv')
+    assert [1, 2, 3] == [kwargs['part_num'] for args, kwargs in upload.upload_part_from_file.call_args_list]
+    upload.complete_upload.assert_called_once_with()
+    fs.create.assert_not_called()
+
+  def test_small_object(self):
+    fs = MagicMock(spec=S3FileSystem)
+    fs.get_upload_chuck_size.return_value = 4
+
+    writer = get_writer(fs, 's3a://bucket/dst/a.csv', 3)
+    writer.open(0)
+    writer.write(b'abc')
+    writer.close()
+
+    fs._get_bucket.assert_not_called()
+    fs.create.assert_called_once_with('s3a://bucket/dst/a.csv', overwrite=True, data=b'abc')
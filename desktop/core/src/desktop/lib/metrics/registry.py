@@ -22,9 +22,8 @@ from builtins import object
 import functools
 import pyformance
 import logging
-import os
 
-from multiprocessing import Manager
+from desktop.lib.metrics.shared import SharedMetrics
 
 LOG = logging.getLogger()
 
@@ -79,16 +78,28 @@ AUTH_LDAP_AUTH_TIME_KEY = 'auth.ldap.auth-time'
 AUTH_PAM_AUTH_TIME_KEY = 'auth.pam.auth-time'
 AUTH_SPNEGO_AUTH_TIME_KEY = 'auth.spnego.auth-time'
 
+SHARED_COUNTERS = (REQUESTS_ACTIVE_KEY, REQUESTS_EXCEPTIONS_KEY)
+SHARED_TIMERS = (
+  REQUESTS_RESPONSE_TIME_KEY,
+  AUTH_OAUTH_AUTH_TIME_KEY,
+  AUTH_SAML2_AUTH_TIME_KEY,
+  AUTH_LDAP_AUTH_TIME_KEY,
+  AUTH_PAM_AUTH_TIME_KEY,
+  AUTH_SPNEGO_AUTH_TIME_KEY,
+)
+
+
 class MetricsRegistry(object):
-  def __init__(self, registry=None):
+  def __init__(self, registry=None, shared=None):
     import sys
     if registry is None:
       registry = pyformance.global_registry()
     self._registry = registry
     self._schemas = []
-    global metrics_dict
-    metrics_dict = Manager().dict() if 'rungunicornserver' in sys.argv else None
-    self._metrics_dict = metrics_dict
+    if shared is None and 'rungunicornserver' in sys.argv:
+      # Mapped before Gunicorn forks its workers
+      shared = SharedMetrics(SHARED_COUNTERS, SHARED_TIMERS, gauges=(REQUESTS_ACTIVE_KEY,))
+    self._shared = shared
 
   def _register_schema(self, schema):
     self._schemas.append(schema)
@@ -99,6 +110,8 @@ class MetricsRegistry(object):
 
   def counter(self, name, **kwargs):
     self._schemas.append(CounterDefinition(name, **kwargs))
+    if self._shared is not None and name in self._shared.counters:
+      return SharedCounter(self._registry.counter(name), self._shared, name)
     return self._registry.counter(name)
 
   def histogram(self, name, **kwargs):
@@ -119,108 +132,16 @@ class MetricsRegistry(object):
 
   def timer(self, name, **kwargs):
     self._schemas.append(TimerDefinition(name, **kwargs))
+    if self._shared is not None and name in self._shared.timers:
+      return Timer(self._registry.timer(name), shared=self._shared, name=name)
     return Timer(self._registry.timer(name))
 
-  def update_metrics_shared_data(self):
-    # Update from middleware in Gunicorn worker process
-    metrics = self.dump_metrics()
-    if self._metrics_dict is not None:
-      self._metrics_dict[os.getpid()] = metrics
-
   def get_metrics_shared_data(self):
-    # Getting from reporter in Gunicorn main process
-    metrics_data = self._metrics_dict.values() if self._metrics_dict is not None else []
-    size = len(metrics_data)
-
-    if size > 0:
-      active_requests_list = []
-      active_exceptions_list = []
-      requests_response_time_list = []
-      auth_oauth_auth_time_list = []
-      auth_saml2_auth_time_list = []
-      auth_ldap_auth_time_list = []
-      auth_pam_auth_time_list = []
-      auth_spnego_auth_time_list = []
-
-      for value in metrics_data:
-        active_requests_list.append(value['requests.active'])
-        active_exceptions_list.append(value['requests.exceptions'])
-        requests_response_time_list.append(value[REQUESTS_RESPONSE_TIME_KEY])
-        auth_oauth_auth_time_list.append(value[AUTH_OAUTH_AUTH_TIME_KEY])
-        auth_saml2_auth_time_list.append(value[AUTH_SAML2_AUTH_TIME_KEY])
-        auth_ldap_auth_time_list.append(value[AUTH_LDAP_AUTH_TIME_KEY])
-        auth_pam_auth_time_list.append(value[AUTH_PAM_AUTH_TIME_KEY])
-        auth_spnego_auth_time_list.append(value[AUTH_SPNEGO_AUTH_TIME_KEY])
-
-      metrics_master = self.dump_metrics()
-      self.calculate_count(metrics_master[REQUESTS_ACTIVE_KEY], active_requests_list)
-      self.calculate_count(metrics_master[REQUESTS_EXCEPTIONS_KEY], active_exceptions_list)
-      self.calculate_time_series(metrics_master[REQUESTS_RESPONSE_TIME_KEY], requests_response_time_list, size)
-      self.calculate_time_series(metrics_master[AUTH_OAUTH_AUTH_TIME_KEY], auth_oauth_auth_time_list, size)
-      self.calculate_time_series(metrics_master[AUTH_SAML2_AUTH_TIME_KEY], auth_saml2_auth_time_list, size)
-      self.calculate_time_series(metrics_master[AUTH_LDAP_AUTH_TIME_KEY], auth_ldap_auth_time_list, size)
-      self.calculate_time_series(metrics_master[AUTH_PAM_AUTH_TIME_KEY], auth_pam_auth_time_list, size)
-      self.calculate_time_series(metrics_master[AUTH_SPNEGO_AUTH_TIME_KEY], auth_spnego_auth_time_list, size)
-
-      return metrics_master
-    else:
-      return self.dump_metrics()
-
-  def calculate_count(self, count_obj, count_list):
-    value = 0
-    for count in count_list:
-      value += count['count']
-    count_obj['count'] = value
-
-  def calculate_time_series(self, time_obj, time_list, size):
-    avg_list = []
-    sum_list = []
-    count_list = []
-    max_lit = []
-    min_list = []
-    std_dev_list = []
-    rate_15m_list = []
-    rate_5m_list = []
-    rate_1m_list = []
-    mean_rate_list = []
-    # percentile_50_list = []
-    percentile_75_list = []
-    percentile_95_list = []
-    percentile_99_list = []
-    percentile_999_list = []
-
-    for time in time_list:
-      avg_list.append(time['avg'])
-      sum_list.append(time['sum'])
-      count_list.append(time['count'])
-      max_lit.append(time['max'])
-      min_list.append(time['min'])
-      std_dev_list.append(time['std_dev'])
-      rate_15m_list.append(time['15m_rate'])
-      rate_5m_list.append(time['5m_rate'])
-      rate_1m_list.append(time['1m_rate'])
-      mean_rate_list.append(time['mean_rate'])
-      # percentile_50_list.append(time['50_percentile'])
-      percentile_75_list.append(time['75_percentile'])
-      percentile_95_list.append(time['95_percentile'])
-      percentile_99_list.append(time['99_percentile'])
-      percentile_999_list.append(time['999_percentile'])
-
-    time_obj['avg'] = sum(avg_list) / size
-    time_obj['sum'] = sum(sum_list) / size
-    time_obj['count'] = sum(count_list)
-    time_obj['max'] = sum(max_lit) / size
-    time_obj['min'] = sum(min_list) / size
-    time_obj['std_dev'] = sum(std_dev_list) / size
-    time_obj['15m_rate'] = sum(rate_15m_list) / size
-    time_obj['5m_rate'] = sum(rate_5m_list) / size
-    time_obj['1m_rate'] = sum(rate_1m_list) / size
-    time_obj['mean_rate'] = sum(mean_rate_list) / size
-    # time_obj['50_percentile'] = sum(percentile_50_list) / size
-    time_obj['75_percentile'] = sum(percentile_75_list) / size
-    time_obj['95_percentile'] = sum(percentile_95_list) / size
-    time_obj['99_percentile'] = sum(percentile_99_list) / size
-    time_obj['999_percentile'] = sum(percentile_999_list) / size
+    """Returns the metrics of the process, with the shared metrics of all the Gunicorn workers."""
+    metrics = self.dump_metrics()
+    if self._shared is not None:
+      metrics.update(self._shared.dump_metrics())
+    return metrics
 
   def get_hue_metrics(self, key):
     return self._registry.get_metrics(key)
@@ -500,21 +421,68 @@ class Timer(object):
   annotation.
   """
 
-  def __init__(self, timer):
+  def __init__(self, timer, shared=None, name=None):
     self._timer = timer
+    self._shared = shared
+    self._name = name
 
   def __call__(self, fn, *args, **kwargs):
     @functools.wraps(fn)
     def wrapper(*args, **kwargs):
-      with self._timer.time():
+      with self.time():
         return fn(*args, **kwargs)
 
     return wrapper
 
+  def time(self, *args, **kwargs):
+    context = self._timer.time(*args, **kwargs)
+    if self._shared is None:
+      return context
+    return SharedTimerContext(context, self._shared, self._name)
+
   def __getattr__(self, *args, **kwargs):
     return getattr(self._timer, *args, **kwargs)
 
 
+class SharedTimerContext(object):
+  """Records the time measured by a pyformance TimerContext in the shared metrics too."""
+
+  def __init__(self, context, shared, name):
+    self._context = context
+    self._shared = shared
+    self._name = name
+
+  def stop(self):
+    elapsed = self._context.stop()
+    self._shared.update(self._name, elapsed)
+    return elapsed
+
+  def __enter__(self):
+    pass
+
+  def __exit__(self, t, v, tb):
+    self.stop()
+
+
+class SharedCounter(object):
+  """pyformance Counter also counted in the shared metrics."""
+
+  def __init__(self, counter, shared, name):
+    self._counter = counter
+    self._shared = shared
+    self._name = name
+
+  def inc(self, val=1):
+    self._counter.inc(val)
+    self._shared.inc(self._name, val)
+
+  def dec(self, val=1):
+    self.inc(-val)
+
+  def __getattr__(self, *args, **kwargs):
+    return getattr(self._counter, *args, **kwargs)
+
+
 _global_registry = MetricsRegistry()
 
 
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Metrics of the Gunicorn workers, aggregated in shared memory.
+
+The memory is mapped by the master process before forking the workers. Each worker claims a slot, where it updates its counters
+and timers in place, so recording a value is a few memory writes without any IPC. The slots are merged when the metrics are
+reported.
+
+Timers are recorded into log-linear histograms whose buckets grow by BUCKET_GROWTH, so that their percentiles can be computed
+from the merged buckets of all the workers with a relative error of at most BUCKET_GROWTH - 1. Percentiles are computed over
+the last one to two HISTOGRAM_WINDOW periods and rates over the last minutes.
+"""
+
+import os
+import math
+import mmap
+import time
+import logging
+import threading
+import multiprocessing
+
+LOG = logging.getLogger()
+
+WORD_SIZE = 8
+
+BUCKET_MIN = 0.0001  # Seconds
+BUCKET_GROWTH = 1.05
+BUCKET_COUNT = int(math.ceil(math.log(3600 / BUCKET_MIN, BUCKET_GROWTH))) + 1  # Up to one hour
+
+HISTOGRAM_WINDOW = 30 * 60  # Seconds
+RATE_MINUTES = 16
+
+PERCENTILES = (
+  ('75_percentile', 0.75),
+  ('95_percentile', 0.95),
+  ('99_percentile', 0.99),
+  ('999_percentile', 0.999),
+)
+
+# Layout of a timer, in words
+_COUNT = 0
+_SUM = 1
+_SQUARES = 2
+_MIN = 3
+_MAX = 4
+_WINDOW_IDS = 5  # 2 words
+_BUCKETS = _WINDOW_IDS + 2  # 2 windows of BUCKET_COUNT words
+_MINUTE_IDS = _BUCKETS + 2 * BUCKET_COUNT
+_MINUTE_COUNTS = _MINUTE_IDS + RATE_MINUTES
+_TIMER_SIZE = _MINUTE_COUNTS + RATE_MINUTES
+
+
+def bucket_index(value):
+  if value <= BUCKET_MIN:
+    return 0
+  return min(int(math.ceil(math.log(value / BUCKET_MIN, BUCKET_GROWTH))), BUCKET_COUNT - 1)
+
+
+def bucket_value(index):
+  return BUCKET_MIN * BUCKET_GROWTH ** index
+
+
+def _is_alive(pid):
+  try:
+    os.kill(pid, 0)
+    return True
+  except ProcessLookupError:
+    return False
+  except PermissionError:
+    return True
+
+
+class SharedMetrics(object):
+  """
+  Counters and timers of up to `slots` processes.
+
+  `counters` and `timers` are the names of the shared metrics. The counters in `gauges` count something currently happening,
+  like active requests: they are reset when a slot is reused and only the slots of the running processes are reported.
+  """
+
+  def __init__(self, counters, timers, gauges=(), slots=64):
+    self.counters = list(counters)
+    self.timers = list(timers)
+    self.gauges = set(gauges)
+    self.slots = slots
+
+    self._slot_size = len(self.counters) + len(self.timers) * _TIMER_SIZE
+    self._header_size = 1 + slots  # Start time and pid of each slot
+
+    self._mmap = mmap.mmap(-1, (self._header_size + slots * self._slot_size) * WORD_SIZE)
+    self._ints = memoryview(self._mmap).cast('q')
+    self._floats = memoryview(self._mmap).cast('d')
+    self._floats[0] = time.time()
+
+    self._claim_lock = multiprocessing.Lock()
+    self._lock = threading.Lock()
+    self._pid = None
+    self._slot = None
+
+  def inc(self, name, value=1):
+    offset = self._slot_offset()
+    if offset is None:
+      return
+    with self._lock:
+      self._ints[offset + self.counters.index(name)] += value
+
+  def update(self, name, seconds):
+    offset = self._slot_offset()
+    if offset is None:
+      return
+    offset += len(self.counters) + self.timers.index(name) * _TIMER_SIZE
+    ints, floats = self._ints, self._floats
+    now = time.time()
+
+    with self._lock:
+      ints[offset + _COUNT] += 1
+      floats[offset + _SUM] += seconds
+      floats[offset + _SQUARES] += seconds * seconds
+      if ints[offset + _COUNT] == 1 or seconds < floats[offset + _MIN]:
+        floats[offset + _MIN] = seconds
+      if seconds > floats[offset + _MAX]:
+        floats[offset + _MAX] = seconds
+
+      window_id = int(now // HISTOGRAM_WINDOW)
+      window = window_id % 2
+      buckets = offset + _BUCKETS + window * BUCKET_COUNT
+      if ints[offset + _WINDOW_IDS + window] != window_id:
+        ints[buckets:buckets + BUCKET_COUNT] = memoryview(bytes(BUCKET_COUNT * WORD_SIZE)).cast('q')
+        ints[offset + _WINDOW_IDS + window] = window_id
+      ints[buckets + bucket_index(seconds)] += 1
+
+      minute_id = int(now // 60)
+      minute = minute_id % RATE_MINUTES
+      if ints[offset + _MINUTE_IDS + minute] != minute_id:
+        ints[offset + _MINUTE_COUNTS + minute] = 0
+        ints[offset + _MINUTE_IDS + minute] = minute_id
+      ints[offset + _MINUTE_COUNTS + minute] += 1
+
+  def dump_metrics(self):
+    """Returns the merged metrics of all the slots, in the format of the pyformance registry."""
+    now = time.time()
+    window_id = int(now // HISTOGRAM_WINDOW)
+    minute_id = int(now // 60)
+
+    slots = []
+    for slot in range(self.slots):
+      pid = self._ints[1 + slot]
+      if pid:
+        slots.append((self._header_size + slot * self._slot_size, _is_alive(pid)))
+
+    metrics = {}
+    for index, name in enumerate(self.counters):
+      metrics[name] = {
+        'count': sum(self._ints[offset + index] for offset, alive in slots if alive or name not in self.gauges)
+      }
+
+    for index, name in enumerate(self.timers):
+      offsets = [offset + len(self.counters) + index * _TIMER_SIZE for offset, alive in slots]
+      metrics[name] = self._merge_timer(offsets, window_id, minute_id, now - self._floats[0])
+
+    return metrics
+
+  def _merge_timer(self, offsets, window_id, minute_id, uptime):
+    ints, floats = self._ints, self._floats
+
+    count = sum(ints[offset + _COUNT] for offset in offsets)
+    total = sum(floats[offset + _SUM] for offset in offsets)
+    squares = sum(floats[offset + _SQUARES] for offset in offsets)
+    used = [offset for offset in offsets if ints[offset + _COUNT]]
+
+    buckets = [0] * BUCKET_COUNT
+    for offset in offsets:
+      for window in range(2):
+        if ints[offset + _WINDOW_IDS + window] in (window_id, window_id - 1):
+          start = offset + _BUCKETS + window * BUCKET_COUNT
+          for i, value in enumerate(ints[start:start + BUCKET_COUNT]):
+            buckets[i] += value
+
+    def rate(minutes):
+      # Over the last complete minutes
+      counted = sum(
+        ints[offset + _MINUTE_COUNTS + minute]
+        for offset in offsets
+        for minute in range(RATE_MINUTES)
+        if minute_id - minutes <= ints[offset + _MINUTE_IDS + minute] < minute_id
+      )
+      return counted / (minutes * 60.0)
+
+    mean = total / count if count else 0.0
+    metrics = {
+      'avg': mean,
+      'sum': total,
+      'count': count,
+      'max': max([floats[offset + _MAX] for offset in used] or [0.0]),
+      'min': min([floats[offset + _MIN] for offset in used] or [0.0]),
+      'std_dev': math.sqrt(max(squares / count - mean * mean, 0.0)) if count else 0.0,
+      '15m_rate': rate(15),
+      '5m_rate': rate(5),
+      '1m_rate': rate(1),
+      'mean_rate': count / uptime if uptime > 0 else 0.0,
+    }
+    metrics.update(self._percentiles(buckets, metrics['min'], metrics['max']))
+    return metrics
+
+  def _percentiles(self, buckets, minimum, maximum):
+    total = sum(buckets)
+    percentiles = {}
+
+    for key, percentile in PERCENTILES:
+      if not total:
+        percentiles[key] = 0.0
+        continue
+      rank = percentile * total
+      seen = 0
+      for index, count in enumerate(buckets):
+        seen += count
+        if seen >= rank:
+          percentiles[key] = min(max(bucket_value(index), minimum), maximum)
+          break
+    return percentiles
+
+  def _slot_offset(self):
+    pid = os.getpid()
+    if self._pid != pid:
+      self._pid = pid
+      self._slot = self._claim_slot(pid)
+    if self._slot is None:
+      return None
+    return self._header_size + self._slot * self._slot_size
+
+  def _claim_slot(self, pid):
+    with self._claim_lock:
+      for slot in range(self.slots):
+        slot_pid = self._ints[1 + slot]
+        if slot_pid == pid or not slot_pid or not _is_alive(slot_pid):
+          offset = self._header_size + slot * self._slot_size
+          for index, name in enumerate(self.counters):
+            if name in self.gauges:
+              self._ints[offset + index] = 0
+          self._ints[1 + slot] = pid
+          return slot
+
+    LOG.warning('No slot left in the shared metrics for process %s, its metrics will not be reported.' % pid)
+    return None
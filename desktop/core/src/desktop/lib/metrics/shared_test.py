@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from unittest.mock import patch
+
+import pytest
+import pyformance
+
+from desktop.lib.metrics.registry import MetricsRegistry
+from desktop.lib.metrics.shared import BUCKET_GROWTH, SharedMetrics
+
+
+def _run_in_worker(fn):
+  pid = os.fork()
+  if pid == 0:
+    try:
+      fn()
+    finally:
+      os._exit(0)
+  os.waitpid(pid, 0)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='Gunicorn workers are forked')
+class TestSharedMetrics(object):
+
+  def setup_method(self):
+    self.shared = SharedMetrics(['requests.active', 'requests.exceptions'], ['requests.response-time'], gauges=['requests.active'], slots=4)
+
+  def test_merge_workers(self):
+    def worker(times):
+      def record():
+        self.shared.inc('requests.active')
+        self.shared.inc('requests.exceptions', 2)
+        for seconds in times:
+          self.shared.update('requests.response-time', seconds)
+      return record
+
+    _run_in_worker(worker([0.01 * i for i in range(1, 51)]))
+    _run_in_worker(worker([0.01 * i for i in range(51, 101)]))
+
+    metrics = self.shared.dump_metrics()
+
+    assert 4 == metrics['requests.exceptions']['count']
+    assert 0 == metrics['requests.active']['count']  # The workers are not running anymore
+
+    timer = metrics['requests.response-time']
+    assert 100 == timer['count']
+    assert 0.01 == pytest.approx(timer['min'])
+    assert 1.0 == pytest.approx(timer['max'])
+    assert 0.505 == pytest.approx(timer['avg'])
+    assert 50.5 == pytest.approx(timer['sum'])
+    for key, exact in (('75_percentile', 0.75), ('95_percentile', 0.95), ('99_percentile', 0.99)):
+      assert exact <= timer[key] <= exact * BUCKET_GROWTH
+
+  def test_reuse_slot_of_stopped_worker(self):
+    for i in range(6):
+      _run_in_worker(lambda: self.shared.inc('requests.exceptions'))
+
+    assert 6 == self.shared.dump_metrics()['requests.exceptions']['count']
+
+  def test_rates(self):
+    with patch('desktop.lib.metrics.shared.time') as time:
+      time.time.return_value = 6000.0
+      for i in range(30):
+        self.shared.update('requests.response-time', 0.1)
+
+      time.time.return_value = 6030.0
+      assert 0 == self.shared.dump_metrics()['requests.response-time']['1m_rate']  # Only complete minutes are counted
+
+      time.time.return_value = 6060.0
+      timer = self.shared.dump_metrics()['requests.response-time']
+      assert 0.5 == timer['1m_rate']
+      assert 0.1 == timer['5m_rate']
+
+  def test_current_process(self):
+    self.shared.inc('requests.active')
+
+    assert 1 == self.shared.dump_metrics()['requests.active']['count']
+    assert 0 == self.shared.dump_metrics()['requests.response-time']['count']
+
+
+class TestMetricsRegistrySharedData(object):
+
+  def test_shared_metrics_reported(self):
+    shared = SharedMetrics(['requests.active'], ['requests.response-time'], gauges=['requests.active'], slots=2)
+    registry = MetricsRegistry(pyformance.MetricsRegistry(), shared=shared)
+
+    active_requests = registry.counter(name='requests.active', label='Active Requests', description='Active requests', numerator='requests')
+    response_time = registry.timer(
+      name='requests.response-time',
+      label='Request Response Time',
+      description='Time taken to respond to requests',
+      numerator='seconds',
+      counter_numerator='requests',
+      rate_denominator='seconds',
+    )
+
+    active_requests.inc()
+    with response_time.time():
+      pass
+    response_time.time().stop()
+
+    metrics = registry.get_metrics_shared_data()
+    assert 1 == metrics['requests.active']['count']
+    assert 2 == metrics['requests.response-time']['count']
+    assert 2 == registry.dump_metrics()['requests.response-time']['count']
@@ -18,20 +18,34 @@
 
 import sys
 import json
+import time
 import uuid
 import base64
+import hashlib
 import logging
-from urllib.parse import unquote as lib_urlunquote, urlparse as lib_urlparse
+import calendar
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qs, unquote as lib_urlunquote, urlparse as lib_urlparse
 
 import requests
 import requests_kerberos
 
 import desktop.lib.raz.signer_protos_pb2 as raz_signer
+from desktop.conf import RAZ
 from desktop.lib.exceptions_renderable import PopupException
 from desktop.lib.sdxaas.knox_jwt import fetch_jwt
 
 LOG = logging.getLogger()
 
+CACHE_MAX_ENTRIES = 10000
+S3_SIGNATURE_MAX_AGE = 5 * 60  # S3 rejects the requests signed more than 15 minutes ago
+EXPIRY_MARGIN = 60  # SAS tokens and JWTs are not reused during their last minute
+
+_thread_local = threading.local()
+_jwt = {'token': None, 'expiry': 0}
+_jwt_lock = threading.Lock()
+
 
 class RazClient(object):
 
@@ -90,6 +104,14 @@ class RazClient(object):
     elif self.service in ('s3', 'gs'):
       self._make_s3_request(request_data, request_headers, method, params, headers, url_params, endpoint, resource_path, data=data)
 
+    cache = get_raz_cache()
+    request_key = self._get_request_key(method, url, params, headers, data, request_data) if cache else None
+    if request_key:
+      response = self._get_cached_response(cache, request_key)
+      if response is not None:
+        LOG.debug("Reusing the RAZ response of %s %s" % (method, url))
+        return response
+
     LOG.debug("Sending access check headers: {%s} request_data: {%s}" % (request_headers, request_data))
 
     raz_req = self._handle_raz_req(self.raz_url, request_headers, request_data)
@@ -107,6 +129,8 @@ class RazClient(object):
 
       if result != "ALLOWED":
         msg = "Permission missing %s" % raz_req.json()
+        if request_key:
+          cache.set(('denied',) + request_key, msg, time.time() + RAZ.CACHE_TTL.get())
         raise PopupException(msg, error_code=401)
 
       if result == "ALLOWED":
@@ -115,6 +139,8 @@ class RazClient(object):
 
         if self.service == 'adls':
           LOG.debug("Received SAS %s" % signed_response_data["ADLS_DSAS"])
+          if request_key:
+            self._cache_sas_token(cache, request_key, signed_response_data["ADLS_DSAS"])
           return {'token': signed_response_data["ADLS_DSAS"]}
 
         elif self.service in ('s3', 'gs'):
@@ -127,15 +153,69 @@ class RazClient(object):
 
           # Signed headers "only"
           if signed_response is not None:
-            return dict([(i.key, i.value) for i in signed_response.signer_generated_headers])
+            signed_headers = dict([(i.key, i.value) for i in signed_response.signer_generated_headers])
+            if request_key and method in ('GET', 'HEAD'):
+              cache.set(request_key, signed_headers, time.time() + min(RAZ.CACHE_TTL.get(), S3_SIGNATURE_MAX_AGE))
+            return dict(signed_headers)
+
+  def _get_request_key(self, method, url, params, headers, data, request_data):
+    """Identifies the resources and the action of the request, or for S3 and GS the whole request as the signature covers it."""
+    if self.service == 'adls':
+      resource = request_data['operation']['resource']
+      return (
+        'adls', self.raz_url, self.username, request_data['operation']['action'], resource['storageaccount'], resource['container'],
+        resource['relativepath']
+      )
+    elif self.service in ('s3', 'gs'):
+      return (
+        self.service, self.raz_url, self.service_name, self.username, method, url, tuple(sorted(params.items())),
+        tuple(sorted(headers.items())), hashlib.sha256(data if isinstance(data, bytes) else data.encode()).hexdigest() if data else None
+      )
+
+  def _get_cached_response(self, cache, request_key):
+    denial = cache.get(('denied',) + request_key)
+    if denial is not None:
+      raise PopupException(denial, error_code=401)
+
+    if self.service == 'adls':
+      for key in _get_sas_keys(request_key):
+        token = cache.get(key)
+        if token is not None:
+          return {'token': token}
+    else:
+      signed_headers = cache.get(request_key)
+      if signed_headers is not None:
+        return dict(signed_headers)
+
+  def _cache_sas_token(self, cache, request_key, token):
+    """
+    Keeps the SAS token until it expires, for the other requests of the same action on its resource: the file or directory of the
+    request, or the directory of depth `sdd` containing it for a directory SAS, or the whole container for a container SAS.
+    """
+    sas_params = parse_qs(token)
+    expiry = _parse_sas_time(sas_params.get('se', [''])[0])
+    if expiry is None:
+      return
+
+    relative_path = request_key[-1]
+    scope = sas_params.get('sr', [''])[0]
+    if scope == 'c':
+      key = ('sas', 'd') + request_key[:-1] + ('/',)
+    elif scope == 'd' and sas_params.get('sdd', [''])[0].isdigit():
+      depth = int(sas_params['sdd'][0])
+      key = ('sas', 'd') + request_key[:-1] + ('/' + '/'.join([name for name in relative_path.split('/') if name][:depth]),)
+    else:
+      key = ('sas', 'b') + request_key
+
+    cache.set(key, token, expiry - EXPIRY_MARGIN)
 
   def _handle_raz_req(self, raz_url, request_headers, request_data):
     if self.auth_type == 'kerberos':
-      auth_handler = requests_kerberos.HTTPKerberosAuth(mutual_authentication=requests_kerberos.OPTIONAL)
+      auth_handler = _get_kerberos_auth()
       raz_response = self._handle_raz_ha(raz_url, headers=request_headers, data=request_data, auth_handler=auth_handler)
 
     elif self.auth_type == 'jwt':
-      jwt_token = fetch_jwt()
+      jwt_token = _get_jwt()
       if jwt_token is None:
         raise PopupException('Knox JWT is not available to send to RAZ.')
 
@@ -164,7 +244,7 @@ class RazClient(object):
       LOG.debug('Attempting to connect to RAZ URL: %s' % r_url)
 
       try:
-        raz_response = requests.post(r_url, **params)
+        raz_response = _get_session().post(r_url, **params)
       except Exception as e:
         if 'Failed to establish a new connection' in str(e):
           LOG.debug('Raz URL %s is not available.' % r_url)
@@ -292,3 +372,107 @@ def get_raz_client(raz_url, username, auth='kerberos', service='s3', service_nam
     raise PopupException('No username set.')
 
   return RazClient(raz_url, auth, username, service=service, service_name=service_name, cluster_name=cluster_name)
+
+
+class RazCache(object):
+  """Keeps the most recently used RAZ responses of the Hue process until their expiry time."""
+
+  def __init__(self, max_entries):
+    self.max_entries = max_entries
+    self._entries = OrderedDict()  # Key -> (response, expiry time)
+    self._lock = threading.Lock()
+
+  def get(self, key):
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None:
+        return None
+      if entry[1] <= time.time():
+        del self._entries[key]
+        return None
+      self._entries.move_to_end(key)
+      return entry[0]
+
+  def set(self, key, response, expiry):
+    if expiry <= time.time():
+      return
+
+    with self._lock:
+      self._entries[key] = (response, expiry)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+
+
+_RAZ_CACHE = RazCache(CACHE_MAX_ENTRIES)
+
+
+def get_raz_cache():
+  """Returns the cache of the RAZ responses, or None when RAZ.CACHE_TTL disables it."""
+  return _RAZ_CACHE if RAZ.CACHE_TTL.get() > 0 else None
+
+
+def _get_sas_keys(request_key):
+  """Returns the keys of the SAS tokens usable for the request: for its path, then for the directories containing it."""
+  relative_path = request_key[-1]
+  names = [name for name in relative_path.split('/') if name]
+
+  keys = [('sas', 'b') + request_key]
+  for depth in range(len(names), -1, -1):
+    keys.append(('sas', 'd') + request_key[:-1] + ('/' + '/'.join(names[:depth]),))
+  return keys
+
+
+def _parse_sas_time(value):
+  """Returns the timestamp of a time of a SAS token, e.g. 2015-01-02T02:00:51Z, or None."""
+  for time_format in ('%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%dT%H:%MZ', '%Y-%m-%d'):
+    try:
+      return calendar.timegm(time.strptime(value, time_format))
+    except ValueError:
+      pass
+  return None
+
+
+def _get_session():
+  """Returns the session to RAZ of the thread, which keeps its connections open across the checks."""
+  if getattr(_thread_local, 'session', None) is None:
+    _thread_local.session = requests.Session()
+  return _thread_local.session
+
+
+def _get_kerberos_auth():
+  """
+  Returns the Kerberos authentication of the thread. It authenticates the first request to RAZ instead of waiting for a 401 response,
+  which saves a round trip per check.
+  """
+  if getattr(_thread_local, 'kerberos_auth', None) is None:
+    _thread_local.kerberos_auth = requests_kerberos.HTTPKerberosAuth(
+      mutual_authentication=requests_kerberos.OPTIONAL, force_preemptive=True
+    )
+  return _thread_local.kerberos_auth
+
+
+def _get_jwt():
+  """Returns the Knox JWT, fetched again only when the previous one is about to expire."""
+  with _jwt_lock:
+    if _jwt['token'] is not None and _jwt['expiry'] - EXPIRY_MARGIN > time.time():
+      return _jwt['token']
+
+  token = fetch_jwt()
+  expiry = _get_jwt_expiry(token) if token else None
+  if expiry is not None:
+    with _jwt_lock:
+      _jwt['token'], _jwt['expiry'] = token, expiry
+  return token
+
+
+def _get_jwt_expiry(token):
+  try:
+    payload = token.split('.')[1]
+    return int(json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))['exp'])
+  except Exception:
+    return None
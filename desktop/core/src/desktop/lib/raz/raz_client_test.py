@@ -14,10 +14,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import base64
+
 import pytest
 import unittest
 from django.test import TestCase
 
+from desktop.conf import RAZ
+from desktop.lib.raz import raz_client
 from desktop.lib.raz.raz_client import RazClient, get_raz_client
 from desktop.lib.exceptions_renderable import PopupException
 
@@ -34,6 +38,10 @@ class RazClientTest(TestCase):
     self.s3_path = 'https://gethue-test.s3.amazonaws.com/gethue/data/customer.csv'
     self.adls_path = 'https://gethuestorage.dfs.core.windows.net/gethue-container/user/csso_hueuser/customer.csv'
 
+    raz_client._thread_local.__dict__.clear()
+    raz_client._RAZ_CACHE.clear()
+    raz_client._jwt['token'] = None
+
 
   def test_get_raz_client_adls(self):
     client = get_raz_client(
@@ -54,7 +62,7 @@ class RazClientTest(TestCase):
 
   def test_check_access_adls(self):
     with patch('desktop.lib.sdxaas.knox_jwt.requests_kerberos.HTTPKerberosAuth') as HTTPKerberosAuth:
-      with patch('desktop.lib.raz.raz_client.requests.post') as requests_post:
+      with patch('desktop.lib.raz.raz_client.requests.Session.post') as requests_post:
         with patch('desktop.lib.raz.raz_client.uuid.uuid4') as uuid:
 
           requests_post.return_value = Mock(
@@ -113,7 +121,7 @@ class RazClientTest(TestCase):
 
   def test_handle_raz_req(self):
     with patch('desktop.lib.sdxaas.knox_jwt.requests_kerberos.HTTPKerberosAuth') as HTTPKerberosAuth:
-      with patch('desktop.lib.raz.raz_client.requests.post') as requests_post:
+      with patch('desktop.lib.raz.raz_client.requests.Session.post') as requests_post:
         with patch('desktop.lib.raz.raz_client.fetch_jwt') as fetch_jwt:
           request_headers = {}
           request_data = Mock()
@@ -307,7 +315,7 @@ class RazClientTest(TestCase):
 
   def test_check_access_s3(self):
     with patch('desktop.lib.sdxaas.knox_jwt.requests_kerberos.HTTPKerberosAuth') as HTTPKerberosAuth:
-      with patch('desktop.lib.raz.raz_client.requests.post') as requests_post:
+      with patch('desktop.lib.raz.raz_client.requests.Session.post') as requests_post:
         with patch('desktop.lib.raz.raz_client.raz_signer.SignResponseProto') as SignResponseProto:
           with patch('desktop.lib.raz.raz_client.base64.b64decode') as b64decode:
             with patch('desktop.lib.raz.raz_client.uuid.uuid4') as uuid:
@@ -374,7 +382,7 @@ class RazClientTest(TestCase):
 
   def test_handle_raz_ha(self):
     with patch('desktop.lib.sdxaas.knox_jwt.requests_kerberos.HTTPKerberosAuth') as HTTPKerberosAuth:
-      with patch('desktop.lib.raz.raz_client.requests.post') as requests_post:
+      with patch('desktop.lib.raz.raz_client.requests.Session.post') as requests_post:
         request_data = Mock()
 
         # Non-HA mode
@@ -432,3 +440,82 @@ class RazClientTest(TestCase):
         assert raz_response == None
         assert requests_post.call_count == 2
 
+  def _raz_response(self, result='ALLOWED', **additional_info):
+    return Mock(status_code=200, json=Mock(return_value={'operResult': {'result': result, 'additionalInfo': additional_info}}))
+
+  def test_check_access_adls_reuses_sas_tokens(self):
+    with patch('desktop.lib.raz.raz_client.requests.Session.post') as requests_post:
+      with patch('desktop.lib.raz.raz_client.time.time') as time:
+        time.return_value = 1420160000  # 2015-01-02T00:53:20Z
+        directory_sas = 'sv=2020-02-10&sr=d&sdd=2&se=2015-01-02T02:00:51Z&sp=r&sig=abc'
+        requests_post.return_value = self._raz_response(ADLS_DSAS=directory_sas)
+
+        client = RazClient(self.raz_url, 'kerberos', username=self.username, service="adls", service_name="cm_adls", cluster_name="cl1")
+
+        assert {'token': directory_sas} == client.check_access(method='GET', url=self.adls_path)
+        assert {'token': directory_sas} == client.check_access(
+          method='GET', url='https://gethuestorage.dfs.core.windows.net/gethue-container/user/csso_hueuser/sales/orders.csv'
+        )
+        assert 1 == requests_post.call_count
+
+        # Other directory, other action or other user
+        client.check_access(method='GET', url='https://gethuestorage.dfs.core.windows.net/gethue-container/user/other/customer.csv')
+        client.check_access(method='DELETE', url=self.adls_path)
+        RazClient(self.raz_url, 'kerberos', username='other', service="adls").check_access(method='GET', url=self.adls_path)
+        assert 4 == requests_post.call_count
+
+        # Expired
+        time.return_value = 1420164000
+        client.check_access(method='GET', url=self.adls_path)
+        assert 5 == requests_post.call_count
+
+        reset = RAZ.CACHE_TTL.set_for_testing(0)
+        try:
+          client.check_access(method='GET', url=self.adls_path)
+          assert 6 == requests_post.call_count
+        finally:
+          reset()
+
+  def test_check_access_caches_denials(self):
+    with patch('desktop.lib.raz.raz_client.requests.Session.post') as requests_post:
+      requests_post.return_value = self._raz_response(result='DENIED')
+      client = RazClient(self.raz_url, 'kerberos', username=self.username, service="adls", service_name="cm_adls", cluster_name="cl1")
+
+      for i in range(2):
+        with pytest.raises(PopupException):
+          client.check_access(method='GET', url=self.adls_path)
+      assert 1 == requests_post.call_count
+
+  def test_check_access_s3_reuses_read_signatures(self):
+    with patch('desktop.lib.raz.raz_client.requests.Session.post') as requests_post:
+      with patch('desktop.lib.raz.raz_client.raz_signer.SignResponseProto') as SignResponseProto:
+        with patch('desktop.lib.raz.raz_client.base64.b64decode'):
+          requests_post.return_value = self._raz_response(S3_SIGN_RESPONSE='My signed URL')
+          SignResponseProto.return_value.FromString.return_value = Mock(signer_generated_headers=[Mock(key='Authorization', value='AWS4')])
+          client = RazClient(self.raz_url, 'kerberos', username=self.username)
+
+          assert {'Authorization': 'AWS4'} == client.check_access(method='HEAD', url=self.s3_path)
+          assert {'Authorization': 'AWS4'} == client.check_access(method='HEAD', url=self.s3_path)
+          assert 1 == requests_post.call_count
+
+          client.check_access(method='HEAD', url=self.s3_path, headers={'Range': 'bytes=0-10'})
+          client.check_access(method='PUT', url=self.s3_path, data='data')
+          client.check_access(method='PUT', url=self.s3_path, data='data')
+          assert 4 == requests_post.call_count
+
+  def test_handle_raz_req_reuses_jwt(self):
+    with patch('desktop.lib.raz.raz_client.fetch_jwt') as fetch_jwt:
+      with patch('desktop.lib.raz.raz_client.time.time') as time:
+        time.return_value = 1000
+        fetch_jwt.return_value = 'header.%s.signature' % base64.urlsafe_b64encode(b'{"exp": 2000}').decode().rstrip('=')
+
+        client = RazClient(self.raz_url, 'jwt', username=self.username, service="s3")
+        client._handle_raz_ha = Mock()
+
+        client._handle_raz_req(self.raz_url, {}, {})
+        client._handle_raz_req(self.raz_url, {}, {})
+        assert 1 == fetch_jwt.call_count
+
+        time.return_value = 1950
+        client._handle_raz_req(self.raz_url, {}, {})
+        assert 2 == fetch_jwt.call_count
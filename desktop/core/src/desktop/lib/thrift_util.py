@@ -38,9 +38,17 @@ from thrift.Thrift import TApplicationException, TType
 from thrift.transport.TSocket import TSocket
 from thrift.transport.TTransport import TBufferedTransport, TFramedTransport, TMemoryBuffer, TTransportException
 
-from desktop.conf import CHERRYPY_SERVER_THREADS, ENABLE_ORGANIZATIONS, ENABLE_SMART_THRIFT_POOL, SASL_MAX_BUFFER, USE_THRIFT_HTTP_JWT
+from desktop.conf import (
+  CHERRYPY_SERVER_THREADS,
+  ENABLE_ORGANIZATIONS,
+  ENABLE_SMART_THRIFT_POOL,
+  SASL_MAX_BUFFER,
+  THRIFT_POOL_IDLE_TIMEOUT,
+  USE_THRIFT_HTTP_JWT,
+)
 from desktop.lib.apputil import INFO_LEVEL_CALL_DURATION_MS, WARN_LEVEL_CALL_DURATION_MS
 from desktop.lib.exceptions import StructuredException, StructuredThriftTransportException
+from desktop.lib.metrics import global_registry
 from desktop.lib.python_util import create_synchronous_io_multiplexer
 from desktop.lib.sasl_compat import PureSASLClient
 from desktop.lib.thrift_.http_client import THttpClient
@@ -162,6 +170,52 @@ class ConnectionConfig(object):
     return self.coordinator_host
 
 
+class ConnectionPool(LifoQueue):
+  """
+  Clients of one endpoint, the most recently returned first.
+
+  `size` is the number of clients owned by the pool, idle or in use. It can be at most the maximum size of the queue.
+  """
+
+  def __init__(self, maxsize, service_name, can_grow=True):
+    LifoQueue.__init__(self, maxsize)
+    self.service_name = service_name
+    self.can_grow = can_grow
+    self.size = 0
+    self.last_reaped = time.time()
+
+  @property
+  def idle(self):
+    return self.qsize()
+
+  @property
+  def in_use(self):
+    with self.mutex:
+      return self.size - len(self.queue)
+
+  def reserve(self):
+    """Counts one more client in the pool if it is not full. Returns whether there was room for it."""
+    with self.mutex:
+      if self.size < self.maxsize:
+        self.size += 1
+        return True
+      return False
+
+  def release(self):
+    """Stops counting a client that will not be returned to the pool."""
+    with self.mutex:
+      self.size -= 1
+
+  def remove_idle(self, idle_since):
+    """Removes and returns the idle clients last returned before `idle_since`, the least recently used ones being at the bottom."""
+    with self.mutex:
+      idle = []
+      while self.queue and self.queue[0].last_used < idle_since:
+        idle.append(self.queue.pop(0))
+      self.size -= len(idle)
+      return idle
+
+
 class ConnectionPooler(object):
   """
   Thread-safe connection pooling for thrift. (With about 3 changes,
@@ -174,60 +228,38 @@ class ConnectionPooler(object):
   A connection is a 'SuperClient', which deals with timeout errors
   automatically so we don't have to worry about refreshing a stale pool.
 
-  We could be fancier here - we could reclaim clients ourselves without
-  relying on them to be returned but that would increase complexity. The
-  benefit would be not having to hit the connection pool on every client call.
+  Pools open a new connection when all theirs are in use, up to `poolsize` connections, and close the connections left idle
+  for longer than thrift_pool_idle_timeout. The pools of the Impala coordinators only get the connections of the clients
+  which moved to them and never grow or shrink by themselves.
+
+  The checkout time, timeouts and number of connections in use and idle are reported per service in the metrics.
   """
 
-  def __init__(self, poolsize=10):
+  def __init__(self, poolsize=10, registry=None):
     self.pooldict = {}
     self.poolsize = poolsize
     self.dictlock = threading.Lock()
+    self.registry = registry
+    self.metrics = {}
 
   def create_pool_impala(self, conf):
-    self.dictlock.acquire()
-    try:
-      if _get_pool_key(conf) not in self.pooldict:
-        q = LifoQueue(self.poolsize)
-        self.pooldict[_get_pool_key(conf)] = q
-    finally:
-      self.dictlock.release()
+    return self._create_pool(conf, can_grow=False)
 
   def create_pool(self, conf):
-    # First up, check to see if we have a pool for this endpoint
-    if _get_pool_key(conf) not in self.pooldict:
-      # Uh-oh, we need to initialise the queue. Take the dict lock.
-      # Note that this is 'double-checked locking'.
-
-      # The reason this pattern doesn't work in Java is that the write to the dict
-      # may get issued before the construction of the Queue due to new Queue(..) not
-      # being atomic. However in Python this becomes CALL_FUNCTION and STORE_FAST,
-      # therefore as long as a) the function doesn't get inlined b) Python's bytecode
-      # generator doesn't move the write to q before the function completes there's no
-      # way for another thread to observe a partially constructed queue.
-
-      # I haven't found a reference for the Python memory model, so I'm leaving this comment
-      # here in case unladen-swallow or something breaks this assumption of correctness.
+    return self._create_pool(conf, can_grow=True)
 
+  def _create_pool(self, conf, can_grow):
+    # Double-checked locking, the queue is fully constructed before being added to the dict
+    pool = self.pooldict.get(_get_pool_key(conf))
+    if pool is None:
       self.dictlock.acquire()
       try:
         if _get_pool_key(conf) not in self.pooldict:
-          q = LifoQueue(self.poolsize)
-          for i in range(self.poolsize):
-            client = construct_superclient(conf)
-            client.CID = i
-            q.put(client, False)
-
-          # Wait until the queue has been filled with connections before adding
-          # it to the pool. This is done last because any exceptions thrown
-          # by the client construction could result in there being no
-          # connections available in this pool. When `get_client` is called next,
-          # it would skip this block because the key has a value, but then it
-          # would deadlock later because there are no connections for it to
-          # fetch from the pool.
-          self.pooldict[_get_pool_key(conf)] = q
+          self.pooldict[_get_pool_key(conf)] = ConnectionPool(self.poolsize, conf.service_name, can_grow=can_grow)
+        pool = self.pooldict[_get_pool_key(conf)]
       finally:
         self.dictlock.release()
+    return pool
 
   def get_client(self, conf, get_client_timeout=None):
     """
@@ -241,29 +273,39 @@ class ConnectionPooler(object):
     start_pool_get_time = time.time()
     has_waited_for = 0
 
-    self.create_pool(conf)
-
-    while connection is None:
-      if get_client_timeout is not None:
-        this_round_timeout = max(min(get_client_timeout - has_waited_for, 1), 0)
-      else:
-        this_round_timeout = None
+    pool = self.create_pool(conf)
+    metrics = self.get_metrics(conf.service_name)
+    self._close_idle_clients(pool)
 
+    with metrics['checkout_time'].time():
       try:
-        connection = self.pooldict[_get_pool_key(conf)].get(block=True, timeout=this_round_timeout)
-        if connection is not None:
-          duration = time.time() - start_pool_get_time
-          message = "Thrift client %s got connection %s after %.2f seconds" % (self, connection.CID, duration)
-          log_if_slow_call(duration=duration, message=message)
+        connection = pool.get(block=False)
       except queue.Empty:
-        has_waited_for = time.time() - start_pool_get_time
-        if get_client_timeout is not None and has_waited_for > get_client_timeout:
-          raise socket.timeout(
-            ("Timed out after %.2f seconds waiting to retrieve a %s client from the pool.") % (has_waited_for, conf.service_name))
+        if pool.can_grow and pool.reserve():
+          connection = self._new_client(conf, pool)
+
+      while connection is None:
+        if get_client_timeout is not None:
+          this_round_timeout = max(min(get_client_timeout - has_waited_for, 1), 0)
         else:
-          message = "Waited %d seconds for a Thrift client to %s:%d %s" % (has_waited_for,
-                                                                           conf.host, conf.port, conf.get_coordinator_host())
-          log_if_slow_call(duration=has_waited_for, message=message)
+          this_round_timeout = None
+
+        try:
+          connection = pool.get(block=True, timeout=this_round_timeout)
+          if connection is not None:
+            duration = time.time() - start_pool_get_time
+            message = "Thrift client %s got connection %s after %.2f seconds" % (self, connection.CID, duration)
+            log_if_slow_call(duration=duration, message=message)
+        except queue.Empty:
+          has_waited_for = time.time() - start_pool_get_time
+          if get_client_timeout is not None and has_waited_for > get_client_timeout:
+            metrics['timeouts'].inc()
+            raise socket.timeout(
+              ("Timed out after %.2f seconds waiting to retrieve a %s client from the pool.") % (has_waited_for, conf.service_name))
+          else:
+            message = "Waited %d seconds for a Thrift client to %s:%d %s" % (has_waited_for,
+                                                                             conf.host, conf.port, conf.get_coordinator_host())
+            log_if_slow_call(duration=has_waited_for, message=message)
 
     return connection
 
@@ -276,10 +318,93 @@ class ConnectionPooler(object):
     if client.get_coordinator_host() is not None:
       conf.update_coordinator_host(client.get_coordinator_host())
       self.create_pool_impala(conf)
-    if client.get_coordinator_host() is not None and client.get_coordinator_host() != conf.get_coordinator_host():
-      conf.update_coordinator_host(client.get_coordinator_host())
 
-    self.pooldict[_get_pool_key(conf)].put(client)
+    pool = self.pooldict[_get_pool_key(conf)]
+
+    if client.pool_key != _get_pool_key(conf):
+      # The client now talks to an Impala coordinator and moves to its pool
+      self.pooldict[client.pool_key].release()
+      if not pool.reserve():
+        LOG.debug('Closing Thrift connection %s as the pool of %s is full' % (client.CID, conf.get_coordinator_host()))
+        client.transport.close()
+        return
+      client.pool_key = _get_pool_key(conf)
+
+    client.last_used = time.time()
+    pool.put(client)
+
+  def _new_client(self, conf, pool):
+    try:
+      client = construct_superclient(conf)
+    except Exception:
+      pool.release()
+      raise
+    client.CID = pool.size
+    client.pool_key = _get_pool_key(conf)
+    return client
+
+  def _close_idle_clients(self, pool):
+    idle_timeout = THRIFT_POOL_IDLE_TIMEOUT.get()
+    now = time.time()
+
+    if idle_timeout <= 0 or not pool.can_grow or now - pool.last_reaped < min(idle_timeout, 60):
+      return
+    pool.last_reaped = now
+
+    for client in pool.remove_idle(now - idle_timeout):
+      LOG.debug('Closing Thrift connection %s to %s idle for %.2f seconds' % (client.CID, pool.service_name, now - client.last_used))
+      try:
+        client.transport.close()
+      except Exception as e:
+        LOG.warning('Failed to close idle Thrift connection: %s' % e)
+
+  def get_metrics(self, service_name):
+    if service_name not in self.metrics:
+      self.dictlock.acquire()
+      try:
+        if service_name not in self.metrics:
+          self.metrics[service_name] = self._register_metrics(service_name)
+      finally:
+        self.dictlock.release()
+    return self.metrics[service_name]
+
+  def _register_metrics(self, service_name):
+    registry = self.registry or global_registry()
+    name = 'thrift.pool.%s' % re.sub('[^a-z0-9]+', '-', str(service_name).lower()).strip('-')
+
+    def count(attr):
+      return lambda: sum(getattr(pool, attr) for pool in list(self.pooldict.values()) if pool.service_name == service_name)
+
+    registry.gauge_callback(
+      name='%s.in-use' % name,
+      callback=count('in_use'),
+      label='%s Thrift Connections In Use' % service_name,
+      description='Number of Thrift connections to %s currently used by requests' % service_name,
+      numerator='connections',
+    )
+    registry.gauge_callback(
+      name='%s.idle' % name,
+      callback=count('idle'),
+      label='%s Idle Thrift Connections' % service_name,
+      description='Number of Thrift connections to %s waiting in the connection pool' % service_name,
+      numerator='connections',
+    )
+    return {
+      'checkout_time': registry.timer(
+        name='%s.checkout-time' % name,
+        label='%s Thrift Connection Checkout Time' % service_name,
+        description='Time spent waiting for a Thrift connection to %s from the connection pool' % service_name,
+        numerator='seconds',
+        counter_numerator='checkouts',
+        rate_denominator='seconds',
+      ),
+      'timeouts': registry.counter(
+        name='%s.timeouts' % name,
+        label='%s Thrift Connection Timeouts' % service_name,
+        description='Number of requests which timed out waiting for a Thrift connection to %s' % service_name,
+        numerator='timeouts',
+      ),
+    }
 
 
 def _get_pool_key(conf):
@@ -502,6 +627,8 @@ class SuperClient(object):
     self.transport = transport
     self.timeout_seconds = timeout_seconds
     self.coordinator_host = coordinator_host
+    self.pool_key = None
+    self.last_used = None
 
   def get_coordinator_host(self):
     return self.coordinator_host
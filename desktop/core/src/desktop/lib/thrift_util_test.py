@@ -24,6 +24,7 @@ import threading
 from unittest.mock import Mock, patch
 
 import pytest
+import pyformance
 
 gen_py_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "gen-py"))
 if gen_py_path not in sys.path:
@@ -38,9 +39,10 @@ from thrift.transport import TSocket
 from thrift.transport.TTransport import TBufferedTransportFactory, TTransportException
 
 from desktop.auth.backend import create_user, ensure_has_a_group, find_or_create_user, rewrite_user
-from desktop.conf import USE_THRIFT_HTTP_JWT
+from desktop.conf import THRIFT_POOL_IDLE_TIMEOUT, USE_THRIFT_HTTP_JWT
 from desktop.lib import python_util, thrift_util
 from desktop.lib.django_test_util import make_logged_in_client
+from desktop.lib.metrics.registry import MetricsRegistry
 from desktop.lib.thrift_util import _unpack_guid_secret_in_handle, jsonable2thrift, thrift2json
 from useradmin.models import User
 
@@ -344,6 +346,84 @@ class TestSuperClient(TestCase):
       # Could check output for several "Thrift exception; retrying: some error"
 
 
+class TestConnectionPooler(object):
+
+  def setup_method(self):
+    self.registry = MetricsRegistry(pyformance.MetricsRegistry())
+    self.pooler = thrift_util.ConnectionPooler(poolsize=2, registry=self.registry)
+    self.conf = thrift_util.ConnectionConfig(TestService.Client, 'localhost', 10000, 'Hive Server2')
+
+  def _metrics(self):
+    return self.registry.dump_metrics()
+
+  def test_grows_on_demand(self):
+    with patch('desktop.lib.thrift_util.construct_superclient') as construct_superclient:
+      construct_superclient.side_effect = lambda conf: thrift_util.SuperClient(Mock(), Mock())
+
+      client1 = self.pooler.get_client(self.conf)
+      assert 1 == construct_superclient.call_count
+      self.pooler.return_client(self.conf, client1)
+
+      assert client1 is self.pooler.get_client(self.conf)  # Reused instead of opening another connection
+      client2 = self.pooler.get_client(self.conf)
+      assert 2 == construct_superclient.call_count
+
+      metrics = self._metrics()
+      assert 2 == metrics['thrift.pool.hive-server2.in-use']['value']
+      assert 0 == metrics['thrift.pool.hive-server2.idle']['value']
+      assert 3 == metrics['thrift.pool.hive-server2.checkout-time']['count']
+
+      with pytest.raises(socket.timeout):
+        self.pooler.get_client(self.conf, get_client_timeout=0.1)
+      assert 2 == construct_superclient.call_count
+      assert 1 == self._metrics()['thrift.pool.hive-server2.timeouts']['count']
+
+      self.pooler.return_client(self.conf, client2)
+      assert 1 == self._metrics()['thrift.pool.hive-server2.idle']['value']
+
+  def test_close_idle_clients(self):
+    reset = THRIFT_POOL_IDLE_TIMEOUT.set_for_testing(10)
+    try:
+      with patch('desktop.lib.thrift_util.construct_superclient') as construct_superclient:
+        construct_superclient.side_effect = lambda conf: thrift_util.SuperClient(Mock(), Mock())
+
+        client1 = self.pooler.get_client(self.conf)
+        client2 = self.pooler.get_client(self.conf)
+        self.pooler.return_client(self.conf, client1)
+        self.pooler.return_client(self.conf, client2)
+        client1.last_used -= 20
+
+        pool = self.pooler.create_pool(self.conf)
+        pool.last_reaped -= 20
+        assert client2 is self.pooler.get_client(self.conf)
+
+        client1.transport.close.assert_called_once()
+        client2.transport.close.assert_not_called()
+        assert 1 == pool.size
+        assert 1 == pool.in_use
+    finally:
+      reset()
+
+  def test_move_to_coordinator_pool(self):
+    with patch('desktop.lib.thrift_util.construct_superclient') as construct_superclient:
+      construct_superclient.side_effect = lambda conf: thrift_util.SuperClient(Mock(), Mock())
+
+      client = self.pooler.get_client(self.conf)
+      client.coordinator_host = 'coordinator:25000'
+      self.pooler.return_client(self.conf, client)
+
+      assert 'coordinator:25000' == self.conf.get_coordinator_host()
+      assert client is self.pooler.get_client(self.conf)
+      assert 1 == construct_superclient.call_count
+
+      pools = self.pooler.pooldict
+      assert 0 == pools[(TestService.Client, 'localhost', 10000, '')].size
+      assert 1 == pools[(TestService.Client, 'localhost', 10000, 'coordinator:25000')].size
+
+      with pytest.raises(socket.timeout):  # The pools of the coordinators do not open connections
+        self.pooler.get_client(self.conf, get_client_timeout=0.1)
+
+
 @pytest.mark.django_db
 class TestThriftJWT():
   def setup_method(self):
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from desktop.lib.document_search import NativeSearchIndex
+from desktop.models import Document2
+
+LOG = logging.getLogger()
+
+
+class Command(BaseCommand):
+
+  help = """Create the full text index of the documents and of the query history used when document_search_index is 'native'.
+
+  The index is created without locking the documents on PostgreSQL. It is required on MySQL.
+  """
+
+  def handle(self, *args, **options):
+    sql = NativeSearchIndex.create_index_sql(connection, Document2._meta.db_table)
+    if sql is None:
+      raise CommandError('The full text search of the documents is not supported on %s' % connection.vendor)
+
+    self.stdout.write('Creating the search index of the documents: %s' % sql)
+    with connection.cursor() as cursor:
+      cursor.execute(sql)
+    self.stdout.write('Search index created')
@@ -0,0 +1,36 @@
+# Generated by Django 4.1.13 on 2026-10-18 00:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('desktop', '0013_alter_document2_is_trashed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistorySummary',
+            fields=[
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='history_summary', serialize=False, to='desktop.document2')),
+                ('name', models.CharField(default='', max_length=255)),
+                ('uuid', models.CharField(max_length=36)),
+                ('doc_type', models.CharField(help_text='Type of the document, e.g. query-hive.', max_length=32)),
+                ('dialect', models.CharField(blank=True, default='', max_length=32)),
+                ('connector_id', models.IntegerField(blank=True, null=True)),
+                ('statement', models.TextField(blank=True, default='', help_text='Beginning of the statement of the query.')),
+                ('status', models.CharField(blank=True, default='', max_length=32)),
+                ('last_executed', models.BigIntegerField(default=-1, help_text='Time of the execution in milliseconds since the epoch.')),
+                ('parent_saved_query_uuid', models.CharField(blank=True, default='', max_length=36)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='history_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='historysummary',
+            index=models.Index(fields=['owner', 'doc_type', '-last_executed'], name='history_summary_owner_idx'),
+        ),
+    ]
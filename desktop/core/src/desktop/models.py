@@ -60,6 +60,7 @@ from desktop.conf import (
 from desktop.lib import fsmanager
 from desktop.lib.connectors.api import _get_installed_connectors
 from desktop.lib.connectors.models import Connector
+from desktop.lib.document_search import get_search_index
 from desktop.lib.exceptions_renderable import PopupException
 from desktop.lib.i18n import force_unicode
 from desktop.lib.paths import SAFE_CHARACTERS_URI_COMPONENTS, get_run_root
@@ -987,8 +988,8 @@ class Document2QueryMixin(object):
     """
     Search for documents based on type filters, search_text or order_by and return a queryset of document objects
     :param types: list of Document2 types (e.g. - query-hive, directory, etc)
-    :param search_text: text to search on in the name and description fields
-    :param order_by: order by field (e.g. -last_modified, type)
+    :param search_text: text to search on in the name, description and searchable text fields
+    :param order_by: order by field (e.g. -last_modified, type), by default documents matching search_text are ordered by relevance
     """
     documents = self
 
@@ -996,8 +997,7 @@ class Document2QueryMixin(object):
       documents = documents.filter(type__in=types)
 
     if search_text:
-      documents = documents.filter(Q(name__icontains=search_text) | Q(description__icontains=search_text) |
-                                   Q(search__icontains=search_text))
+      documents = get_search_index().search(documents, search_text, ranked=not order_by)
 
     if order_by:  # TODO: Validate that order_by is a valid sort parameter
       documents = documents.order_by(order_by)
@@ -1749,6 +1749,63 @@ class Document2Permission(models.Model):
     return self.is_link_on or user in self.users.all() or self.groups.filter(id__in=user.groups.all()).exists()
 
 
+class HistorySummary(models.Model):
+  """
+  What the query history panel lists of a history document, so that it is paginated and sorted without decoding the documents.
+
+  Summaries are saved with their history documents and deleted with them.
+  """
+  STATEMENT_MAX_LENGTH = 1001
+
+  document = models.OneToOneField(Document2, on_delete=models.CASCADE, primary_key=True, related_name='history_summary')
+  owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='history_summaries')
+  name = models.CharField(default='', max_length=255)
+  uuid = models.CharField(max_length=36)
+  doc_type = models.CharField(max_length=32, help_text=_t('Type of the document, e.g. query-hive.'))
+  dialect = models.CharField(default='', max_length=32, blank=True)
+  connector_id = models.IntegerField(null=True, blank=True)
+  statement = models.TextField(default='', blank=True, help_text=_t('Beginning of the statement of the query.'))
+  status = models.CharField(default='', max_length=32, blank=True)
+  last_executed = models.BigIntegerField(default=-1, help_text=_t('Time of the execution in milliseconds since the epoch.'))
+  parent_saved_query_uuid = models.CharField(default='', max_length=36, blank=True)
+
+  class Meta(object):
+    indexes = [
+      models.Index(fields=['owner', 'doc_type', '-last_executed'], name='history_summary_owner_idx'),
+    ]
+
+  def __str__(self):
+    return force_unicode('%s - %s - %s') % (self.name, self.doc_type, self.last_executed)
+
+  @classmethod
+  def update_from_notebook(cls, document, notebook, statement):
+    """Saves the summary of the history `document` of the `notebook` dict, which ran `statement`."""
+    snippet = notebook['snippets'][0] if notebook.get('snippets') else {}
+    statement = (statement or '')[:cls.STATEMENT_MAX_LENGTH]
+    if global_redaction_engine.is_enabled():
+      statement = global_redaction_engine.redact(statement)
+
+    summary, created = cls.objects.update_or_create(
+      document=document,
+      defaults={
+        'owner_id': document.owner_id,
+        'name': document.name[:255],
+        'uuid': document.uuid,
+        'doc_type': document.type,
+        'dialect': (notebook.get('dialect') or snippet.get('dialect') or snippet.get('type') or '')[:32],
+        'connector_id': document.connector_id,
+        'statement': statement,
+        'status': (snippet.get('status') or '')[:32],
+        'last_executed': snippet.get('lastExecuted') or -1,
+        'parent_saved_query_uuid': notebook.get('parentSavedQueryUuid') or '',
+      }
+    )
+    return summary
+
+  def get_absolute_url(self):
+    return Document2(id=self.document_id, uuid=self.uuid, type=self.doc_type).get_absolute_url()
+
+
 def get_cluster_config(user):
   return Cluster(user).get_app_config().get_config()
 
@@ -454,6 +454,14 @@ CACHES[CACHES_HIVE_DISCOVERY_KEY] = {
     'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     'LOCATION': CACHES_HIVE_DISCOVERY_KEY
 }
+CACHES_JOBBROWSER_LOG_SEGMENTS_KEY = 'jobbrowser_log_segments'
+CACHES[CACHES_JOBBROWSER_LOG_SEGMENTS_KEY] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': CACHES_JOBBROWSER_LOG_SEGMENTS_KEY,
+    'OPTIONS': {
+        'MAX_ENTRIES': 64  # Segments of up to 1MB of logs
+    }
+}
 
 CACHES_CELERY_KEY = 'celery'
 CACHES_CELERY_QUERY_RESULT_KEY = 'celery_query_results'
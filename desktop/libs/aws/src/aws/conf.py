@@ -160,6 +160,14 @@ HAS_IAM_DETECTION = Config(
 )
 
 
+COPY_PARALLELISM = Config(
+  help=_('Number of keys copied, or batches of keys deleted, at the same time when copying, moving or deleting an S3 directory.'),
+  key='copy_parallelism',
+  default=8,
+  type=int
+)
+
+
 def get_default_get_environment_credentials():
   '''Allow to check if environment credentials are present or not'''
   return not get_raz_api_url()
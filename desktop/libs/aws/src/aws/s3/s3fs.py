@@ -23,6 +23,7 @@ import posixpath
 import urllib.error
 import urllib.request
 from builtins import object, str
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from urllib.parse import urlparse as lib_urlparse
 
 from boto.exception import BotoClientError, S3ResponseError
@@ -33,12 +34,16 @@ from django.http.multipartparser import MultiPartParser
 from django.utils.translation import gettext as _
 
 from aws import s3
-from aws.conf import AWS_ACCOUNTS, PERMISSION_ACTION_S3, get_default_region, get_locations, is_raz_s3
+from aws.conf import AWS_ACCOUNTS, COPY_PARALLELISM, PERMISSION_ACTION_S3, get_default_region, get_locations, is_raz_s3
 from aws.s3 import S3A_ROOT, normpath, s3file, translate_s3_error
 from aws.s3.s3stat import S3Stat
 from filebrowser.conf import REMOTE_STORAGE_HOME
 
 DEFAULT_READ_SIZE = 1024 * 1024  # 1MB
+MULTIPART_COPY_THRESHOLD = 5 * 1024 * 1024 * 1024  # Largest object copied by a single request
+MULTIPART_COPY_PART_SIZE = 512 * 1024 * 1024
+MULTIPART_MAX_PARTS = 10000
+DELETE_BATCH_SIZE = 1000  # Most keys deleted by a single request
 BUCKET_NAME_PATTERN = re.compile(
   r"^((?:(?:[a-zA-Z0-9]|[a-zA-Z0-9][a-zA-Z0-9_\-]*[a-zA-Z0-9])\.)*(?:[A-Za-z0-9]|[A-Za-z0-9][A-Za-z0-9_\-]*[A-Za-z0-9]))$")
 
@@ -55,6 +60,47 @@ class S3ListAllBucketsException(S3FileSystemException):
     super(S3FileSystemException, self).__init__(*args, **kwargs)
 
 
+def _batches(items, size):
+  items = iter(items)
+  batch = list(itertools.islice(items, size))
+  while batch:
+    yield batch
+    batch = list(itertools.islice(items, size))
+
+
+def _run_in_parallel(function, items, parallelism, progress_callback=None):
+  """
+  Calls function(item) for each item with `parallelism` threads, only reading the next items when a thread is available.
+  Returns the number of items and the (item, exception) of each failed call. ``progress_callback(done)`` is called after each call.
+  """
+  parallelism = max(parallelism, 1)
+  items = iter(items)
+  pending = {}
+  failures = []
+  done = 0
+
+  with ThreadPoolExecutor(max_workers=parallelism) as executor:
+    while True:
+      for item in itertools.islice(items, 2 * parallelism - len(pending)):
+        pending[executor.submit(function, item)] = item
+      if not pending:
+        break
+
+      completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+      for future in completed:
+        item = pending.pop(future)
+        try:
+          future.result()
+        except Exception as e:
+          LOG.warning('Failed S3 operation on %s: %s' % (item, e))
+          failures.append((item, e))
+        done += 1
+        if progress_callback is not None:
+          progress_callback(done)
+
+  return done, failures
+
+
 def auth_error_handler(view_fn):
   def decorator(*args, **kwargs):
     try:
@@ -360,31 +406,48 @@ class S3FileSystem(object):
     if bucket_name and not key_name:
       self._delete_bucket(bucket_name)
     else:
-      if self.isdir(path):
+      is_dir = self.isdir(path)
+      if is_dir:
         path = self._append_separator(path)  # Really need to make sure we end with a '/'
 
       key = self._get_key(path, validate=False)
 
       if key.exists():
-        dir_keys = []
+        dir_keys = iter([])
 
-        if self.isdir(path):
+        if is_dir:
           _, dir_key_name = s3.parse_uri(path)[:2]
-          dir_keys = key.bucket.list(prefix=dir_key_name)
+          dir_keys = iter(key.bucket.list(prefix=dir_key_name))
+        first_key = next(dir_keys, None)
 
-        if not dir_keys:
+        if first_key is None:
           # Avoid Raz bulk delete issue
           deleted_key = key.delete()
           if deleted_key.exists():
             raise S3FileSystemException('Could not delete key %s' % deleted_key)
         else:
-          result = key.bucket.delete_keys(list(dir_keys))
-          if result.errors:
-            msg = "%d errors occurred while attempting to delete the following S3 paths:\n%s" % (
-              len(result.errors), '\n'.join(['%s: %s' % (error.key, error.message) for error in result.errors])
-            )
-            LOG.error(msg)
-            raise S3FileSystemException(msg)
+          self._delete_keys(key.bucket, itertools.chain([first_key], dir_keys))
+
+  def _delete_keys(self, bucket, keys):
+    """
+    Deletes the keys by batches of DELETE_BATCH_SIZE while they are listed, get_copy_parallelism() batches at a time. All the batches
+    are attempted before reporting the keys which could not be deleted.
+    """
+    errors = []
+
+    def delete_batch(batch):
+      errors.extend(bucket.delete_keys(batch, quiet=True).errors)
+
+    batches, failures = _run_in_parallel(delete_batch, _batches(keys, DELETE_BATCH_SIZE), self.get_copy_parallelism())
+    LOG.debug('Deleted %d batches of keys from bucket %s' % (batches, bucket.name))
+
+    errors = ['%s: %s' % (error.key, error.message) for error in errors]
+    for batch, e in failures:
+      errors.extend(['%s: %s' % (getattr(key, 'name', key), e) for key in batch])
+    if errors:
+      msg = "%d errors occurred while attempting to delete the following S3 paths:\n%s" % (len(errors), '\n'.join(errors))
+      LOG.error(msg)
+      raise S3FileSystemException(msg)
 
   @translate_s3_error
   @auth_error_handler
@@ -441,7 +504,7 @@ class S3FileSystem(object):
   @translate_s3_error
   @auth_error_handler
   def copy(self, src, dst, recursive=False, *args, **kwargs):
-    self._copy(src, dst, recursive=recursive, use_src_basename=True)
+    self._copy(src, dst, recursive=recursive, use_src_basename=True, progress_callback=kwargs.get('progress_callback'))
 
   @translate_s3_error
   @auth_error_handler
@@ -453,9 +516,16 @@ class S3FileSystem(object):
   @translate_s3_error
   @auth_error_handler
   def copy_remote_dir(self, src, dst, *args, **kwargs):
-    self._copy(src, dst, recursive=True, use_src_basename=False)
+    self._copy(src, dst, recursive=True, use_src_basename=False, progress_callback=kwargs.get('progress_callback'))
+
+  def get_copy_parallelism(self):
+    return COPY_PARALLELISM.get()
 
-  def _copy(self, src, dst, recursive, use_src_basename):
+  def _copy(self, src, dst, recursive, use_src_basename, progress_callback=None):
+    """
+    Copies the keys server side. The keys of a directory are copied by a pool of get_copy_parallelism() threads and
+    ``progress_callback(copied, total)`` is called each time a key is copied.
+    """
     src_st = self.stats(src)
     if src_st.isDir and not recursive:
       return  # omitting directory
@@ -491,20 +561,56 @@ class S3FileSystem(object):
     # resulting in 'test1/'.
     if src_st.isDir:
       src_key = self._append_separator(src_key)
+      copies = []
       for key in src_bucket.list(prefix=src_key):
         if not key.name.startswith(src_key):
           raise S3FileSystemException(_("Invalid key to transform: %s") % key.name)
         dst_name = posixpath.normpath(s3.join(dst_key, key.name[cut:]))
 
-        if self.isdir(normpath(self.join(S3A_ROOT, key.bucket.name, key.name))):
+        if key.name.endswith('/'):  # Directory marker
           dst_name = self._append_separator(dst_name)
 
-        key.copy(dst_bucket, dst_name)
+        copies.append((key, dst_name))
+
+      def copy_key(copy):
+        self._copy_key(copy[0], dst_bucket, copy[1])
+
+      def on_copied(copied):
+        if progress_callback is not None:
+          progress_callback(copied, len(copies))
+
+      copied, failures = _run_in_parallel(copy_key, copies, self.get_copy_parallelism(), on_copied)
+      if failures:
+        raise S3FileSystemException(
+          _('Failed to copy %d of %d keys, e.g. %s: %s') % (len(failures), len(copies), failures[0][0][0].name, failures[0][1])
+        )
     else:
       key = self._get_key(src)
       dst_name = posixpath.normpath(s3.join(dst_key, src_key[cut:]))
+      self._copy_key(key, dst_bucket, dst_name)
+
+  def _copy_key(self, key, dst_bucket, dst_name):
+    if key.size is not None and key.size > MULTIPART_COPY_THRESHOLD:
+      self._multipart_copy_key(key, dst_bucket, dst_name)
+    else:
       key.copy(dst_bucket, dst_name)
 
+  def _multipart_copy_key(self, key, dst_bucket, dst_name):
+    """Copies an object too large for a single copy request by parts, get_copy_parallelism() parts at a time."""
+    part_size = max(MULTIPART_COPY_PART_SIZE, -(-key.size // MULTIPART_MAX_PARTS))
+    parts = list(enumerate(range(0, key.size, part_size), 1))
+    upload = dst_bucket.initiate_multipart_upload(dst_name)
+
+    def copy_part(part):
+      part_num, start = part
+      upload.copy_part_from_key(key.bucket.name, key.name, part_num, start, min(start + part_size, key.size) - 1)
+
+    copied, failures = _run_in_parallel(copy_part, parts, self.get_copy_parallelism())
+    if failures:
+      upload.cancel_upload()
+      raise S3FileSystemException(_('Failed to copy %d of %d parts of %s: %s') % (len(failures), len(parts), key.name, failures[0][1]))
+    upload.complete_upload()
+
   @translate_s3_error
   @auth_error_handler
   def rename(self, old, new):
@@ -218,6 +218,67 @@ class TestS3FileSystem:
         key.bucket.list.assert_called_with(prefix='data/')
         key.bucket.delete_keys.assert_called()
 
+  def test_rmtree_dir_in_batches(self):
+    with patch('aws.s3.s3fs.S3FileSystem._get_key') as _get_key:
+      with patch('aws.s3.s3fs.S3FileSystem.isdir') as isdir:
+        def delete_keys(batch, quiet):
+          return Mock(errors=[Mock(key=batch[0], message='AccessDenied')] if 'data/1000' in batch else [])
+
+        key = Mock(
+          name='data',
+          exists=Mock(return_value=True),
+          bucket=Mock(list=Mock(return_value=('data/%d' % i for i in range(2500))), delete_keys=Mock(side_effect=delete_keys)),
+        )
+        _get_key.return_value = key
+        isdir.return_value = True
+
+        fs = S3FileSystem(s3_connection=Mock())
+
+        with pytest.raises(S3FileSystemException, match='1 errors occurred.*\ndata/1000: AccessDenied'):
+          fs.rmtree(path='s3a://gethue/data')
+
+        assert [500, 1000, 1000] == sorted(len(call.args[0]) for call in key.bucket.delete_keys.call_args_list)
+
+  def test_copy_remote_dir(self):
+    with patch('aws.s3.s3fs.S3FileSystem.stats') as stats:
+      with patch('aws.s3.s3fs.S3FileSystem._stats') as _stats:
+        with patch('aws.s3.s3fs.S3FileSystem._get_bucket') as _get_bucket:
+          keys = [Mock(size=size, copy=Mock()) for size in (0, 10, 0, 20)]
+          for key, name in zip(keys, ('data/', 'data/a', 'data/sub/', 'data/sub/b')):
+            key.name = name
+          keys[3].copy.side_effect = Exception('SlowDown')
+          src_bucket = Mock(list=Mock(return_value=keys))
+          _get_bucket.side_effect = lambda name: src_bucket
+          stats.return_value = Mock(isDir=True)
+          _stats.return_value = None
+          progress = []
+
+          fs = S3FileSystem(s3_connection=Mock())
+
+          with pytest.raises(S3FileSystemException, match='Failed to copy 1 of 4 keys, e.g. data/sub/b: SlowDown'):
+            fs.copy_remote_dir('s3a://gethue/data', 's3a://gethue/copy', progress_callback=lambda *args: progress.append(args))
+
+          assert ['copy/', 'copy/a', 'copy/sub/', 'copy/sub/b'] == [key.copy.call_args.args[1] for key in keys]
+          assert [(1, 4), (2, 4), (3, 4), (4, 4)] == progress
+
+  def test_multipart_copy(self):
+    key = Mock(size=12 * 1024 * 1024 * 1024 + 1, copy=Mock(), bucket=Mock())
+    key.name = 'data/large'
+    key.bucket.name = 'gethue'
+    dst_bucket = Mock()
+    upload = dst_bucket.initiate_multipart_upload.return_value
+
+    S3FileSystem(s3_connection=Mock())._copy_key(key, dst_bucket, 'copy/large')
+
+    key.copy.assert_not_called()
+    dst_bucket.initiate_multipart_upload.assert_called_with('copy/large')
+    parts = sorted(call.args for call in upload.copy_part_from_key.call_args_list)
+    assert 25 == len(parts)
+    assert ('gethue', 'data/large', 1, 0, 512 * 1024 * 1024 - 1) == parts[0]
+    assert ('gethue', 'data/large', 25, 24 * 512 * 1024 * 1024, key.size - 1) == parts[-1]
+    upload.complete_upload.assert_called()
+    upload.cancel_upload.assert_not_called()
+
 
 class S3FSTest(S3TestBase):
   @classmethod
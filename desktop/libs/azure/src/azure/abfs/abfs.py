@@ -25,6 +25,7 @@ import threading
 import urllib.error
 import urllib.request
 from builtins import object
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from math import ceil
 from posixpath import join
 from urllib.parse import quote as urllib_quote, urlparse as lib_urlparse
@@ -34,7 +35,7 @@ from django.http.multipartparser import MultiPartParser
 import azure.abfs.__init__ as Init_ABFS
 from azure.abfs.abfsfile import ABFSFile
 from azure.abfs.abfsstats import ABFSStat
-from azure.conf import PERMISSION_ACTION_ABFS, is_raz_abfs
+from azure.conf import COPY_PARALLELISM, PERMISSION_ACTION_ABFS, is_raz_abfs
 from desktop.conf import RAZ
 from desktop.lib.rest import http_client, resource
 from desktop.lib.rest.raz_http_client import RazHttpClient
@@ -563,29 +564,83 @@ class ABFS(object):
     """
     if self.isfile(src):
       return self.copyfile(src, dst)
-    self.copy_remote_dir(src, dst)
+    self.copy_remote_dir(src, dst, progress_callback=kwargs.get('progress_callback'))
 
   def copyfile(self, src, dst, *args, **kwargs):
     """
-    Copies a File to another location
+    Copies a File to another location chunk by chunk. The next chunk is read in the background while the current one is
+    being appended, so at most two chunks are held in memory.
     """
     new_path = dst + '/' + Init_ABFS.strip_path(src)
-    self.create(new_path)
-    chunk_size = self.get_upload_chuck_size()
-    file = self.read(src)
-    size = len(file)
-    self._writedata(new_path, file, size)
+    self._copy_file(src, new_path)
 
   def copy_remote_dir(self, src, dst, *args, **kwargs):
     """
-    Copies the entire contents of a directory to another location
+    Copies the entire contents of a directory to another location. The directories are created first, then the files are
+    copied by a pool of get_copy_parallelism() threads. ``progress_callback(copied, total)`` is called each time a file is copied.
+    """
+    progress_callback = kwargs.get('progress_callback')
+    files = list(self._copy_remote_dir_structure(src, dst + '/' + Init_ABFS.strip_path(src)))
+
+    failures = []
+    with ThreadPoolExecutor(max_workers=max(self.get_copy_parallelism(), 1)) as executor:
+      futures = dict((executor.submit(self._copy_file, src_file, dst_file), src_file) for src_file, dst_file in files)
+      for copied, future in enumerate(as_completed(futures), 1):
+        try:
+          future.result()
+        except Exception as e:
+          LOG.exception('Failed to copy %s' % futures[future])
+          failures.append((futures[future], e))
+        if progress_callback is not None:
+          progress_callback(copied, len(files))
+
+    if failures:
+      raise ABFSFileSystemException(
+        'Failed to copy %d of %d files, e.g. %s: %s' % (len(failures), len(files), failures[0][0], failures[0][1])
+      )
+
+  def _copy_remote_dir_structure(self, src, dst):
+    """
+    Creates the directories of the copy and yields the (source, destination) of each file to copy
     """
-    dst = dst + '/' + Init_ABFS.strip_path(src)
     self.mkdir(dst)
-    other_files = self.listdir(src)
-    for x in other_files:
-      x = src + '/' + Init_ABFS.strip_path(x)
-      self.copy(x, dst)
+    for stats in self.listdir_stats(src):
+      src_path = src + '/' + stats.name
+      dst_path = dst + '/' + stats.name
+      if stats.isDir:
+        for src_dir_file in self._copy_remote_dir_structure(src_path, dst_path):
+          yield src_dir_file
+      else:
+        yield src_path, dst_path
+
+  def _copy_file(self, src, dst):
+    """
+    Copies the content of the file src into the new file dst by ranged reads of get_upload_chuck_size() bytes
+    """
+    size = int(self.stats(src).size or 0)
+    chunk_size = self.get_upload_chuck_size()
+    self.create(dst)
+
+    with ThreadPoolExecutor(max_workers=1) as reader:
+      next_data = reader.submit(self.read, src, 0, min(chunk_size, size)) if size else None
+      offset = 0
+      while next_data is not None:
+        data = next_data.result()
+        length = len(data)
+        if not length:
+          raise ABFSFileSystemException('Failed to read %s at offset %d of %d' % (src, offset, size))
+        next_offset = offset + length
+        next_data = reader.submit(self.read, src, next_offset, min(chunk_size, size - next_offset)) if next_offset < size else None
+        self._append(dst, data, size=length, params={'position': offset})
+        offset = next_offset
+
+    self.flush(dst, {'position': offset})
+
+  def get_copy_parallelism(self):
+    """
+    Gets the number of files copied at the same time
+    """
+    return COPY_PARALLELISM.get()
 
   def rename(self, old, new):
     """
@@ -20,13 +20,15 @@ import json
 import time
 import logging
 import tempfile
+from unittest.mock import Mock
 
 import pytest
 from django.contrib.auth.models import User
 from django.test import TestCase
 
 from azure.abfs.__init__ import abfspath, get_abfs_home_directory
-from azure.abfs.abfs import ABFS
+from azure.abfs.abfs import ABFS, ABFSFileSystemException
+from azure.abfs.abfsstats import ABFSStat
 from azure.abfs.upload import DEFAULT_WRITE_SIZE
 from azure.active_directory import ActiveDirectory
 from azure.conf import ABFS_CLUSTERS, AZURE_ACCOUNTS, is_abfs_enabled
@@ -34,6 +36,7 @@ from desktop.conf import RAZ
 from desktop.lib.django_test_util import make_logged_in_client
 from desktop.lib.test_utils import add_permission, add_to_group, grant_access, remove_from_group
 from filebrowser.conf import REMOTE_STORAGE_HOME
+from hadoop.fs.exceptions import WebHdfsException
 
 LOG = logging.getLogger()
 
@@ -143,6 +146,75 @@ def test_get_abfs_home_directory():
       reset()
 
 
+class TestABFSCopy(object):
+
+  def setup_method(self):
+    self.client = ABFS('https://gethue.dfs.core.windows.net', 'abfs://')
+    self.files = {}
+
+    def read(path, offset='0', length=0):
+      return self.files[path][int(offset):int(offset) + int(length)]
+
+    def listdir_stats(path):
+      children = set(name[len(path) + 1:].split('/')[0] for name in self.files if name.startswith(path + '/'))
+      return [self._stats(path + '/' + child) for child in sorted(children)]
+
+    def append(path, data, size=0, params=None):
+      assert len(self.files[path]) == params['position']
+      self.files[path] += data
+
+    self.client.stats = Mock(side_effect=self._stats)
+    self.client.listdir_stats = Mock(side_effect=listdir_stats)
+    self.client.read = Mock(side_effect=read)
+    self.client.create = Mock(side_effect=lambda path: self.files.__setitem__(path, b''))
+    self.client.mkdir = Mock()
+    self.client._append = Mock(side_effect=append)
+    self.client.flush = Mock()
+    self.client.get_upload_chuck_size = Mock(return_value=4)
+
+  def _stats(self, path):
+    is_dir = path not in self.files
+    return ABFSStat(is_dir, None, None, 0 if is_dir else len(self.files[path]), path)
+
+  def test_copyfile_by_chunks(self):
+    self.files['abfs://test/src/data.csv'] = b'0123456789'
+
+    self.client.copyfile('abfs://test/src/data.csv', 'abfs://test/dst')
+
+    assert b'0123456789' == self.files['abfs://test/dst/data.csv']
+    assert 3 == self.client._append.call_count
+    self.client.flush.assert_called_once_with('abfs://test/dst/data.csv', {'position': 10})
+
+  def test_copyfile_empty(self):
+    self.files['abfs://test/src/empty.csv'] = b''
+
+    self.client.copyfile('abfs://test/src/empty.csv', 'abfs://test/dst')
+
+    assert b'' == self.files['abfs://test/dst/empty.csv']
+    self.client.read.assert_not_called()
+    self.client.flush.assert_called_once_with('abfs://test/dst/empty.csv', {'position': 0})
+
+  def test_copy_remote_dir(self):
+    self.files['abfs://test/src/a.csv'] = b'aaaaaa'
+    self.files['abfs://test/src/sub/b.csv'] = b'bb'
+    progress_callback = Mock()
+
+    self.client.copy_remote_dir('abfs://test/src', 'abfs://test/dst', progress_callback=progress_callback)
+
+    assert b'aaaaaa' == self.files['abfs://test/dst/src/a.csv']
+    assert b'bb' == self.files['abfs://test/dst/src/sub/b.csv']
+    assert [(('abfs://test/dst/src',),), (('abfs://test/dst/src/sub',),)] == self.client.mkdir.call_args_list
+    assert [((1, 2),), ((2, 2),)] == progress_callback.call_args_list
+
+  def test_copy_remote_dir_failures(self):
+    self.files['abfs://test/src/a.csv'] = b'aaaaaa'
+    self.files['abfs://test/src/b.csv'] = b'bb'
+    self.client._append.side_effect = WebHdfsException('Server error')
+
+    with pytest.raises(ABFSFileSystemException, match='Failed to copy 2 of 2 files'):
+      self.client.copy_remote_dir('abfs://test/src', 'abfs://test/dst')
+
+
 @pytest.mark.integration
 class ABFSTestBase(TestCase):
   def setup_method(self, method):
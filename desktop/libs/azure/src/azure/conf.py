@@ -182,6 +182,14 @@ ABFS_CLUSTERS = UnspecifiedConfigSection(
 )
 
 
+COPY_PARALLELISM = Config(
+  help=_t('Number of files copied at the same time when copying an ABFS directory.'),
+  key='copy_parallelism',
+  default=8,
+  type=int
+)
+
+
 def is_raz_abfs():
   from desktop.conf import RAZ  # Must be imported dynamically in order to have proper value
   return (RAZ.IS_ENABLED.get() and 'default' in list(ABFS_CLUSTERS.keys()))
@@ -51,6 +51,32 @@ UPLOAD_CHUNK_SIZE = Config(
   type=int,
   default=1024 * 1024 * 128)
 
+COPY_PARALLELISM = Config(
+  key="copy_parallelism",
+  help="Number of files copied at the same time when copying a directory within HDFS.",
+  type=int,
+  default=8)
+
+COPY_CHUNK_SIZE = Config(
+  key="copy_chunk_size",
+  help="Size, in bytes, of the chunks read and written when copying a file within HDFS. Each file copied at the same time buffers "
+       "up to two chunks. Default is 16MB.",
+  type=int,
+  default=1024 * 1024 * 16)
+
+STAT_CACHE_TTL = Config(
+  key="stat_cache_ttl",
+  help="Number of seconds the status of an HDFS path is reused across requests. The status of a path is always looked up "
+       "once per request. 0 disables the cache across requests.",
+  type=int,
+  default=0)
+
+STAT_CACHE_MAX_ENTRIES = Config(
+  key="stat_cache_max_entries",
+  help="Maximum number of HDFS path statuses kept in the cache across requests.",
+  type=int,
+  default=10000)
+
 
 def has_hdfs_enabled():
   if has_connectors():
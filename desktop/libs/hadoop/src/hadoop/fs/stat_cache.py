@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cache of the statuses of the HDFS paths.
+
+The status of a path is looked up once per request and can also be reused across requests for STAT_CACHE_TTL seconds.
+Statuses are cached per user, as users do not see the same paths, and are dropped for all the users as soon as the path, one
+of its parents or one of its children is modified through Hue.
+"""
+
+import copy
+import time
+import threading
+from collections import OrderedDict
+
+from django.core.signals import request_finished, request_started
+
+from hadoop.conf import STAT_CACHE_MAX_ENTRIES, STAT_CACHE_TTL
+
+_request = threading.local()
+
+
+def _start_request(**kwargs):
+  _request.stats = {}
+
+
+def _end_request(**kwargs):
+  _request.stats = None
+
+
+request_started.connect(_start_request, dispatch_uid='hadoop_stat_cache_start_request')
+request_finished.connect(_end_request, dispatch_uid='hadoop_stat_cache_end_request')
+
+
+def _is_related(path, modified_path):
+  """Whether `path` is `modified_path`, one of its parents or one of its children."""
+  return path == modified_path or path.startswith(modified_path.rstrip('/') + '/') or modified_path.startswith(path.rstrip('/') + '/')
+
+
+class StatCache(object):
+  """
+  Keys are (filesystem, user, path) tuples and values are the stats of the paths, or None when a path does not exist.
+
+  Cached stats are copied when they are returned as callers sometimes update them.
+  """
+
+  def __init__(self, ttl, max_entries):
+    self.ttl = ttl
+    self.max_entries = max_entries
+    self._stats = OrderedDict()
+    self._lock = threading.Lock()
+    self._generation = 0  # Incremented by each invalidation, so that stats looked up meanwhile are not cached
+
+  def get(self, key, lookup):
+    """Returns the cached stats of the key, or calls lookup() to get them."""
+    request_stats = getattr(_request, 'stats', None)
+
+    if request_stats is not None and key in request_stats:
+      return copy.copy(request_stats[key])
+
+    generation = self._generation
+    found, stats = self._get_shared(key)
+    if not found:
+      stats = lookup()
+      self._set_shared(key, stats, generation)
+
+    if request_stats is not None:
+      request_stats[key] = stats
+    return copy.copy(stats)
+
+  def invalidate(self, fs, path):
+    """Drops the stats of `path`, its parents and its children in the filesystem `fs`, for all the users."""
+    request_stats = getattr(_request, 'stats', None)
+    if request_stats:
+      for key in [key for key in request_stats if key[0] == fs and _is_related(key[2], path)]:
+        del request_stats[key]
+
+    with self._lock:
+      self._generation += 1
+      if self._stats:
+        for key in [key for key in self._stats if key[0] == fs and _is_related(key[2], path)]:
+          del self._stats[key]
+
+  def clear(self):
+    with self._lock:
+      self._stats.clear()
+
+  def _get_shared(self, key):
+    if self.ttl <= 0:
+      return False, None
+
+    with self._lock:
+      entry = self._stats.get(key)
+      if entry is None:
+        return False, None
+      if time.time() - entry[1] > self.ttl:
+        del self._stats[key]
+        return False, None
+      return True, entry[0]
+
+  def _set_shared(self, key, stats, generation):
+    if self.ttl <= 0:
+      return
+
+    with self._lock:
+      if generation != self._generation:
+        return
+      self._stats[key] = (stats, time.time())
+      self._stats.move_to_end(key)
+      while len(self._stats) > self.max_entries:
+        self._stats.popitem(last=False)
+
+
+STAT_CACHE = None
+
+
+def get_stat_cache():
+  global STAT_CACHE
+  if STAT_CACHE is None:
+    STAT_CACHE = StatCache(ttl=STAT_CACHE_TTL.get(), max_entries=STAT_CACHE_MAX_ENTRIES.get())
+  return STAT_CACHE
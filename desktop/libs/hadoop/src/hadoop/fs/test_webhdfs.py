@@ -23,13 +23,17 @@ import logging
 import threading
 from builtins import map, object, range, zip
 from functools import reduce
+from unittest.mock import Mock, patch
 
 import pytest
 from django.test import TestCase
 
 from hadoop import pseudo_hdfs4
+from hadoop.conf import COPY_CHUNK_SIZE
 from hadoop.fs.exceptions import WebHdfsException
 from hadoop.fs.hadoopfs import Hdfs
+from hadoop.fs.stat_cache import StatCache, _end_request, _start_request
+from hadoop.fs.webhdfs import WebHdfs
 from hadoop.pseudo_hdfs4 import is_live_cluster
 
 LOG = logging.getLogger()
@@ -616,3 +620,193 @@ class WebhdfsTests(TestCase):
     LOG.debug("%s" % resp)
     self.cluster.fs.remove(test_file)
     self.cluster.fs.remove(test_file2)
+
+
+class TestWebHdfsCopy(object):
+
+  def setup_method(self):
+    with patch('hadoop.fs.webhdfs.WebHdfs._make_client'):
+      self.fs = WebHdfs(url='http://namenode:9870/webhdfs/v1', fs_defaultfs='hdfs://namenode:8020')
+
+    self.fs._stats = Mock(return_value=Mock(isDir=False, blockSize=128, replication=3, mode=0o100644))
+    self.fs.isdir = Mock(return_value=False)
+    self.fs.exists = Mock(return_value=True)
+    self.fs.create = Mock()
+    self.fs.append = Mock()
+
+  def test_copyfile_chunks(self):
+    content = b'0123456789abcdefghij'
+    self.fs.read = Mock(side_effect=lambda path, offset, length: content[offset:offset + length])
+
+    with patch('hadoop.fs.webhdfs.WebHdfs.get_upload_chuck_size', return_value=8):
+      self.fs.copyfile('/src/file', '/dst/file')
+
+    assert [0, 8, 16] == [call.args[1] for call in self.fs.read.call_args_list]
+    self.fs.create.assert_called_once()
+    assert b'01234567' == self.fs.create.call_args.kwargs['data']
+    assert [b'89abcdef', b'ghij'] == [call.args[1] for call in self.fs.append.call_args_list]
+
+  def test_copyfile_chunk_size(self):
+    self.fs.read = Mock(return_value=b'')
+
+    reset = COPY_CHUNK_SIZE.set_for_testing(8)
+    try:
+      with patch('hadoop.fs.webhdfs.WebHdfs.get_upload_chuck_size', return_value=128 * 1024 * 1024):
+        self.fs.copyfile('/src/file', '/dst/file')
+        assert 8 == self.fs.read.call_args.args[2]
+
+      with patch('hadoop.fs.webhdfs.WebHdfs.get_upload_chuck_size', return_value=4):  # e.g. the maximum size of an ADLS append
+        self.fs.copyfile('/src/file', '/dst/file')
+        assert 4 == self.fs.read.call_args.args[2]
+    finally:
+      reset()
+
+  def test_copy_remote_dir(self):
+    listing = {
+      '/src': [Mock(path='/src/a', isDir=False), Mock(path='/src/sub', isDir=True)],
+      '/src/sub': [Mock(path='/src/sub/b', isDir=False), Mock(path='/src/sub/c', isDir=False)],
+    }
+    for stats in listing.values():
+      for stat in stats:
+        stat.name = stat.path.rsplit('/', 1)[-1]
+    self.fs.listdir_stats = Mock(side_effect=lambda path: listing[path])
+    self.fs.exists = Mock(return_value=False)
+    self.fs.mkdir = Mock()
+    self.fs.copyfile = Mock()
+    progress = []
+
+    self.fs.copy_remote_dir('/src', '/dst', owner='test', progress_callback=lambda copied, total: progress.append((copied, total)))
+
+    assert ['/dst', '/dst/sub'] == [call.args[0] for call in self.fs.mkdir.call_args_list]
+    assert [('/src/a', '/dst/a'), ('/src/sub/b', '/dst/sub/b'), ('/src/sub/c', '/dst/sub/c')] == sorted(
+      call.args for call in self.fs.copyfile.call_args_list
+    )
+    assert [(1, 3), (2, 3), (3, 3)] == progress
+
+  def test_copy_remote_dir_failures(self):
+    stats = [Mock(path='/src/a', isDir=False), Mock(path='/src/b', isDir=False)]
+    for stat in stats:
+      stat.name = stat.path.rsplit('/', 1)[-1]
+    self.fs.listdir_stats = Mock(return_value=stats)
+    self.fs.copyfile = Mock(side_effect=[IOError('Failed'), None])
+
+    with pytest.raises(IOError):
+      self.fs.copy_remote_dir('/src', '/dst', owner='test')
+
+    assert 2 == self.fs.copyfile.call_count
+
+
+class TestWebHdfsStatCache(object):
+
+  def setup_method(self):
+    with patch('hadoop.fs.webhdfs.WebHdfs._make_client'):
+      self.fs = WebHdfs(url='http://namenode:9870/webhdfs/v1', fs_defaultfs='hdfs://namenode:8020')
+
+    self.fs._root = Mock()
+    self.fs._root.get = Mock(side_effect=self._get_file_status)
+    self.fs.setuser('test')
+
+  def teardown_method(self):
+    _end_request()
+
+  def _get_file_status(self, path, params, headers):
+    if path == '/missing':
+      raise WebHdfsException(Mock(response=Mock(status_code=404, headers={}, text='Not found')))
+    return {
+      'FileStatus': {
+        'pathSuffix': '', 'type': 'DIRECTORY', 'accessTime': 0, 'modificationTime': 0, 'owner': 'test', 'group': 'test',
+        'length': 0, 'blockSize': 0, 'replication': 0, 'permission': '755'
+      }
+    }
+
+  def test_stats_looked_up_once_per_request(self):
+    _start_request()
+
+    assert self.fs.exists('/user/test')
+    assert self.fs.isdir('/user/test')
+    assert self.fs.stats('/user/test').isDir
+    assert not self.fs.exists('/missing')
+    assert not self.fs.exists('/missing')
+    assert 2 == self.fs._root.get.call_count
+
+    self.fs.setuser('other')
+    self.fs.exists('/user/test')
+    assert 3 == self.fs._root.get.call_count
+
+    _end_request()
+    _start_request()
+    self.fs.exists('/user/test')
+    assert 4 == self.fs._root.get.call_count
+
+  def test_stats_not_cached_outside_of_requests(self):
+    self.fs.exists('/user/test')
+    self.fs.exists('/user/test')
+    assert 2 == self.fs._root.get.call_count
+
+  def test_stats_invalidated_by_modifications(self):
+    _start_request()
+    self.fs.stats('/user/test/dir/file')
+    self.fs.stats('/user/test')
+    self.fs.stats('/user/other')
+    assert 3 == self.fs._root.get.call_count
+
+    self.fs.mkdir('/user/test/dir')
+
+    self.fs.stats('/user/test/dir/file')  # Child
+    self.fs.stats('/user/test')  # Parent
+    self.fs.stats('/user/other')
+    assert 5 == self.fs._root.get.call_count
+
+  def test_stats_cached_across_requests(self):
+    stat_cache = StatCache(ttl=60, max_entries=2)
+
+    with patch('hadoop.fs.webhdfs.get_stat_cache', return_value=stat_cache):
+      self.fs.stats('/user/test/a')
+      self.fs.stats('/user/test/a')
+      assert 1 == self.fs._root.get.call_count
+
+      self.fs.stats('/user/test/b')
+      self.fs.stats('/user/test/c')  # Evicts a
+      self.fs.stats('/user/test/a')
+      assert 4 == self.fs._root.get.call_count
+
+      self.fs.setuser('other')
+      self.fs.chmod('/user/test', 0o700, recursive=False)
+      self.fs.setuser('test')
+      self.fs.stats('/user/test/a')
+      assert 5 == self.fs._root.get.call_count
+
+
+class TestWebHdfsListStatusBatch(object):
+
+  def setup_method(self):
+    with patch('hadoop.fs.webhdfs.WebHdfs._make_client'):
+      self.fs = WebHdfs(url='http://httpfs:14000/webhdfs/v1', fs_defaultfs='hdfs://namenode:8020')
+
+    self.fs._root = Mock()
+    self.fs._root.get = Mock(side_effect=WebHdfsException(Mock(response=Mock(
+      status_code=400, headers={}, text='No enum constant org.apache.hadoop.fs.http.client.HttpFSFileSystem.Operation.LISTSTATUS_BATCH'
+    ))))
+    self.fs.listdir_stats = Mock(return_value=[Mock(spec=['name']) for name in ('c', 'a', 'b')])
+    for stat, name in zip(self.fs.listdir_stats.return_value, ('c', 'a', 'b')):
+      stat.name = name
+    self.fs.setuser('test')
+
+  def test_fallback_to_liststatus(self):
+    stats, remaining = self.fs.listdir_stats_batch('/user/test')
+    assert ['a', 'b', 'c'] == [stat.name for stat in stats]
+    assert 0 == remaining
+
+    stats, remaining = self.fs.listdir_stats_batch('/user/test', start_after='a')
+    assert ['b', 'c'] == [stat.name for stat in stats]
+    assert 0 == remaining
+
+    assert 1 == self.fs._root.get.call_count
+
+  def test_other_errors_raised(self):
+    self.fs._root.get.side_effect = WebHdfsException(Mock(response=Mock(status_code=403, headers={}, text='Permission denied')))
+
+    with pytest.raises(WebHdfsException):
+      self.fs.listdir_stats_batch('/user/test')
+
+    assert not self.fs.listdir_stats.called
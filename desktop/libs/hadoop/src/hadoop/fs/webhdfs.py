@@ -28,6 +28,7 @@ import threading
 import urllib.error
 import urllib.request
 from builtins import object, oct
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import unquote as urllib_unquote, urlparse
 
 from django.http.multipartparser import MultiPartParser
@@ -41,6 +42,7 @@ from desktop.lib.rest import http_client, resource
 from hadoop.fs import SEEK_CUR, SEEK_END, SEEK_SET, normpath as fs_normpath
 from hadoop.fs.exceptions import WebHdfsException
 from hadoop.fs.hadoopfs import Hdfs
+from hadoop.fs.stat_cache import get_stat_cache
 from hadoop.fs.webhdfs_types import WebHdfsContentSummary, WebHdfsStat
 from hadoop.hdfs_site import get_nn_sentry_prefixes, get_supergroup, get_umask_mode, get_webhdfs_ssl
 
@@ -83,6 +85,7 @@ class WebHdfs(Hdfs):
     self._netloc = ""
     self._is_remote = False
     self._has_trash_support = True
+    self._has_list_batch_support = True
     self.expiration = None
 
     self._client = self._make_client(url, security_enabled, ssl_cert_ca_verify)
@@ -266,6 +269,39 @@ class WebHdfs(Hdfs):
     filestatus_list = json['FileStatuses']['FileStatus']
     return [WebHdfsStat(st, path) for st in filestatus_list]
 
+  def listdir_stats_batch(self, path, start_after=None):
+    """
+    listdir_stats_batch(path, start_after=None) -> ([ WebHdfsStat ], remaining entries)
+
+    Get the next batch of the directory listing with stats, after the entry named `start_after`.
+    The entries are sorted by name and the size of the batches is set by dfs.ls.limit on the NameNode.
+    Servers without LISTSTATUS_BATCH, e.g. older HttpFS, return the whole rest of the directory in one batch.
+    """
+    if not self._has_list_batch_support:
+      return self._listdir_stats_after(path, start_after), 0
+
+    path = self.strip_normpath(path)
+    params = self._getparams()
+    params['op'] = 'LISTSTATUS_BATCH'
+    if start_after is not None:
+      params['startAfter'] = start_after
+    headers = self._getheaders()
+    try:
+      json = self._root.get(path, params, headers)
+    except WebHdfsException as ex:
+      if ex.server_exc != 'UnsupportedOperationException' and 'LISTSTATUS_BATCH' not in str(ex):
+        raise
+      LOG.info('%s does not support LISTSTATUS_BATCH, listing the directories at once: %s' % (self._url, ex))
+      self._has_list_batch_support = False
+      return self._listdir_stats_after(path, start_after), 0
+    listing = json['DirectoryListing']
+    filestatus_list = listing['partialListing']['FileStatuses']['FileStatus']
+    return [WebHdfsStat(st, path) for st in filestatus_list], listing['remainingEntries']
+
+  def _listdir_stats_after(self, path, start_after):
+    stats = sorted(self.listdir_stats(path), key=lambda stat: stat.name)
+    return [stat for stat in stats if start_after is None or stat.name > start_after]
+
   def listdir(self, path, glob=None):
     """
     listdir(path, glob=None) -> [ entry names ]
@@ -289,6 +325,9 @@ class WebHdfs(Hdfs):
   def _stats(self, path):
     """This version of stats returns None if the entry is not found"""
     path = self.strip_normpath(path)
+    return get_stat_cache().get((self._url, self.user, path), lambda: self._file_status(path))
+
+  def _file_status(self, path):
     params = self._getparams()
     params['op'] = 'GETFILESTATUS'
     headers = self._getheaders()
@@ -309,6 +348,10 @@ class WebHdfs(Hdfs):
       return res
     raise IOError(errno.ENOENT, _("File %s not found") % path)
 
+  def _invalidate_stats(self, path):
+    """Drops the cached stats of a path modified by the current request."""
+    get_stat_cache().invalidate(self._url, path)
+
   def exists(self, path):
     return self._stats(path) is not None
 
@@ -375,6 +418,7 @@ class WebHdfs(Hdfs):
     params['recursive'] = recursive and 'true' or 'false'
     headers = self._getheaders()
     result = self._root.delete(path, params, headers)
+    self._invalidate_stats(path)
     # This part of the API is nonsense.
     # The lack of exception should indicate success.
     if not result['boolean']:
@@ -448,6 +492,7 @@ class WebHdfs(Hdfs):
     params['permission'] = safe_octal(mode)
 
     success = self._root.put(path, params, headers=headers)
+    self._invalidate_stats(path)
     if not success:
       raise IOError(_("Mkdir failed: %s") % path)
 
@@ -463,6 +508,8 @@ class WebHdfs(Hdfs):
     params['destination'] = smart_str(new)
     headers = self._getheaders()
     result = self._root.put(old, params, headers=headers)
+    self._invalidate_stats(old)
+    self._invalidate_stats(new)
     if not result['boolean']:
       raise IOError(_("Rename failed: %s -> %s") % (smart_str(old, errors='replace'), smart_str(new, errors='replace')))
 
@@ -485,6 +532,7 @@ class WebHdfs(Hdfs):
     params['replication'] = repl_factor
     headers = self._getheaders()
     result = self._root.put(filename, params, headers=headers)
+    self._invalidate_stats(self.strip_normpath(filename))
     return result['boolean']
 
   def chown(self, path, user=None, group=None, recursive=False):
@@ -502,6 +550,7 @@ class WebHdfs(Hdfs):
         self._root.put(xpath, params, headers=headers)
     else:
       self._root.put(path, params, headers=headers)
+    self._invalidate_stats(path)
 
   def chmod(self, path, mode, recursive=False):
     """
@@ -519,6 +568,7 @@ class WebHdfs(Hdfs):
         self._root.put(xpath, params, headers=headers)
     else:
       self._root.put(path, params, headers=headers)
+    self._invalidate_stats(path)
 
   def get_home_dir(self):
     """get_home_dir() -> Home directory for the current user"""
@@ -617,6 +667,7 @@ class WebHdfs(Hdfs):
     params['permission'] = safe_octal(permission)
     headers = self._getheaders()
     self._invoke_with_redirect('PUT', path, params, data, headers)
+    self._invalidate_stats(path)
 
   def append(self, path, data):
     """
@@ -629,6 +680,7 @@ class WebHdfs(Hdfs):
     params['op'] = 'APPEND'
     headers = self._getheaders()
     self._invoke_with_redirect('POST', path, params, data, headers)
+    self._invalidate_stats(path)
 
   # e.g. ACLSPEC = user:joe:rwx,user::rw-
   def modify_acl_entries(self, path, aclspec):
@@ -637,7 +689,9 @@ class WebHdfs(Hdfs):
     params['op'] = 'MODIFYACLENTRIES'
     params['aclspec'] = aclspec
     headers = self._getheaders()
-    return self._root.put(path, params, headers=headers)
+    result = self._root.put(path, params, headers=headers)
+    self._invalidate_stats(path)
+    return result
 
   def remove_acl_entries(self, path, aclspec):
     path = self.strip_normpath(path)
@@ -645,21 +699,27 @@ class WebHdfs(Hdfs):
     params['op'] = 'REMOVEACLENTRIES'
     params['aclspec'] = aclspec
     headers = self._getheaders()
-    return self._root.put(path, params, headers=headers)
+    result = self._root.put(path, params, headers=headers)
+    self._invalidate_stats(path)
+    return result
 
   def remove_default_acl(self, path):
     path = self.strip_normpath(path)
     params = self._getparams()
     params['op'] = 'REMOVEDEFAULTACL'
     headers = self._getheaders()
-    return self._root.put(path, params, headers=headers)
+    result = self._root.put(path, params, headers=headers)
+    self._invalidate_stats(path)
+    return result
 
   def remove_acl(self, path):
     path = self.strip_normpath(path)
     params = self._getparams()
     params['op'] = 'REMOVEACL'
     headers = self._getheaders()
-    return self._root.put(path, params, headers=headers)
+    result = self._root.put(path, params, headers=headers)
+    self._invalidate_stats(path)
+    return result
 
   def set_acl(self, path, aclspec):
     path = self.strip_normpath(path)
@@ -667,7 +727,9 @@ class WebHdfs(Hdfs):
     params['op'] = 'SETACL'
     params['aclspec'] = aclspec
     headers = self._getheaders()
-    return self._root.put(path, params, headers=headers)
+    result = self._root.put(path, params, headers=headers)
+    self._invalidate_stats(path)
+    return result
 
   def get_acl_status(self, path):
     path = self.strip_normpath(path)
@@ -694,7 +756,17 @@ class WebHdfs(Hdfs):
   def get_upload_chuck_size(self):
     return hadoop.conf.UPLOAD_CHUNK_SIZE.get()
 
+  def get_copy_parallelism(self):
+    return hadoop.conf.COPY_PARALLELISM.get()
+
+  def get_copy_chunk_size(self):
+    return min(hadoop.conf.COPY_CHUNK_SIZE.get(), self.get_upload_chuck_size())
+
   def copyfile(self, src, dst, skip_header=False):
+    """
+    Copies a file chunk by chunk. The next chunk is read in the background while the current one is being written, so up to two
+    chunks of get_copy_chunk_size() bytes are buffered.
+    """
     sb = self._stats(src)
     if sb is None:
       raise IOError(errno.ENOENT, _("Copy src '%s' does not exist") % src)
@@ -703,42 +775,79 @@ class WebHdfs(Hdfs):
     if self.isdir(dst):
       raise IOError(errno.INVAL, _("Copy dst '%s' is a directory") % dst)
 
+    chunk_size = self.get_copy_chunk_size()
+    user = self.user
+    read_chunk = lambda offset: self.do_as_user(user, self.read, src, offset, chunk_size)
     offset = 0
 
-    while True:
-      data = self.read(src, offset, self.get_upload_chuck_size())
+    with ThreadPoolExecutor(max_workers=1) as reader:
+      next_data = reader.submit(read_chunk, offset)
 
-      if skip_header:
-        data = '\n'.join(data.splitlines())
+      while True:
+        data = next_data.result()
+        cnt = len(data)
 
-      cnt = len(data)
+        if cnt >= chunk_size:
+          next_data = reader.submit(read_chunk, offset + cnt)
 
-      if offset == 0:
         if skip_header:
-          n = data.index('\n')
-          if n > 0:
-            data = data[n + 1:]
-        self.create(dst,
-                    overwrite=True,
-                    blocksize=sb.blockSize,
-                    replication=sb.replication,
-                    permission=oct(stat.S_IMODE(sb.mode)),
-                    data=data)
-      else:
-        self.append(dst, data)
+          data = '\n'.join(data.splitlines())
+
+        if offset == 0:
+          if skip_header:
+            n = data.index('\n')
+            if n > 0:
+              data = data[n + 1:]
+          self.create(dst,
+                      overwrite=True,
+                      blocksize=sb.blockSize,
+                      replication=sb.replication,
+                      permission=oct(stat.S_IMODE(sb.mode)),
+                      data=data)
+        else:
+          self.append(dst, data)
 
-      if cnt < self.get_upload_chuck_size():
-        break
+        if cnt < chunk_size:
+          break
 
-      offset += cnt
+        offset += cnt
 
-  def copy_remote_dir(self, source, destination, dir_mode=None, owner=None):
+  def copy_remote_dir(self, source, destination, dir_mode=None, owner=None, progress_callback=None):
+    """
+    Copies the content of a directory. The directories are created first, then the files are copied by a pool of
+    get_copy_parallelism() threads. ``progress_callback(copied, total)`` is called each time a file is copied.
+    """
     if owner is None:
       owner = self.DEFAULT_USER
 
     if dir_mode is None:
       dir_mode = self.getDefaultDirPerms()
 
+    files = list(self._copy_remote_dir_structure(source, destination, dir_mode, owner))
+
+    failures = []
+    with ThreadPoolExecutor(max_workers=max(self.get_copy_parallelism(), 1)) as executor:
+      futures = dict(
+          (executor.submit(self.do_as_user, owner, self.copyfile, source_file, destination_file), source_file)
+          for source_file, destination_file in files
+      )
+      for copied, future in enumerate(as_completed(futures), 1):
+        try:
+          future.result()
+        except Exception as e:
+          LOG.exception('Failed to copy %s' % futures[future])
+          failures.append((futures[future], e))
+        if progress_callback is not None:
+          progress_callback(copied, len(files))
+
+    if failures:
+      raise IOError(
+          errno.EIO,
+          _('Failed to copy %d of %d files, e.g. %s: %s') % (len(failures), len(files), failures[0][0], failures[0][1])
+      )
+
+  def _copy_remote_dir_structure(self, source, destination, dir_mode, owner):
+    """Creates the directories of the copy and yields the (source, destination) of each file to copy."""
     if not self.exists(destination):
       self.do_as_user(owner, self.mkdir, destination, mode=dir_mode)
 
@@ -746,11 +855,12 @@ class WebHdfs(Hdfs):
       source_file = stat.path
       destination_file = posixpath.join(destination, stat.name)
       if stat.isDir:
-        self.copy_remote_dir(source_file, destination_file, dir_mode, owner)
+        for source_dir_file in self._copy_remote_dir_structure(source_file, destination_file, dir_mode, owner):
+          yield source_dir_file
       else:
-        self.do_as_user(owner, self.copyfile, source_file, destination_file)
+        yield source_file, destination_file
 
-  def copy(self, src, dest, recursive=False, dir_mode=None, owner=None):
+  def copy(self, src, dest, recursive=False, dir_mode=None, owner=None, progress_callback=None):
     """
     Copy file, or directory, in HDFS to another location in HDFS.
 
@@ -763,6 +873,7 @@ class WebHdfs(Hdfs):
                  This is required for directories.
     ``dir_mode`` and ``owner`` are used to define permissions on the newly
     copied files and directories.
+    ``progress_callback`` -- Called with the number of copied files and the total number of files.
 
     This method will overwrite any pre-existing files that collide with what is being copied.
     Copying a directory to a file is not allowed.
@@ -802,7 +913,7 @@ class WebHdfs(Hdfs):
       self.do_as_user(owner, self.mkdir, dest, mode=dir_mode)
 
       # Copy files in 'src' directory to 'dest'.
-      self.copy_remote_dir(src, dest, dir_mode, owner)
+      self.copy_remote_dir(src, dest, dir_mode, owner, progress_callback=progress_callback)
     else:
       # 'src' is a file.
       # If 'dest' is a directory, then copy 'src' into that directory.
@@ -811,6 +922,8 @@ class WebHdfs(Hdfs):
         self.copyfile(src, self.join(dest, self.basename(src)))
       else:
         self.copyfile(src, dest)
+      if progress_callback is not None:
+        progress_callback(1, 1)
 
   @staticmethod
   def urlsplit(url):
@@ -15,6 +15,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import re
 import csv
 import json
@@ -41,7 +42,7 @@ from desktop.models import Document2
 from filebrowser.forms import UploadLocalFileForm
 from indexer.controller import CollectionManagerController
 from indexer.fields import Field, guess_field_type_from_samples
-from indexer.file_format import HiveFormat
+from indexer.file_format import HiveFormat, read_sample_rows
 from indexer.indexers.base import get_api
 from indexer.indexers.envelope import _envelope_job
 from indexer.indexers.flink_sql import FlinkIndexer
@@ -248,21 +249,17 @@ def guess_field_types(request):
   if file_format['inputFormat'] == 'localfile':
     path = urllib_unquote(file_format['path'])
 
-    with open(path, 'r') as local_file:
-
-      reader = csv.reader(local_file)
-      csv_data = list(reader)
+    with open(path, 'rb') as local_file:
+      header, sample, type_sample = read_sample_rows(local_file, os.path.getsize(path), file_format['format']['hasHeader'])
 
       if file_format['format']['hasHeader']:
-        sample = csv_data[1:5]
-        column_row = [re.sub('[^0-9a-zA-Z]+', '_', col) for col in csv_data[0]]
+        column_row = [re.sub('[^0-9a-zA-Z]+', '_', col) for col in header]
       else:
-        sample = csv_data[:4]
         column_row = ['field_' + str(count + 1) for count, col in enumerate(sample[0])]
 
       field_type_guesses = []
       for count, col in enumerate(column_row):
-        column_samples = [sample_row[count] for sample_row in sample if len(sample_row) > count]
+        column_samples = [sample_row[count] for sample_row in type_sample if len(sample_row) > count]
         field_type_guess = guess_field_type_from_samples(column_samples)
         field_type_guesses.append(field_type_guess)
 
@@ -742,6 +739,17 @@ def excel_to_csv_file_name_change(path):
   return path
 
 
+def xlsx_to_csv(xlsx_file, csv_file):
+  """Writes the rows of the first sheet of the xlsx file to the CSV file, one row at a time."""
+  workbook = openpyxl.load_workbook(xlsx_file, read_only=True, data_only=True)
+  try:
+    writer = csv.writer(csv_file, lineterminator='\n')
+    for row in workbook.worksheets[0].iter_rows(values_only=True):
+      writer.writerow(['' if value is None else value for value in row])
+  finally:
+    workbook.close()
+
+
 def upload_local_file_drag_and_drop(request):
   response = {'status': -1, 'data': ''}
   form = UploadLocalFileForm(request.POST, request.FILES)
@@ -765,13 +773,11 @@ def upload_local_file(request):
   file_type = 'csv'
 
   if file_format in ("xlsx", "xls"):
+    temp_file = tempfile.NamedTemporaryFile(mode='w', prefix=filename, suffix='.csv', delete=False, newline='')
     if file_format == "xlsx":
-      read_file = pd.read_excel(upload_file)
+      xlsx_to_csv(upload_file, temp_file)
     else:
-      read_file = pd.read_excel(upload_file, engine='xlrd')
-
-    temp_file = tempfile.NamedTemporaryFile(mode='w', prefix=filename, suffix='.csv', delete=False)
-    read_file.to_csv(temp_file, index=False)
+      pd.read_excel(upload_file, engine='xlrd').to_csv(temp_file, index=False)
     file_type = 'excel'
 
   else:
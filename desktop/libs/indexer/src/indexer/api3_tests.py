@@ -15,6 +15,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
+import csv
 import sys
 import json
 from unittest.mock import Mock, patch
@@ -25,6 +27,7 @@ from django.utils.datastructures import MultiValueDict
 
 from desktop.settings import BASE_DIR
 from indexer.api3 import guess_field_types, guess_format, upload_local_file
+from indexer.file_format import read_sample_rows
 
 
 def test_xlsx_local_file_upload():
@@ -118,3 +121,38 @@ def test_guess_format_excel_remote_file():
       response = json.loads(response.content)
 
       assert response['type'] == "excel"
+
+
+def test_guess_field_types_from_stratified_sample(tmp_path):
+  path = tmp_path / 'measures.csv'
+  with open(path, 'w') as measures:
+    measures.write('id,measure,label\n')
+    for i in range(100000):
+      measures.write('%d,%s,"label %d"\n' % (i, i if i < 50000 else i + 0.5, i))
+
+  file_format = {
+    'inputFormat': 'localfile',
+    'path': str(path),
+    'format': {
+      'hasHeader': True
+    }
+  }
+  request = Mock(POST={'fileFormat': json.dumps(file_format)})
+
+  with patch('indexer.file_format.csv.reader', wraps=csv.reader) as reader:
+    response = json.loads(guess_field_types(request).content)
+
+  assert ['long', 'double', 'string'] == [col['type'] for col in response['columns']]
+  assert [['0', '0', 'label 0'], ['1', '1', 'label 1'], ['2', '2', 'label 2'], ['3', '3', 'label 3']] == response['sample']
+  assert 10 == reader.call_count  # Only the beginning and the 9 other strata of the file were read
+
+
+def test_read_sample_rows_skips_misaligned_rows():
+  data = b'name,comment\n' + b''.join(b'user %d,"multi\nline"\n' % i for i in range(20000))
+
+  header, rows, type_rows = read_sample_rows(io.BytesIO(data), len(data), has_header=True, num_rows=2)
+
+  assert ['name', 'comment'] == header
+  assert [['user 0', 'multi\nline'], ['user 1', 'multi\nline']] == rows
+  assert all(row[0].startswith('user ') for row in type_rows)
+  assert 10 <= len(type_rows) <= 100
@@ -144,6 +144,21 @@ ENABLE_DIRECT_UPLOAD = Config(
   default=False
 )
 
+LOCAL_FILE_INSERT_BATCH_SIZE = Config(
+  key="local_file_insert_batch_size",
+  help=_t("Maximum size in bytes of each INSERT statement loading the rows of a directly uploaded file."),
+  type=int,
+  default=1024 * 1024
+)
+
+LOCAL_FILE_STAGING_THRESHOLD = Config(
+  key="local_file_staging_threshold",
+  help=_t("Directly uploaded files larger than this size in bytes are copied to the filesystem then loaded with LOAD DATA in Hive and "
+          "Impala, instead of with INSERT statements. -1 to always use INSERT statements."),
+  type=int,
+  default=10 * 1024 * 1024
+)
+
 # Unused
 BATCH_INDEXER_PATH = Config(
   key="batch_indexer_path",
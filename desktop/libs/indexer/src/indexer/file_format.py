@@ -14,6 +14,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.import logging
 
+import io
 import csv
 import gzip
 import logging
@@ -37,6 +38,46 @@ LOG = logging.getLogger()
 IMPORT_PEEK_SIZE = 1024 * 1024
 IMPORT_PEEK_NLINES = 20
 
+# Rows the field types are guessed from, read from the beginning of SAMPLE_STRATA evenly spaced parts of the files
+TYPE_SAMPLE_ROWS = 100
+SAMPLE_STRATA = 10
+SAMPLE_STRATUM_READ_SIZE = 64 * 1024
+
+
+def read_sample_rows(file_obj, size, has_header, num_rows=4, num_type_rows=TYPE_SAMPLE_ROWS, strata=SAMPLE_STRATA):
+  """
+  Returns the header, the first `num_rows` rows and a sample of about `num_type_rows` rows of a CSV file opened in binary mode.
+
+  Only the first rows and SAMPLE_STRATUM_READ_SIZE bytes at the beginning of each of the other strata of the file are read. The
+  rows of a stratum not having as many columns as the first rows, e.g. because the stratum starts inside a quoted value, are skipped.
+  """
+  rows_per_stratum = max(1, num_type_rows // strata)
+
+  file_obj.seek(0)
+  text = io.TextIOWrapper(file_obj, encoding='utf-8', errors='replace', newline='')
+  try:
+    head_rows = [row for row in itertools.islice(csv.reader(text), max(num_rows, num_type_rows) + 1) if row]
+    head_end = file_obj.tell()  # Approximate, as the wrapper reads ahead
+  finally:
+    text.detach()
+
+  header = head_rows.pop(0) if has_header and head_rows else None
+  num_columns = len(header) if header else len(head_rows[0]) if head_rows else 0
+
+  stratum_rows = []
+  for stratum in range(1, strata):
+    offset = size * stratum // strata
+    if offset < head_end:
+      continue
+
+    file_obj.seek(offset)
+    lines = file_obj.read(SAMPLE_STRATUM_READ_SIZE).decode('utf-8', errors='replace').splitlines()[1:-1]  # Partial first and last lines
+    stratum_rows.extend([row for row in csv.reader(lines) if len(row) == num_columns][:rows_per_stratum])
+
+  type_rows = head_rows[:max(rows_per_stratum, num_type_rows - len(stratum_rows))] + stratum_rows
+
+  return header, head_rows[:num_rows], type_rows
+
 
 def get_format_types():
   formats = [
@@ -575,18 +616,16 @@ class CSVFormat(FileFormat):
 
     return header
 
-  def _get_sample_rows(self, sample):
-    NUM_SAMPLES = 5
-
+  def _get_sample_rows(self, sample, num_samples=5):
     header_offset = 1 if self._has_header else 0
-    reader = itertools.islice(self._get_sample_reader(sample), header_offset, NUM_SAMPLES + 1)
+    reader = itertools.islice(self._get_sample_reader(sample), header_offset, num_samples + 1)
 
     sample_rows = list(reader)
     return sample_rows
 
   def _guess_fields(self, sample):
     header = self._guess_field_names(sample)
-    types = self._guess_field_types(self._sample_rows)
+    types = self._guess_field_types(self._get_sample_rows(sample, TYPE_SAMPLE_ROWS))
 
     if len(header) == len(types):
       # create the fields
@@ -14,9 +14,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.import logging
 
+import os
 import csv
 import uuid
 import logging
+import tempfile
 import urllib.error
 import urllib.request
 from builtins import object
@@ -31,6 +33,7 @@ from desktop.lib import django_mako
 from desktop.lib.exceptions_renderable import PopupException
 from desktop.settings import BASE_DIR
 from hadoop.fs.hadoopfs import Hdfs
+from indexer.conf import LOCAL_FILE_INSERT_BATCH_SIZE, LOCAL_FILE_STAGING_THRESHOLD
 from notebook.connectors.base import get_interpreter
 from notebook.models import make_notebook
 from useradmin.models import User
@@ -50,6 +53,15 @@ except ImportError as e:
   impala_conf = None
 
 
+LOCAL_FILE_PROGRESS_ROWS = 100000
+
+# Of the temporary tables the staged local files are loaded into
+STAGING_ROW_FORMAT = '''
+ROW FORMAT DELIMITED FIELDS TERMINATED BY '\\001' ESCAPED BY '\\\\'
+STORED AS TEXTFILE
+TBLPROPERTIES('transactional'='false')'''
+
+
 class SQLIndexer(object):
 
   def __init__(self, user, fs):
@@ -330,6 +342,15 @@ class SQLIndexer(object):
 
     dialect = get_interpreter(source_type, self.user)['dialect']
 
+    path = urllib_unquote(source['path'])
+    has_header = bool(path) and source['format']['hasHeader']
+
+    staged_path = None
+    if path and dialect in ('hive', 'impala') and self._should_stage_local_file(path):
+      staged_path = self._stage_local_file(path, has_header, cols_to_remove, columns, dialect)
+
+    statements = []
+
     if dialect in ('hive', 'mysql'):
 
       if dialect == 'mysql':
@@ -337,66 +358,60 @@ class SQLIndexer(object):
           if col['type'] == 'string':
             col['type'] = 'VARCHAR(255)'
 
-      sql = '''CREATE TABLE IF NOT EXISTS %(database)s.%(table_name)s (
+      statements.append('''CREATE TABLE IF NOT EXISTS %(database)s.%(table_name)s (
 %(columns)s);\n''' % {
         'database': database,
         'table_name': table_name,
         'columns': ',\n'.join(['  `%(name)s` %(type)s' % col for col in columns]),
-      }
+      })
 
-    elif dialect == 'impala':
-      sql = '''CREATE TABLE IF NOT EXISTS %(database)s.%(table_name)s_tmp (
-%(columns)s);\n''' % {
+    if dialect == 'impala' or staged_path:
+      statements.append('''%(separator)sCREATE TABLE IF NOT EXISTS %(database)s.%(table_name)s_tmp (
+%(columns)s)%(row_format)s;\n''' % {
+          'separator': '\n' if statements else '',
           'database': database,
           'table_name': table_name,
           'columns': ',\n'.join(['  `%(name)s` string' % col for col in columns]),
-      }                                                 # Impala does not implicitly cast between string and numeric or Boolean types.
+          'row_format': STAGING_ROW_FORMAT if staged_path else '',
+      })                                                # Impala does not implicitly cast between string and numeric or Boolean types.
 
-    path = urllib_unquote(source['path'])
-
-    if path:                                                  # data insertion
-      with open(path, 'r') as local_file:
-        reader = csv.reader(local_file)
-        _csv_rows = []
-
-        for count, row in enumerate(reader):
-          if (source['format']['hasHeader'] and count == 0) or not row:
-            continue
-          for col_index in cols_to_remove:
-            del row[col_index]
-          if dialect == 'impala':                         # for the boolean col updating csv_val to (1,0)
-            row = self.nomalize_booleans(row, columns)
-          _csv_rows.append(tuple(row))
-
-        if _csv_rows:  # sql for data insertion
-          csv_rows = str(_csv_rows)[1:-1]
-
-          if dialect in ('hive', 'mysql'):
-            sql += '''\nINSERT INTO %(database)s.%(table_name)s VALUES %(csv_rows)s;\n''' % {
-              'database': database,
-              'table_name': table_name,
-              'csv_rows': csv_rows
-            }
-          elif dialect == 'impala':
-            sql += '''\nINSERT INTO %(database)s.%(table_name)s_tmp VALUES %(csv_rows)s;\n''' % {
-              'database': database,
-              'table_name': table_name,
-              'csv_rows': csv_rows,
-            }
-
-        if dialect == 'impala':
-          # casting from string to boolean is not allowed in impala so string -> int -> bool
-          sql_ = ',\n'.join([
-            '  CAST ( `%(name)s` AS %(type)s ) `%(name)s`' % col if col['type'] != 'boolean'
-            else '  CAST ( CAST ( `%(name)s` AS TINYINT ) AS boolean ) `%(name)s`' % col for col in columns
-          ])
-
-          sql += '''\nCREATE TABLE IF NOT EXISTS %(database)s.%(table_name)s
+    if staged_path:                                           # data loading
+      statements.append('''\nLOAD DATA INPATH '%(path)s' INTO TABLE %(database)s.%(table_name)s_tmp;\n''' % {
+        'path': staged_path,
+        'database': database,
+        'table_name': table_name,
+      })
+      if dialect == 'hive':
+        statements.append('''\nINSERT INTO %(database)s.%(table_name)s SELECT * FROM %(database)s.%(table_name)s_tmp;\n
+DROP TABLE IF EXISTS %(database)s.%(table_name)s_tmp;''' % {
+          'database': database,
+          'table_name': table_name,
+        })
+    elif path:                                                # data insertion
+      rows = self._read_local_file(path, has_header, cols_to_remove, columns, dialect)
+      for csv_rows in self._batch_insert_values(rows):
+        statements.append('''\nINSERT INTO %(database)s.%(table_name)s%(suffix)s VALUES %(csv_rows)s;\n''' % {
+          'database': database,
+          'table_name': table_name,
+          'suffix': '_tmp' if dialect == 'impala' else '',
+          'csv_rows': csv_rows
+        })
+
+    if path and dialect == 'impala':
+      # casting from string to boolean is not allowed in impala so string -> int -> bool
+      sql_ = ',\n'.join([
+        '  CAST ( `%(name)s` AS %(type)s ) `%(name)s`' % col if col['type'] != 'boolean'
+        else '  CAST ( CAST ( `%(name)s` AS TINYINT ) AS boolean ) `%(name)s`' % col for col in columns
+      ])
+
+      statements.append('''\nCREATE TABLE IF NOT EXISTS %(database)s.%(table_name)s
 AS SELECT\n%(sql_)s\nFROM  %(database)s.%(table_name)s_tmp;\n\nDROP TABLE IF EXISTS %(database)s.%(table_name)s_tmp;''' % {
-              'database': database,
-              'table_name': table_name,
-              'sql_': sql_
-            }
+          'database': database,
+          'table_name': table_name,
+          'sql_': sql_
+        })
+
+    sql = ''.join(statements)
 
     on_success_url = reverse('metastore:describe_table', kwargs={'database': database, 'table': final_table_name}) + \
         '?source_type=' + source_type
@@ -412,6 +427,84 @@ AS SELECT\n%(sql_)s\nFROM  %(database)s.%(table_name)s_tmp;\n\nDROP TABLE IF EXI
         is_task=True
     )
 
+  def _read_local_file(self, path, has_header, cols_to_remove, columns, dialect):
+    """Yields the rows of the local CSV file, without the removed columns."""
+    with open(path, 'r', newline='') as local_file:
+      reader = csv.reader(local_file)
+
+      for count, row in enumerate(reader):
+        if (has_header and count == 0) or not row:
+          continue
+        for col_index in cols_to_remove:
+          del row[col_index]
+        if dialect == 'impala':                         # for the boolean col updating csv_val to (1,0)
+          row = self.nomalize_booleans(row, columns)
+        if count % LOCAL_FILE_PROGRESS_ROWS == 0:
+          LOG.info('Read %d rows of the uploaded file %s' % (count, path))
+        yield row
+
+  def _batch_insert_values(self, rows):
+    """Yields the VALUES of the INSERT statements of the rows, each of at most LOCAL_FILE_INSERT_BATCH_SIZE bytes or of one row."""
+    max_size = LOCAL_FILE_INSERT_BATCH_SIZE.get()
+    batch = []
+    batch_size = 0
+
+    for row in rows:
+      values = '(%s)' % ', '.join(_quote_value(value) for value in row)
+      size = len(values.encode('utf-8')) + 2
+      if batch and batch_size + size > max_size:
+        yield ', '.join(batch)
+        batch = []
+        batch_size = 0
+      batch.append(values)
+      batch_size += size
+
+    if batch:
+      yield ', '.join(batch)
+
+  def _should_stage_local_file(self, path):
+    threshold = LOCAL_FILE_STAGING_THRESHOLD.get()
+    return self.fs is not None and threshold >= 0 and os.path.getsize(path) > threshold
+
+  def _stage_local_file(self, path, has_header, cols_to_remove, columns, dialect):
+    """
+    Copies the rows of the local file to a scratch directory of the filesystem, in the format of STAGING_ROW_FORMAT.
+
+    Returns the path of the copy, or None when the rows need to be inserted instead, e.g. when a value contains a line break.
+    """
+    user_scratch_dir = None
+    try:
+      with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', prefix='hue_upload_', suffix='.txt') as staging_file:
+        for row in self._read_local_file(path, has_header, cols_to_remove, columns, dialect):
+          if any('\n' in value or '\r' in value for value in row):
+            LOG.info('Inserting the rows of the uploaded file %s as some of its values contain line breaks' % path)
+            return None
+          staging_file.write('\x01'.join(value.replace('\\', '\\\\').replace('\x01', '\\\x01') for value in row) + '\n')
+        staging_file.flush()
+
+        user_scratch_dir = self.fs.get_home_dir() + '/.scratchdir/%s' % str(uuid.uuid4())  # Make sure it's unique.
+        staged_path = user_scratch_dir + '/data.txt'  # The uploaded files are named with characters like ':' that HDFS rejects
+        self.fs.do_as_user(self.user, self.fs.mkdir, user_scratch_dir, 0o0777)
+        self.fs.do_as_user(self.user, self.fs.copyFromLocal, staging_file.name, staged_path)
+        if dialect == 'impala' and impala_conf and impala_conf.USER_SCRATCH_DIR_PERMISSION.get():
+          self.fs.do_as_user(self.user, self.fs.chmod, user_scratch_dir, 0o0777, True)
+    except Exception:
+      LOG.exception('Failed to stage the uploaded file %s, inserting its rows instead' % path)
+      if user_scratch_dir:
+        try:
+          self.fs.do_as_user(self.user, self.fs.rmtree, user_scratch_dir, True)
+        except Exception:
+          LOG.exception('Failed to remove the scratch directory %s' % user_scratch_dir)
+      return None
+
+    LOG.info('Staged the uploaded file %s to %s' % (path, staged_path))
+    return staged_path
+
+
+def _quote_value(value):
+  """Quotes the value as a string literal of Hive, Impala and MySQL."""
+  return "'%s'" % value.replace('\\', '\\\\').replace("'", "\\'").replace('\n', '\\n').replace('\r', '\\r')
+
 
 def _create_database(request, source, destination, start_time):
   database = destination['name']
@@ -26,6 +26,7 @@ from azure.conf import ABFS_CLUSTERS
 from beeswax.server import dbms
 from desktop.lib.django_test_util import make_logged_in_client
 from desktop.settings import BASE_DIR
+from indexer.conf import LOCAL_FILE_INSERT_BATCH_SIZE, LOCAL_FILE_STAGING_THRESHOLD
 from indexer.indexers.sql import SQLIndexer
 from useradmin.models import User
 
@@ -2351,6 +2352,123 @@ CREATE TABLE IF NOT EXISTS default.test1 (
     assert statement == sql
 
 
+def test_create_table_from_local_in_batches(tmp_path):
+  path = tmp_path / 'customers.csv'
+  path.write_text('id,name\n1,O\'Brien\n2,"C:\\Users"\n3,"Multi\nline"\n')
+
+  with patch('indexer.indexers.sql.get_interpreter') as get_interpreter:
+    get_interpreter.return_value = {'Name': 'MySQL', 'dialect': 'mysql'}
+    source = {'path': str(path), 'sourceType': 'mysql', 'format': {'hasHeader': True}}
+    destination = {
+      'name': 'default.customers',
+      'columns': [
+        {'name': 'id', 'type': 'bigint', 'keep': True},
+        {'name': 'name', 'type': 'string', 'keep': True},
+      ],
+      'sourceType': 'mysql',
+    }
+    reset = LOCAL_FILE_INSERT_BATCH_SIZE.set_for_testing(40)
+    try:
+      sql = SQLIndexer(user=Mock(), fs=Mock()).create_table_from_local_file(source, destination).get_str()
+    finally:
+      reset()
+
+    statement = '''USE default;
+
+CREATE TABLE IF NOT EXISTS default.customers (
+  `id` bigint,
+  `name` VARCHAR(255));
+
+INSERT INTO default.customers VALUES ('1', 'O\\'Brien'), ('2', 'C:\\\\Users');
+
+INSERT INTO default.customers VALUES ('3', 'Multi\\nline');'''
+
+    assert statement == sql
+
+
+def test_create_table_from_local_staged():
+  staged = {}
+
+  def copy_from_local(local_src, remote_dst):
+    with open(local_src) as local_file:
+      staged[remote_dst] = local_file.read()
+
+  fs = Mock(get_home_dir=Mock(return_value='/user/test'), copyFromLocal=Mock(side_effect=copy_from_local))
+  fs.do_as_user = lambda user, fn, *args: fn(*args)
+
+  with patch('indexer.indexers.sql.get_interpreter') as get_interpreter:
+    with patch('indexer.indexers.sql.uuid.uuid4', mock_uuid):
+      get_interpreter.return_value = {'Name': 'Hive', 'dialect': 'hive'}
+      source = {'path': BASE_DIR + '/apps/beeswax/data/tables/us_population.csv', 'sourceType': 'hive', 'format': {'hasHeader': False}}
+      destination = {
+        'name': 'default.test1',
+        'columns': [
+          {'name': 'field_1', 'type': 'string', 'keep': True},
+          {'name': 'field_2', 'type': 'string', 'keep': False},
+          {'name': 'field_3', 'type': 'bigint', 'keep': True},
+        ],
+        'sourceType': 'hive',
+      }
+      reset = LOCAL_FILE_STAGING_THRESHOLD.set_for_testing(0)
+      try:
+        sql = SQLIndexer(user=Mock(), fs=fs).create_table_from_local_file(source, destination).get_str()
+      finally:
+        reset()
+
+  staged_path = '/user/test/.scratchdir/52f840a8-3dde-434d-934a-2d6e06f3687e/data.txt'
+  assert ['NY\x018143197', 'CA\x013844829'] == staged[staged_path].splitlines()[:2]
+  assert 10 == len(staged[staged_path].splitlines())
+
+  statement = '''USE default;
+
+CREATE TABLE IF NOT EXISTS default.test1 (
+  `field_1` string,
+  `field_3` bigint);
+
+CREATE TABLE IF NOT EXISTS default.test1_tmp (
+  `field_1` string,
+  `field_3` string)
+ROW FORMAT DELIMITED FIELDS TERMINATED BY '\\001' ESCAPED BY '\\\\'
+STORED AS TEXTFILE
+TBLPROPERTIES('transactional'='false');
+
+LOAD DATA INPATH '%s' INTO TABLE default.test1_tmp;
+
+INSERT INTO default.test1 SELECT * FROM default.test1_tmp;
+
+DROP TABLE IF EXISTS default.test1_tmp;''' % staged_path
+
+  assert statement == sql
+
+
+def test_create_table_from_local_staging_failed():
+  fs = Mock(get_home_dir=Mock(return_value='/user/test'), copyFromLocal=Mock(side_effect=IOError('Permission denied')))
+  fs.do_as_user = lambda user, fn, *args: fn(*args)
+
+  with patch('indexer.indexers.sql.get_interpreter') as get_interpreter:
+    with patch('indexer.indexers.sql.uuid.uuid4', mock_uuid):
+      get_interpreter.return_value = {'Name': 'Hive', 'dialect': 'hive'}
+      source = {'path': BASE_DIR + '/apps/beeswax/data/tables/us_population.csv', 'sourceType': 'hive', 'format': {'hasHeader': False}}
+      destination = {
+        'name': 'default.test1',
+        'columns': [
+          {'name': 'field_1', 'type': 'string', 'keep': True},
+          {'name': 'field_2', 'type': 'string', 'keep': False},
+          {'name': 'field_3', 'type': 'bigint', 'keep': True},
+        ],
+        'sourceType': 'hive',
+      }
+      reset = LOCAL_FILE_STAGING_THRESHOLD.set_for_testing(0)
+      try:
+        sql = SQLIndexer(user=Mock(), fs=fs).create_table_from_local_file(source, destination).get_str()
+      finally:
+        reset()
+
+  fs.rmtree.assert_called_once_with('/user/test/.scratchdir/52f840a8-3dde-434d-934a-2d6e06f3687e', True)
+  assert 'LOAD DATA' not in sql
+  assert "INSERT INTO default.test1 VALUES ('NY', '8143197')" in sql
+
+
 @pytest.mark.django_db
 def test_create_table_with_manual_steps():
   with patch('indexer.indexers.sql.get_interpreter') as get_interpreter:
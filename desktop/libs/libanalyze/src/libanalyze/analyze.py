@@ -52,10 +52,26 @@ class Node(object):
     self.node_is_fragment_instance = None
     self.node_is_regular = None
     self.node_is_plan_node = None
+    self.node_is_averaged = None
+    self.node_order = None
+    self.index = None
 
   def add_child(self, c):
     self.children.append(c)
 
+  def walk(self):
+    """Yields the node and all its descendants in pre-order."""
+    stack = [self]
+    while stack:
+      node = stack.pop()
+      yield node
+      stack.extend(reversed(node.children))
+
+  def build_index(self):
+    """Indexes the tree under this node so that its find_all_by_name(), find_by_id() and find_all_fragments() are lookups."""
+    self.index = ProfileIndex(self)
+    return self.index
+
   def find_by_name(self, pattern):
     """Returns the first node whose name matches 'name'."""
     if self.val.name.find(pattern) >= 0:
@@ -67,20 +83,12 @@ class Node(object):
         return tmp
 
   def find_all_by_name(self, pattern):
-    result = []
-    if self.val.name.find(pattern) >= 0:
-      result.append(self)
-    for x in self.children:
-      result += x.find_all_by_name(pattern)
-    return result
+    if self.index:
+      return self.index.find_all_by_name(pattern)
+    return [x for x in self.walk() if x.val.name.find(pattern) >= 0]
 
   def find_all_non_fragment_nodes(self):
-    result = []
-    if not self.is_fragment() and not self.is_fragment_instance():
-      result.append(self)
-    for x in self.children:
-      result += x.find_all_non_fragment_nodes()
-    return result
+    return [x for x in self.walk() if not x.is_fragment() and not x.is_fragment_instance()]
 
   def is_fragment(self):
     if self.node_is_fragment is not None:
@@ -141,28 +149,14 @@ class Node(object):
     return self.node_is_plan_node
 
   def find_by_id(self, pattern):
-    if self.nodes and self.nodes.get(pattern):
-      return self.nodes[pattern]
-    results = []
-    if self.id() == pattern:
-      results.append(self)
-
-    for x in self.children:
-      tmp = x.find_by_id(pattern)
-      results += tmp
-
-    return results
+    if self.index:
+      return self.index.ids.get(pattern, [])
+    return [x for x in self.walk() if x.id() == pattern]
 
   def find_all_fragments(self):
-    results = []
-    if self.is_fragment_instance():
-      results.append(self)
-
-    for x in self.children:
-      tmp = x.find_all_fragments()
-      results += tmp
-
-    return results
+    if self.index:
+      return self.index.find_all_fragments()
+    return [x for x in self.walk() if x.is_fragment_instance()]
 
   def foreach_lambda(self, method, plan_node=None, fragment=None, fragment_instance=None, pos=0):
     self.fragment = fragment
@@ -212,7 +206,9 @@ class Node(object):
 
   # Only for fragments
   def is_averaged(self):
-    return re.search(r"Averaged", self.val.name) is not None
+    if self.node_is_averaged is None:
+      self.node_is_averaged = re.search(r"Averaged", self.val.name) is not None
+    return self.node_is_averaged
 
   # Only for fragments
   def is_coordinator(self):
@@ -314,6 +310,85 @@ class Node(object):
     return buffer
 
 
+class ProfileIndex(object):
+  """
+  Lookups over a whole profile tree, built in one pass instead of walking the tree again for every rule.
+
+  Like foreach_lambda(), the pass sets the fragment, fragment instance and plan node of every node. The metrics are indexed by
+  name on the first lookup, so after the virtual counters of the pre-processing were added.
+  """
+
+  def __init__(self, root):
+    self.nodes = []  # In pre-order
+    self.names = {}  # Name -> positions in self.nodes
+    self.ids = {}  # Id -> nodes, in post-order like foreach_lambda()
+    self.fragment_instances = {}  # Fragment id -> fragment instances
+    self._matches = {}
+    self._metrics = None
+    self._add(root)
+
+  def _add(self, node, plan_node=None, fragment=None, fragment_instance=None, pos=0):
+    node.fragment = fragment
+    node.fragment_instance = fragment_instance
+    node.plan_node = plan_node
+    node.pos = pos
+    node.node_order = len(self.nodes)
+    self.nodes.append(node)
+    self.names.setdefault(node.val.name, []).append(node.node_order)
+
+    if node.is_fragment():
+      fragment = node
+    elif node.is_fragment_instance():
+      fragment_instance = node
+      self.fragment_instances.setdefault(fragment.id() if fragment else None, []).append(node)
+    elif node.is_plan_node():
+      plan_node = node
+
+    for idx, x in enumerate(node.children):
+      self._add(x, plan_node=plan_node, fragment=fragment, fragment_instance=fragment_instance, pos=idx)
+
+    nid = node.id()
+    if nid:
+      self.ids.setdefault(nid, []).append(node)
+
+  def find_all_by_name(self, pattern):
+    """Returns the nodes whose name contains `pattern`, in pre-order."""
+    positions = self._matches.get(pattern)
+    if positions is None:
+      positions = sorted(position for name, name_positions in self.names.items() if name.find(pattern) >= 0 for position in name_positions)
+      self._matches[pattern] = positions
+    return [self.nodes[position] for position in positions]
+
+  def find_all_fragments(self):
+    return sorted((x for instances in self.fragment_instances.values() for x in instances), key=lambda x: x.node_order)
+
+  def find_metrics(self, nodes, metric_name):
+    """Returns the metrics of the nodes named `metric_name`, as find_metric_by_name() on each of them would."""
+    column = self._metric_columns().get(metric_name)
+    if not column:
+      return []
+    return [metric for node in nodes for metric in column.get(node.node_order, ())]
+
+  def _metric_columns(self):
+    """Metric name -> position of the node -> metrics, read from all the counters at once."""
+    if self._metrics is None:
+      self._metrics = {}
+      for node in self.nodes:
+        ctr_map = node.counter_map()
+        for name, counter in ctr_map.items():
+          self._metrics.setdefault(name, {}).setdefault(node.node_order, []).append(
+            {'name': counter.name, 'value': counter.value, 'unit': counter.unit, 'node': node}
+          )
+        for name, child_names in (node.child_counters_map() or {}).items():
+          parent = None
+          if name in ctr_map:
+            parent = {'name': ctr_map[name].name, 'value': ctr_map[name].value, 'unit': ctr_map[name].unit}
+          metrics = self._metrics.setdefault(name, {}).setdefault(node.node_order, [])
+          for cc in child_names:
+            metrics.append({'name': ctr_map[cc].name, 'value': ctr_map[cc].value, 'unit': ctr_map[cc].unit, 'parent': parent, 'node': node})
+    return self._metrics
+
+
 def decode_thrift(val):
   """Deserialize a binary string into the TRuntimeProfileTree structure"""
   transport = TTransport.TMemoryBuffer(val)
@@ -22,7 +22,7 @@ import cProfile
 from builtins import object
 from io import StringIO as string_io
 
-from libanalyze import analyze as a, rules
+from libanalyze import analyze as a, models, rules
 
 LOG = logging.getLogger()
 
@@ -69,3 +69,69 @@ class AnalyzeTest(object):
     ps.print_stats()
     LOG.info(s.getvalue())
     assert dts <= 1000
+
+
+def _profile(*nodes):
+  """Builds the tree of a profile from its pre-order flattened nodes, given as (name, num_children, counters)."""
+  return a.analyze(a.TRuntimeProfileTree(nodes=[
+    a.TRuntimeProfileNode(
+      name=name,
+      num_children=num_children,
+      counters=[a.TCounter(name=k, value=v, unit=5) for k, v in counters.items()],
+      child_counters_map={},
+      info_strings={}
+    )
+    for name, num_children, counters in nodes
+  ]))
+
+
+class TestProfileIndex(object):
+
+  def setup_method(self):
+    self.profile = _profile(
+      ('Query (id=1:2)', 1, {}),
+      ('Execution Profile 1:2', 2, {'TotalTime': 10}),
+      ('Averaged Fragment F00', 1, {'TotalTime': 5}),
+      ('HASH_JOIN_NODE (id=1)', 0, {'TotalTime': 3, 'ProbeRows': 15}),
+      ('Fragment F00', 2, {}),
+      ('Instance 1:3 (host=host1:22000)', 1, {'PeakMemoryUsage': 100}),
+      ('HASH_JOIN_NODE (id=1)', 0, {'TotalTime': 4, 'ProbeRows': 10}),
+      ('Instance 1:4 (host=host2:22000)', 1, {'PeakMemoryUsage': 200}),
+      ('HASH_JOIN_NODE (id=1)', 0, {'TotalTime': 2, 'ProbeRows': 20}),
+    )
+
+  def test_lookups_match_tree_walk(self):
+    self.profile.foreach_lambda(lambda node: None)
+    expected = (
+      self.profile.find_all_by_name('HASH_JOIN_NODE'),
+      self.profile.find_all_by_name('Fragment'),
+      self.profile.find_all_fragments(),
+      models.query_node_by_id(self.profile, '1', 'ProbeRows'),
+      models.host_by_metric(self.profile, 'PeakMemoryUsage', exprs=[max, sum]),
+    )
+
+    self.profile.build_index()
+
+    assert expected[0] == self.profile.find_all_by_name('HASH_JOIN_NODE')
+    assert expected[1] == self.profile.find_all_by_name('Fragment')
+    assert expected[2] == self.profile.find_all_fragments()
+    assert expected[3] == models.query_node_by_id(self.profile, '1', 'ProbeRows')
+    assert expected[4] == models.host_by_metric(self.profile, 'PeakMemoryUsage', exprs=[max, sum])
+    assert [10, 20] == [x[0] for x in expected[3]]
+
+  def test_index(self):
+    index = self.profile.build_index()
+
+    assert 3 == len(self.profile.find_by_id('1'))
+    assert ['1:3', '1:4'] == [x.id() for x in index.fragment_instances['F00']]
+    assert ['F00', 'F00', 'F00'] == [x.fragment.id() for x in self.profile.find_by_id('1')]
+    assert 15 == models.query_node_by_id_value(self.profile, '1', 'ProbeRows', True)
+    assert [] == models.query_node_by_id(self.profile, '1', 'RowsReturned')
+
+  def test_counters_added_before_first_metric_lookup(self):
+    self.profile.build_index()
+
+    for node in self.profile.find_by_id('1'):
+      node.val.counters.append(models.TCounter(name='LocalTime', value=node.counter_map()['TotalTime'].value, unit=5))
+
+    assert [4, 2] == [x[0] for x in models.query_node_by_id(self.profile, '1', 'LocalTime')]
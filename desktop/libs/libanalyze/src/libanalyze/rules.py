@@ -462,7 +462,7 @@ class TopDownAnalysis(object):
         nodes = execution_profile.find_all_non_fragment_nodes()
         nodes = [x for x in nodes if x.fragment and x.fragment.is_averaged() is False]
         nodes = [x for x in nodes if x.name() != 'DataStreamSender']
-        metrics = reduce(lambda x, y: x + y.find_metric_by_name('LocalTime'), nodes, [])
+        metrics = models.query_metric_by_nodes(profile, nodes, 'LocalTime')
         metrics = sorted(metrics, key=lambda x: (x['node'].id(), x['node'].name()))
         for k, g in groupby(metrics, lambda x: (x['node'].id(), x['node'].name())):
             grouped = list(g)
@@ -678,16 +678,7 @@ class TopDownAnalysis(object):
             node.val.counters.append(models.TCounter(name='LocalTime', value=local_time, unit=5))
             node.val.counters.append(models.TCounter(name='ChildTime', value=child_time, unit=5))
 
-        nodes = {}
-
-        def create_map(node, nodes=nodes):
-          nid = node.id()
-          if nid:
-            if not nodes.get(nid):
-              nodes[nid] = []
-            nodes[nid].append(node)
-        profile.foreach_lambda(create_map)
-        profile.nodes = nodes
+        profile.build_index()
 
         profile.foreach_lambda(add_host)
 
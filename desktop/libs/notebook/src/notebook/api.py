@@ -21,7 +21,7 @@ from urllib.parse import unquote as urllib_unquote
 
 import sqlparse
 import opentracing.tracer
-from django.db.models import Q
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils.translation import gettext as _
 from django.views.decorators.http import require_GET, require_POST
@@ -29,12 +29,14 @@ from django.views.decorators.http import require_GET, require_POST
 from azure.abfs.__init__ import abfspath
 from desktop.conf import ENABLE_CONNECTORS
 from desktop.lib.django_util import JsonResponse
+from desktop.lib.document_search import get_search_index
 from desktop.lib.exceptions_renderable import PopupException
 from desktop.lib.i18n import smart_str
-from desktop.models import Document, Document2, FilesystemException, __paginate, _get_gist_document
+from desktop.models import Document, Document2, FilesystemException, HistorySummary, __paginate, _get_gist_document
 from indexer.fields import Field
 from indexer.file_format import HiveFormat
 from metadata.conf import OPTIMIZER
+from notebook.autocomplete_cache import get_autocomplete, invalidate_for_statement
 from notebook.conf import EXAMPLES
 from notebook.connectors.base import Notebook, QueryError, QueryExpired, SessionExpired, _get_snippet_name, patch_snippet_for_connector
 from notebook.decorators import api_error_handler, check_document_access_permission, check_document_modify_permission
@@ -43,6 +45,7 @@ from notebook.models import _get_dialect_example, escape_rows, get_api, make_not
 LOG = logging.getLogger()
 
 DEFAULT_HISTORY_NAME = ''
+HISTORY_SUMMARY_BACKFILL_BATCH = 1000
 
 
 @require_POST
@@ -149,6 +152,8 @@ def _execute_notebook(request, notebook, snippet):
         response['handle'] = interpreter.execute(notebook, snippet)
         notebook['sessions'] = pre_execute_sessions
 
+      invalidate_for_statement(interpreter, snippet.get('statement'), snippet.get('database'))
+
       # Retrieve and remove the result from the handle
       if response['handle'] and response['handle'].get('sync'):
         result = response['handle'].pop('result')
@@ -184,6 +189,7 @@ def _execute_notebook(request, notebook, snippet):
           # If we get Atomic block exception, something underneath interpreter.execute() crashed and is not handled.
           history.update_data(notebook)
           history.save()
+          HistorySummary.update_from_notebook(history, notebook, _get_statement(notebook))
 
           response['history_id'] = history.id
           response['history_uuid'] = history.uuid
@@ -258,8 +264,10 @@ def _check_status(request, notebook=None, snippet=None, operation_id=None):
     notebook = Notebook(document=nb_doc).get_data()  # Used below
     snippet = notebook['snippets'][0]
 
+  api = None
   try:
-    response['query_status'] = get_api(request, snippet).check_status(notebook, snippet)
+    api = get_api(request, snippet)
+    response['query_status'] = api.check_status(notebook, snippet)
     response['status'] = 0
   except SessionExpired:
     response['status'] = 'expired'
@@ -280,6 +288,9 @@ def _check_status(request, notebook=None, snippet=None, operation_id=None):
     else:
       has_result_set = None
 
+    if api is not None and status in ('available', 'success') and snippet.get('status') != status:
+      invalidate_for_statement(api, snippet.get('statement'), snippet.get('database'))  # Again once the statement is done
+
     if notebook.get('dialect') or notebook['type'].startswith('query') or notebook.get('isManaged'):
       nb_doc = Document2.objects.get_by_uuid(user=request.user, uuid=operation_id or notebook['uuid'])
       if nb_doc.can_write(request.user):
@@ -291,6 +302,8 @@ def _check_status(request, notebook=None, snippet=None, operation_id=None):
             nb['snippets'][0]['result']['handle']['has_result_set'] = has_result_set
           nb_doc.update_data(nb)
           nb_doc.save()
+          if nb_doc.is_history:
+            HistorySummary.objects.filter(document=nb_doc).update(status=status[:32])
 
   return response
 
@@ -567,6 +580,7 @@ def _historify(notebook, user):
   history_doc.update_data(notebook)
   history_doc.search = _get_statement(notebook)
   history_doc.save()
+  HistorySummary.update_from_notebook(history_doc, notebook, history_doc.search)
 
   return history_doc
 
@@ -602,22 +616,54 @@ def get_history(request):
 
   if is_notification_manager:
     docs = Document2.objects.get_tasks_history(user=request.user)
+    if doc_text:
+      docs = get_search_index().search(docs, doc_text)
+    response.update(_get_tasks_history(docs, page, limit))
   else:
     docs = Document2.objects.get_history(doc_type='query-%s' % doc_type, connector_id=connector_id, user=request.user)
+    _backfill_history_summaries(docs, 'history_summaries_backfilled:%s:%s:%s' % (request.user.id, doc_type, connector_id))
+
+    summaries = HistorySummary.objects.filter(
+      owner=request.user, doc_type='query-%s' % doc_type, document__is_trashed=False, document__is_managed=False
+    )
+    if connector_id is not None:
+      summaries = summaries.filter(connector_id=connector_id)
+    if doc_text:
+      summaries = summaries.filter(document__in=get_search_index().search(docs, doc_text).values('id'))
+
+    summaries = summaries.order_by('-last_executed', '-document_id')
+    response['count'] = summaries.count()
+    response['history'] = [{
+        'name': summary.name,
+        'id': summary.document_id,
+        'uuid': summary.uuid,
+        'type': summary.doc_type,
+        'data': {
+            'statement': summary.statement,
+            'lastExecuted': summary.last_executed,
+            'status': summary.status,
+            'parentSavedQueryUuid': summary.parent_saved_query_uuid
+        },
+        'absoluteUrl': summary.get_absolute_url(),
+      } for summary in __paginate(page, limit, queryset=summaries)['documents']
+    ]
+
+  response['message'] = _('History fetched')
+  response['status'] = 0
+
+  return JsonResponse(response)
 
-  if doc_text:
-    docs = docs.filter(Q(name__icontains=doc_text) | Q(description__icontains=doc_text) | Q(search__icontains=doc_text))
 
-  # Paginate
+def _get_tasks_history(docs, page, limit):
   docs = docs.order_by('-last_modified')
-  response['count'] = docs.count()
+  count = docs.count()
   docs = __paginate(page, limit, queryset=docs)['documents']
 
   history = []
   for doc in docs:
     notebook = Notebook(document=doc).get_data()
     if 'snippets' in notebook:
-      statement = notebook['description'] if is_notification_manager else _get_statement(notebook)
+      statement = notebook['description']
       history.append({
         'name': doc.name,
         'id': doc.id,
@@ -633,11 +679,26 @@ def get_history(request):
       })
     else:
       LOG.error('Incomplete History Notebook: %s' % notebook)
-  response['history'] = sorted(history, key=lambda row: row['data']['lastExecuted'], reverse=True)
-  response['message'] = _('History fetched')
-  response['status'] = 0
 
-  return JsonResponse(response)
+  return {
+    'count': count,
+    'history': sorted(history, key=lambda row: row['data']['lastExecuted'], reverse=True)
+  }
+
+
+def _backfill_history_summaries(docs, backfilled_key):
+  """Summarizes the history documents saved before the history summaries existed, the most recent first."""
+  if cache.get(backfilled_key):
+    return
+
+  missing = list(docs.filter(history_summary__isnull=True).defer(None)[:HISTORY_SUMMARY_BACKFILL_BATCH])
+  for doc in missing:
+    notebook = Notebook(document=doc).get_data()
+    HistorySummary.update_from_notebook(doc, notebook, _get_statement(notebook))
+
+  if len(missing) < HISTORY_SUMMARY_BACKFILL_BATCH:
+    # History documents are summarized when they are saved, so the backfill is only checked again once in a while
+    cache.set(backfilled_key, True, 60 * 60)
 
 
 @require_POST
@@ -749,7 +810,7 @@ def autocomplete(request, server=None, database=None, table=None, column=None, n
   action = request.POST.get('operation', 'schema')
 
   try:
-    autocomplete_data = get_api(request, snippet).autocomplete(snippet, database, table, column, nested, action)
+    autocomplete_data = get_autocomplete(get_api(request, snippet), snippet, database, table, column, nested, action)
     response.update(autocomplete_data)
   except QueryExpired as e:
     LOG.warning('Expired query seen: %s' % e)
@@ -31,9 +31,9 @@ from desktop.conf import APP_BLACKLIST, ENABLE_CONNECTORS, ENABLE_PROMETHEUS
 from desktop.lib.django_test_util import make_logged_in_client
 from desktop.lib.test_utils import add_permission, grant_access
 from desktop.metrics import num_of_queries
-from desktop.models import Directory, Document, Document2
+from desktop.models import Directory, Document, Document2, HistorySummary
 from hadoop import cluster as originalCluster
-from notebook.api import _historify
+from notebook.api import _backfill_history_summaries, _historify
 from notebook.conf import ENABLE_ALL_INTERPRETERS, INTERPRETERS, INTERPRETERS_SHOWN_ON_WHEEL, get_ordered_interpreters
 from notebook.connectors.base import Api, Notebook, QueryError, QueryExpired
 from notebook.decorators import api_error_handler
@@ -272,6 +272,22 @@ class TestApi(object):
 
     # TODO: test that query history for shared query only returns docs accessible by current user
 
+  def test_get_history_sorted_by_last_executed(self):
+    for last_executed in (3, 1, 2):
+      notebook = json.loads(self.notebook_json)
+      notebook['snippets'][0]['lastExecuted'] = last_executed
+      _historify(notebook, self.user)
+
+    response = self.client.get(reverse('notebook:get_history'), {'doc_type': 'hive', 'page': 1, 'limit': 2})
+    data = json.loads(response.content)
+    assert 0 == data['status'], data
+    assert 3 == data['count'], data
+    assert [3, 2] == [doc['data']['lastExecuted'] for doc in data['history']], data
+
+    response = self.client.get(reverse('notebook:get_history'), {'doc_type': 'hive', 'page': 2, 'limit': 2})
+    data = json.loads(response.content)
+    assert [1] == [doc['data']['lastExecuted'] for doc in data['history']], data
+
   def test_clear_history(self):
     assert 0 == Document2.objects.filter(name__contains=self.notebook['name'], is_history=True).count()
     _historify(self.notebook, self.user)
@@ -423,6 +439,62 @@ class TestApi(object):
       assert data['functions'] == [{'name': 'f1'}, {'name': 'f2'}, {'name': 'f3'}]
 
 
+@pytest.mark.django_db
+class TestHistorySummary(object):
+  def setup_method(self):
+    self.user = User.objects.create(username='test_history_summary')
+    self.notebook = {
+      'name': 'Test Hive Query',
+      'type': 'query-hive',
+      'uuid': '5982a274-de78-083c-2efc-74f53dce744c',
+      'isSaved': False,
+      'sessions': [],
+      'snippets': [{
+        'id': '2b7d1f46-17a0-30af-efeb-33d4c29b1055',
+        'type': 'hive',
+        'status': 'running',
+        'statement_raw': 'SELECT * FROM web_logs',
+        'variables': [],
+        'lastExecuted': 1462554843817,
+      }],
+    }
+
+  def test_historify(self):
+    history = _historify(self.notebook, self.user)
+
+    summary = HistorySummary.objects.get(document=history)
+    assert self.user == summary.owner
+    assert 'query-hive' == summary.doc_type
+    assert 'hive' == summary.dialect
+    assert 'SELECT * FROM web_logs' == summary.statement
+    assert 'running' == summary.status
+    assert 1462554843817 == summary.last_executed
+    assert history.uuid == summary.uuid
+    assert '/editor?editor=%s' % history.id == summary.get_absolute_url()
+
+    history.delete()
+    assert not HistorySummary.objects.filter(document_id=history.id).exists()
+
+  def test_backfill_history_summaries(self):
+    histories = [
+      Document2.objects.create(name='History %d' % i, type='query-hive', owner=self.user, is_history=True, data=json.dumps(self.notebook))
+      for i in range(3)
+    ]
+    docs = Document2.objects.get_history(doc_type='query-hive', user=self.user)
+
+    with patch('notebook.api.HISTORY_SUMMARY_BACKFILL_BATCH', 2):
+      _backfill_history_summaries(docs, 'test_backfill_history_summaries')
+      assert 2 == HistorySummary.objects.filter(owner=self.user).count()
+
+      _backfill_history_summaries(docs, 'test_backfill_history_summaries')
+      summaries = HistorySummary.objects.filter(owner=self.user)
+      assert {history.id for history in histories} == set(summaries.values_list('document_id', flat=True))
+
+    Document2.objects.create(name='History 4', type='query-hive', owner=self.user, is_history=True, data=json.dumps(self.notebook))
+    _backfill_history_summaries(docs, 'test_backfill_history_summaries')
+    assert 3 == HistorySummary.objects.filter(owner=self.user).count()  # Backfill completed
+
+
 class MockedApi(Api):
   def execute(self, notebook, snippet):
     return {
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cache of the databases, tables, columns and functions listed by the autocomplete of the editor.
+
+Listings are cached per connector and per user, or only per connector when AUTOCOMPLETE_CACHE.SHARED, for AUTOCOMPLETE_CACHE.TTL
+seconds. They are dropped when a statement changing the metadata, like CREATE, DROP or INVALIDATE METADATA, runs in the editor.
+
+The listings are stored in the default Django cache, so they and their invalidation are shared by all the Hue processes when the
+cache is, e.g. memcached or Redis.
+"""
+
+import re
+import time
+import uuid
+import hashlib
+import logging
+import threading
+
+from django.core.cache import cache as default_cache
+from django.db import connection
+
+from notebook.conf import AUTOCOMPLETE_CACHE
+
+LOG = logging.getLogger()
+
+DDL_RE = re.compile(r'^\s*(?:INVALIDATE\s+METADATA|REFRESH|CREATE|DROP|ALTER|MSCK|IMPORT)\b', re.IGNORECASE)
+DDL_TARGET_RE = re.compile(
+  r'\b(DATABASE|SCHEMA|TABLE|VIEW|METADATA|REFRESH)\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?([`"\w]+(?:\.[`"\w]+)?)', re.IGNORECASE
+)
+
+
+def get_connector_key(api):
+  """Identifies the connector, and compute if any, the metadata is listed from."""
+  interpreter = api.interpreter
+  if isinstance(interpreter, dict):
+    compute = interpreter.get('compute')
+    compute_name = compute.get('name') if isinstance(compute, dict) else compute
+    return (type(api).__name__, interpreter.get('type'), interpreter.get('name'), compute_name)
+  return (type(api).__name__, interpreter)
+
+
+def get_ddl_database(statement, default_database=None):
+  """
+  Returns (True, database) when the statement changes the metadata of the database, (True, None) when the database is not known
+  and (False, None) when the statement does not change the metadata.
+  """
+  if not statement or not DDL_RE.match(statement):
+    return False, None
+
+  match = DDL_TARGET_RE.search(statement)
+  if match is None:
+    return True, None
+
+  names = [name.strip('`"') for name in match.group(2).split('.')]
+  if re.search(r'\bRENAME\b', statement, re.IGNORECASE):  # The new name can be in another database
+    return True, None
+  elif match.group(1).upper() in ('DATABASE', 'SCHEMA'):
+    return True, names[0]
+  elif len(names) == 2:
+    return True, names[0]
+  else:
+    return True, default_database or None
+
+
+class AutocompleteCache(object):
+  """
+  Keeps the listings in a Django cache. Keys are (connector, user, database, table, column, nested, operation) tuples.
+
+  Each connector and each of its databases has a version, stored in the cache too and part of the cache keys of their listings.
+  Invalidating replaces the versions, so that no process reads the previous listings anymore and they expire.
+
+  With `background_refresh`, a listing older than half of the TTL is still returned but reloaded by a background thread.
+  """
+
+  def __init__(self, ttl, background_refresh=False, cache=None):
+    self.ttl = ttl
+    self.background_refresh = background_refresh
+    self._cache = cache if cache is not None else default_cache
+
+  def get(self, key, load):
+    """Returns the cached listing of the key, or calls load() to list it."""
+    now = time.time()
+    cache_key = self._get_cache_key(key)  # With the current versions, so that listings loaded during an invalidation are not read
+
+    entry = self._cache.get(cache_key)
+    if entry is None or now - entry[1] > self.ttl:
+      listing = load()
+      self._set(cache_key, listing)
+      return listing
+
+    refresh_key = cache_key + ':refresh'
+    if self.background_refresh and now - entry[1] > self.ttl / 2.0 and self._cache.add(refresh_key, True, timeout=self.ttl // 2 or 1):
+      threading.Thread(target=self._refresh, args=(cache_key, load), name='autocomplete-cache-refresh', daemon=True).start()
+    return entry[0]
+
+  def invalidate(self, connector, database=None):
+    """Drops the listings of the connector, or only the ones of the database and of the list of databases."""
+    if database is None:
+      version_keys = [self._get_version_key(connector)]
+    else:
+      version_keys = [self._get_version_key(connector, database), self._get_version_key(connector, '')]
+    self._cache.set_many(dict((version_key, uuid.uuid4().hex) for version_key in version_keys), timeout=None)
+
+  def _get_cache_key(self, key):
+    connector, database = key[0], key[2]
+    version_keys = [self._get_version_key(connector), self._get_version_key(connector, database or '')]
+
+    versions = self._cache.get_many(version_keys)
+    for version_key in version_keys:
+      if version_key not in versions:  # First listing or evicted version
+        self._cache.add(version_key, uuid.uuid4().hex, timeout=None)
+        versions[version_key] = self._cache.get(version_key)
+
+    return 'autocomplete:listing:%s' % self._hash((key, [versions[version_key] for version_key in version_keys]))
+
+  def _get_version_key(self, connector, database=None):
+    return 'autocomplete:version:%s' % self._hash((connector,) if database is None else (connector, database))
+
+  def _hash(self, value):
+    return hashlib.sha256(repr(value).encode('utf-8')).hexdigest()
+
+  def _set(self, cache_key, listing):
+    if self.is_cacheable(listing):
+      self._cache.set(cache_key, (listing, time.time()), timeout=self.ttl)
+
+  def _refresh(self, cache_key, load):
+    try:
+      self._set(cache_key, load())
+    except Exception:
+      LOG.exception('Failed to refresh the autocomplete listing %s' % cache_key)
+      self._cache.delete(cache_key + ':refresh')
+    finally:
+      connection.close()  # Of this thread
+
+  @classmethod
+  def is_cacheable(cls, listing):
+    return isinstance(listing, dict) and not listing.get('error') and not listing.get('message') and listing.get('status', 0) == 0
+
+
+AUTOCOMPLETE_CACHE_INSTANCE = None
+
+
+def get_autocomplete_cache():
+  global AUTOCOMPLETE_CACHE_INSTANCE
+  if AUTOCOMPLETE_CACHE_INSTANCE is None:
+    AUTOCOMPLETE_CACHE_INSTANCE = AutocompleteCache(
+      ttl=AUTOCOMPLETE_CACHE.TTL.get(),
+      background_refresh=AUTOCOMPLETE_CACHE.BACKGROUND_REFRESH.get()
+    )
+  return AUTOCOMPLETE_CACHE_INSTANCE
+
+
+def get_autocomplete(api, snippet, database=None, table=None, column=None, nested=None, operation=None):
+  """Returns api.autocomplete(), from the cache when possible."""
+  cache = get_autocomplete_cache()
+  if cache.ttl <= 0 or snippet.get('query') or snippet.get('source') == 'query':  # Listings of a statement are not cached
+    return api.autocomplete(snippet, database, table, column, nested, operation)
+
+  user = None if AUTOCOMPLETE_CACHE.SHARED.get() else api.user.username
+  key = (get_connector_key(api), user, database, table, column, nested, operation)
+
+  return cache.get(key, lambda: api.autocomplete(snippet, database, table, column, nested, operation))
+
+
+def invalidate_for_statement(api, statement, default_database=None):
+  """Drops the cached listings changed by the statement, if it is a DDL statement."""
+  is_ddl, database = get_ddl_database(statement, default_database)
+  if is_ddl and get_autocomplete_cache().ttl > 0:
+    LOG.debug('Dropping the autocomplete listings of %s after: %s' % (database or 'all the databases', statement[:100]))
+    get_autocomplete_cache().invalidate(get_connector_key(api), database)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest.mock import Mock, patch
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from notebook.autocomplete_cache import AutocompleteCache, get_autocomplete, get_ddl_database, invalidate_for_statement
+from notebook.conf import AUTOCOMPLETE_CACHE
+
+
+def test_get_ddl_database():
+  assert (False, None) == get_ddl_database('SELECT * FROM web_logs')
+  assert (False, None) == get_ddl_database(None)
+  assert (True, None) == get_ddl_database('INVALIDATE METADATA')
+  assert (True, 'sales') == get_ddl_database('invalidate metadata sales.customers')
+  assert (True, 'default') == get_ddl_database('REFRESH customers', 'default')
+  assert (True, 'sales') == get_ddl_database('CREATE TABLE IF NOT EXISTS `sales`.`orders` (id INT)')
+  assert (True, 'sales') == get_ddl_database('DROP DATABASE sales CASCADE')
+  assert (True, None) == get_ddl_database('DROP TABLE orders')
+  assert (True, None) == get_ddl_database('ALTER TABLE sales.orders RENAME TO archive.orders')
+  assert (True, None) == get_ddl_database('CREATE FUNCTION my_lower(STRING) RETURNS STRING LOCATION "/udf.jar" SYMBOL="Lower"')
+
+
+class TestAutocompleteCache(object):
+
+  def setup_method(self):
+    self.cache = AutocompleteCache(ttl=60, cache=LocMemCache('autocomplete-test', {}))
+    self.cache._cache.clear()
+    self.load = Mock(side_effect=lambda: {'tables_meta': [{'name': 'customers'}]})
+
+  def test_get(self):
+    with patch('notebook.autocomplete_cache.time') as time:
+      time.time.return_value = 1000.0
+      assert {'tables_meta': [{'name': 'customers'}]} == self.cache.get(('hive', 'test', 'default'), self.load)
+      assert {'tables_meta': [{'name': 'customers'}]} == self.cache.get(('hive', 'test', 'default'), self.load)
+      assert 1 == self.load.call_count
+
+      time.time.return_value = 1061.0
+      self.cache.get(('hive', 'test', 'default'), self.load)
+      assert 2 == self.load.call_count
+
+  def test_errors_not_cached(self):
+    load = Mock(return_value={'code': 500, 'message': 'Read timed out'})
+
+    self.cache.get(('hive', 'test', None), load)
+    self.cache.get(('hive', 'test', None), load)
+
+    assert 2 == load.call_count
+
+  def test_invalidate(self):
+    for key in (('hive', 'test', None), ('hive', 'test', 'sales'), ('hive', 'test', 'default'), ('impala', 'test', 'sales')):
+      self.cache.get(key, self.load)
+    assert 4 == self.load.call_count
+
+    self.cache.invalidate('hive', 'sales')
+
+    self.cache.get(('hive', 'test', 'default'), self.load)
+    self.cache.get(('impala', 'test', 'sales'), self.load)
+    assert 4 == self.load.call_count
+
+    self.cache.get(('hive', 'test', None), self.load)
+    self.cache.get(('hive', 'test', 'sales'), self.load)
+    assert 6 == self.load.call_count
+
+  def test_invalidation_shared_between_processes(self):
+    other_process_cache = AutocompleteCache(ttl=60, cache=LocMemCache('autocomplete-test', {}))
+
+    self.cache.get(('hive', 'test', 'sales'), self.load)
+    other_process_cache.get(('hive', 'test', 'sales'), self.load)
+    assert 1 == self.load.call_count
+
+    other_process_cache.invalidate('hive', 'sales')
+
+    self.cache.get(('hive', 'test', 'sales'), self.load)
+    assert 2 == self.load.call_count
+
+  def test_listing_loaded_during_invalidation_not_cached(self):
+    def load():
+      self.cache.invalidate('hive')
+      return {'databases': ['default']}
+
+    self.cache.get(('hive', 'test', None), load)
+
+    self.cache.get(('hive', 'test', None), self.load)
+    assert 1 == self.load.call_count
+
+  def test_background_refresh(self):
+    self.cache.background_refresh = True
+
+    with patch('notebook.autocomplete_cache.time') as time:
+      with patch('notebook.autocomplete_cache.threading.Thread') as Thread:
+        Thread.side_effect = lambda target, args, **kwargs: Mock(start=lambda: target(*args))
+
+        time.time.return_value = 1000.0
+        self.cache.get(('hive', 'test', 'default'), self.load)
+
+        time.time.return_value = 1020.0
+        self.cache.get(('hive', 'test', 'default'), self.load)
+        assert 1 == self.load.call_count
+
+        time.time.return_value = 1031.0
+        self.cache.get(('hive', 'test', 'default'), self.load)  # Returned from the cache and refreshed
+        assert 2 == self.load.call_count
+
+        time.time.return_value = 1055.0
+        self.cache.get(('hive', 'test', 'default'), self.load)  # Refreshed at 1031
+        assert 2 == self.load.call_count
+
+
+class TestGetAutocomplete(object):
+
+  def setup_method(self):
+    self.cache = AutocompleteCache(ttl=60, cache=LocMemCache('autocomplete-test', {}))
+    self.cache._cache.clear()
+    self.patcher = patch('notebook.autocomplete_cache.get_autocomplete_cache', return_value=self.cache)
+    self.patcher.start()
+
+  def teardown_method(self):
+    self.patcher.stop()
+
+  def _api(self, username, interpreter_type='hive'):
+    return Mock(
+      user=Mock(username=username),
+      interpreter={'type': interpreter_type, 'name': interpreter_type, 'compute': None},
+      autocomplete=Mock(return_value={'databases': ['default']}),
+    )
+
+  def test_cached_per_user(self):
+    api, other_api = self._api('test'), self._api('other')
+
+    get_autocomplete(api, {}, operation='schema')
+    get_autocomplete(api, {}, operation='schema')
+    get_autocomplete(other_api, {}, operation='schema')
+
+    assert 1 == api.autocomplete.call_count
+    assert 1 == other_api.autocomplete.call_count
+
+  def test_shared(self):
+    api, other_api = self._api('test'), self._api('other')
+
+    reset = AUTOCOMPLETE_CACHE.SHARED.set_for_testing(True)
+    try:
+      get_autocomplete(api, {}, operation='schema')
+      get_autocomplete(other_api, {}, operation='schema')
+    finally:
+      reset()
+
+    assert 1 == api.autocomplete.call_count
+    assert 0 == other_api.autocomplete.call_count
+
+  def test_statement_listings_not_cached(self):
+    api = self._api('test')
+
+    get_autocomplete(api, {'query': 'SELECT * FROM customers'})
+    get_autocomplete(api, {'query': 'SELECT * FROM customers'})
+
+    assert 2 == api.autocomplete.call_count
+
+  def test_invalidate_for_statement(self):
+    hive_api, impala_api = self._api('test'), self._api('test', 'impala')
+    get_autocomplete(hive_api, {}, database='sales')
+    get_autocomplete(impala_api, {}, database='sales')
+
+    invalidate_for_statement(hive_api, 'SELECT * FROM sales.orders')
+    get_autocomplete(hive_api, {}, database='sales')
+    assert 1 == hive_api.autocomplete.call_count
+
+    invalidate_for_statement(hive_api, 'DROP TABLE orders', 'sales')
+    get_autocomplete(hive_api, {}, database='sales')
+    get_autocomplete(impala_api, {}, database='sales')
+    assert 2 == hive_api.autocomplete.call_count
+    assert 1 == impala_api.autocomplete.call_count
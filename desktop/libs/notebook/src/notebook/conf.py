@@ -278,6 +278,32 @@ EXAMPLES = ConfigSection(
   ),
 )
 
+AUTOCOMPLETE_CACHE = ConfigSection(
+  key='autocomplete_cache',
+  help=_t('Cache of the databases, tables, columns and functions listed by the autocomplete of the editor.'),
+  members=dict(
+    TTL=Config(
+      'ttl',
+      help=_t('Number of seconds the metadata is cached. It is dropped when a DDL statement runs in the editor. 0 disables the cache.'),
+      type=int,
+      default=0,
+    ),
+    SHARED=Config(
+      'shared',
+      help=_t('Share the cached metadata between the users instead of caching it per user. Only enable it when all the users can see '
+              'the same databases and tables.'),
+      type=coerce_bool,
+      default=False,
+    ),
+    BACKGROUND_REFRESH=Config(
+      'background_refresh',
+      help=_t('Refresh the cached metadata in the background once it is older than half its TTL, so that users do not wait for it.'),
+      type=coerce_bool,
+      default=False,
+    ),
+  ),
+)
+
 
 def _default_interpreters(user):
   interpreters = []
@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Storage format of the query results of the task server.
+
+Results are persisted as a CSV file next to a small JSON index holding the headers, the number of rows, the size of the file and
+the byte offset of every ROW_INDEX_STEP-th row. Any page can then be read with a single seek followed by at most
+ROW_INDEX_STEP - 1 skipped rows, instead of parsing the file from the beginning.
+
+Results can also be kept in a Django cache by ResultCache, as blocks of rows under separate keys.
+"""
+
+import csv
+import sys
+import json
+import time
+import codecs
+import logging
+from itertools import islice
+
+LOG = logging.getLogger()
+
+ROW_INDEX_STEP = 1000
+
+
+class ResultIndexWriter(object):
+  """
+  Wraps the binary file of a CSV result and indexes the rows while they are written.
+
+  The first row is the header. Rows can span several lines when a quoted value contains line breaks, so the end of a row is
+  a line break found after an even number of quotes.
+  """
+
+  def __init__(self, f, step=ROW_INDEX_STEP):
+    self.f = f
+    self.step = step
+    self.headers = None
+    self.row_count = 0
+    self.size = 0
+    self.offsets = []
+
+    self._header = b''
+    self._row_start = 0
+    self._in_quotes = False
+
+  def write(self, chunk):
+    if not isinstance(chunk, bytes):
+      chunk = chunk.encode('utf-8')
+
+    self.f.write(chunk)
+
+    position = 0
+    length = len(chunk)
+    while position < length:
+      end = chunk.find(b'\n', position)
+      line = chunk[position:] if end == -1 else chunk[position:end + 1]
+
+      if line.count(b'"') % 2:
+        self._in_quotes = not self._in_quotes
+      if self.headers is None:
+        self._header += line
+
+      if end == -1:
+        break
+      position = end + 1
+
+      if not self._in_quotes:
+        self._end_row(self.size + position)
+
+    self.size += length
+
+  def _end_row(self, next_row_start):
+    if self.headers is None:
+      self.headers = next(csv.reader([self._header.decode('utf-8')]), [])
+    else:
+      if self.row_count % self.step == 0:
+        self.offsets.append(self._row_start)
+      self.row_count += 1
+    self._row_start = next_row_start
+
+  @property
+  def index(self):
+    return {
+      'headers': self.headers or [],
+      'row_count': self.row_count,
+      'size': self.size,
+      'step': self.step,
+      'offsets': self.offsets,
+    }
+
+  def dumps(self):
+    return json.dumps(self.index)
+
+
+def load_index(f):
+  return json.loads(f.read())
+
+
+def read_rows(f, index, skip, rows):
+  """
+  Returns up to `rows` rows of a CSV result, after the first `skip` rows.
+
+  With an index, only the rows of the page and the rows between the closest indexed offset and the page are read.
+  Without an index the headers are read and the rows are skipped from the beginning of the file.
+  """
+  csv.field_size_limit(sys.maxsize)
+
+  if index:
+    step = index['step']
+    offsets = index['offsets']
+    block = skip // step
+    if block >= len(offsets):
+      return []
+    f.seek(offsets[block])
+    skip -= block * step
+    csv_reader = csv.reader(codecs.getreader('utf-8')(f))
+  else:
+    csv_reader = csv.reader(codecs.getreader('utf-8')(f))
+    next(csv_reader, None)
+
+  return list(islice(csv_reader, skip, skip + rows))
+
+
+def read_headers(f, index):
+  if index:
+    return index['headers']
+  else:
+    return next(csv.reader(codecs.getreader('utf-8')(f)), [])
+
+
+class ResultCache(object):
+  """
+  Keeps query results in a Django cache as fixed-size blocks of rows, so that reading a page only loads the blocks it needs.
+
+  The total size of the cached results is bounded: the least recently read results are evicted when a new one does not fit
+  and the blocks of a result bigger than the whole cache are only partially cached. A miss returns None and the rows have to
+  be read from the result storage instead.
+
+  The list of the cached results is only written when caching a result. The time a result was last read is kept under a key of
+  its own, updated at most every TOUCH_INTERVAL seconds, so that concurrent readers do not write the list.
+  """
+
+  LRU_KEY = 'result_cache_lru'  # [key, size, time cached] of each result
+  TOUCH_INTERVAL = 30
+
+  def __init__(self, cache, block_size=ROW_INDEX_STEP, max_size=256 * 1024 * 1024, timeout=60 * 5):
+    self.cache = cache
+    self.block_size = block_size
+    self.max_size = max_size
+    self.timeout = timeout
+
+  def put(self, result_key, f):
+    """Caches the CSV result of the binary file f, one block at a time."""
+    csv.field_size_limit(sys.maxsize)
+    csv_reader = csv.reader(codecs.getreader('utf-8')(f))
+    headers = next(csv_reader, [])
+
+    self.delete(result_key)
+    lru = [entry for entry in self._get_lru() if entry[0] != result_key]
+
+    size = 0
+    row_count = 0
+    blocks = 0
+    complete = True
+    for block in iter(lambda: list(islice(csv_reader, self.block_size)), []):
+      block_size = sum(len(cell) + 1 for row in block for cell in row)
+      if size + block_size > self.max_size:
+        LOG.info('Result %s is bigger than the result cache, caching only its first %d rows.' % (result_key, row_count))
+        complete = False
+        break
+      self.cache.set(self._block_key(result_key, blocks), block, self.timeout)
+      size += block_size
+      row_count += len(block)
+      blocks += 1
+
+    lru = self._evict(lru, self.max_size - size)
+    lru.append([result_key, size, time.time()])
+    self.cache.set(self.LRU_KEY, lru, None)
+    self.cache.set(
+      result_key,
+      {
+        'headers': headers,
+        'blocks': blocks,
+        'row_count': row_count,
+        'size': size,
+        'complete': complete
+      },
+      self.timeout
+    )
+
+    return row_count
+
+  def get_rows(self, result_key, skip, rows):
+    """Returns the headers and up to `rows` rows after the first `skip` rows, or None if they are not all cached."""
+    meta = self.cache.get(result_key)
+    if meta is None:
+      return None
+
+    if skip + rows > meta['row_count']:
+      if not meta['complete']:
+        return None  # Only the beginning of the result is cached, the caller has to check the storage
+      rows = meta['row_count'] - skip
+      if rows <= 0:
+        return meta['headers'], []
+
+    first_block = skip // self.block_size
+    last_block = (skip + rows - 1) // self.block_size
+    keys = [self._block_key(result_key, block) for block in range(first_block, last_block + 1)]
+    blocks = self.cache.get_many(keys + [self._read_key(result_key)])
+    if any(key not in blocks for key in keys):
+      return None
+
+    self._touch(result_key, blocks.get(self._read_key(result_key)))
+
+    data = [row for key in keys for row in blocks[key]]
+    start = skip - first_block * self.block_size
+    return meta['headers'], data[start:start + rows]
+
+  def delete(self, result_key):
+    meta = self.cache.get(result_key)
+    if meta is not None:
+      self.cache.delete_many(
+        [result_key, self._read_key(result_key)] + [self._block_key(result_key, block) for block in range(meta['blocks'])]
+      )
+
+  def _block_key(self, result_key, block):
+    return '%s_block_%d' % (result_key, block)
+
+  def _read_key(self, result_key):
+    return '%s_read' % result_key
+
+  def _get_lru(self):
+    expired = time.time() - self.timeout
+    return [entry for entry in self.cache.get(self.LRU_KEY, []) if entry[2] > expired]
+
+  def _touch(self, result_key, last_read):
+    now = time.time()
+    if last_read is None or now - last_read >= self.TOUCH_INTERVAL:
+      self.cache.set(self._read_key(result_key), now, self.timeout)  # The blocks still expire at the time they were cached
+
+  def _evict(self, lru, available):
+    read_times = self.cache.get_many([self._read_key(entry[0]) for entry in lru])
+    lru.sort(key=lambda entry: read_times.get(self._read_key(entry[0]), entry[2]))
+
+    while lru and sum(entry[1] for entry in lru) > available:
+      result_key = lru.pop(0)[0]
+      LOG.info('Evicting result %s from the result cache.' % result_key)
+      self.delete(result_key)
+    return lru
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from io import BytesIO
+from unittest.mock import patch
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from notebook.result_store import ResultCache, ResultIndexWriter, load_index, read_headers, read_rows
+
+
+def _write_result(chunks, step=3):
+  f = BytesIO()
+  writer = ResultIndexWriter(f, step=step)
+  for chunk in chunks:
+    writer.write(chunk)
+  return f, writer
+
+
+class TestResultIndexWriter(object):
+
+  def test_index(self):
+    f, writer = _write_result([
+      'id|INT_TYPE,name|STRING_TYPE\r\n1,a\r\n2,b\r\n',
+      '3,c\r\n4,d\r\n5,e\r\n6,f\r\n7,g\r\n',
+    ])
+
+    assert ['id|INT_TYPE', 'name|STRING_TYPE'] == writer.headers
+    assert 7 == writer.row_count
+    assert len(f.getvalue()) == writer.size
+    assert 3 == len(writer.offsets)
+    f.seek(writer.offsets[1])
+    assert f.read().startswith(b'4,d\r\n')
+
+  def test_index_multiline_values(self):
+    f, writer = _write_result([
+      'id,comment\r\n1,"line 1\r\nline 2"\r\n2,"split ',
+      'across ""chunks""\r\nhere"\r\n3,c\r\n4,d\r\n',
+    ])
+
+    assert 4 == writer.row_count
+    assert [[u'2', u'split across "chunks"\r\nhere'], [u'3', u'c']] == read_rows(f, writer.index, 1, 2)
+    assert [[u'4', u'd']] == read_rows(f, writer.index, 3, 10)
+
+
+class TestReadRows(object):
+
+  def setup_method(self):
+    self.f, self.writer = _write_result(['col\r\n'] + ['%d\r\n' % i for i in range(10)])
+    self.index = load_index(BytesIO(self.writer.dumps().encode('utf-8')))
+
+  def test_read_with_index(self):
+    assert ['col'] == read_headers(self.f, self.index)
+    assert [['0'], ['1']] == read_rows(self.f, self.index, 0, 2)
+    assert [['4'], ['5'], ['6'], ['7']] == read_rows(self.f, self.index, 4, 4)
+    assert [['9']] == read_rows(self.f, self.index, 9, 4)
+    assert [] == read_rows(self.f, self.index, 10, 4)
+    assert [] == read_rows(self.f, self.index, 100, 4)
+
+  def test_read_without_index(self):
+    self.f.seek(0)
+    assert ['col'] == read_headers(self.f, None)
+    self.f.seek(0)
+    assert [['4'], ['5']] == read_rows(self.f, None, 4, 2)
+
+
+class TestResultCache(object):
+
+  def setup_method(self):
+    self.cache = LocMemCache('result_store_tests', {})
+    self.cache.clear()  # Caches of the same name share their storage
+    self.result_cache = ResultCache(self.cache, block_size=3, max_size=100)
+
+  def _result(self, rows):
+    return BytesIO(('col\r\n' + ''.join('%d\r\n' % i for i in range(rows))).encode('utf-8'))
+
+  def test_get_rows(self):
+    assert 10 == self.result_cache.put('result_1', self._result(10))
+
+    assert (['col'], [['0'], ['1']]) == self.result_cache.get_rows('result_1', 0, 2)
+    assert (['col'], [['2'], ['3'], ['4'], ['5'], ['6']]) == self.result_cache.get_rows('result_1', 2, 5)
+    assert (['col'], [['9']]) == self.result_cache.get_rows('result_1', 9, 5)
+    assert (['col'], []) == self.result_cache.get_rows('result_1', 10, 5)
+    assert self.cache.get('result_1_block_3') == [['9']]
+
+  def test_missing_result(self):
+    assert self.result_cache.get_rows('result_1', 0, 2) is None
+
+  def test_partially_cached_result(self):
+    assert 36 == self.result_cache.put('result_1', self._result(100))  # Blocks of 6 or 9 bytes up to 98 bytes
+
+    assert (['col'], [['34'], ['35']]) == self.result_cache.get_rows('result_1', 34, 2)
+    assert self.result_cache.get_rows('result_1', 35, 2) is None
+
+  def test_lru_eviction(self):
+    self.result_cache.put('result_1', self._result(10))
+    self.result_cache.put('result_2', self._result(10))
+    self.result_cache.put('result_3', self._result(10))
+
+    self.result_cache.get_rows('result_1', 0, 1)
+    self.result_cache.put('result_4', self._result(30))
+
+    assert self.result_cache.get_rows('result_1', 0, 1) is not None
+    assert self.result_cache.get_rows('result_2', 0, 1) is None
+    assert self.cache.get('result_2_block_0') is None
+    assert self.result_cache.get_rows('result_4', 0, 1) is not None
+
+  def test_read_time_updated_once_per_interval(self):
+    self.result_cache.put('result_1', self._result(10))
+    lru = self.cache.get(ResultCache.LRU_KEY)
+
+    with patch('notebook.result_store.time') as time:
+      time.time.return_value = 1000.0
+      self.result_cache.get_rows('result_1', 0, 1)
+      time.time.return_value = 1010.0
+      self.result_cache.get_rows('result_1', 0, 1)
+      assert 1000.0 == self.cache.get('result_1_read')
+
+      time.time.return_value = 1031.0
+      self.result_cache.get_rows('result_1', 0, 1)
+      assert 1031.0 == self.cache.get('result_1_read')
+
+    assert lru == self.cache.get(ResultCache.LRU_KEY)  # Not written by the readers
+
+  def test_delete(self):
+    self.result_cache.put('result_1', self._result(10))
+    self.result_cache.delete('result_1')
+
+    assert self.result_cache.get_rows('result_1', 0, 1) is None
+    assert self.cache.get('result_1_block_0') is None
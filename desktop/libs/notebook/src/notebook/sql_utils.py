@@ -15,7 +15,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import os
 import re
 import hashlib
 from io import StringIO as string_io
@@ -85,68 +84,160 @@ def split_statements(hql, dialect=None):
   """
   Split statements at semicolons ignoring the ones inside quotes and comments.
   The comment symbols that come inside quotes should be ignored.
+
+  Returns a list of ((start_row, start_col), (end_row, end_col), statement). A statement starts right after the semicolon ending
+  the previous one or at the beginning of its first non blank line, and ends after its semicolon or its last character.
   """
+  if hql.find(';') in (-1, len(hql) - 1) or dialect == 'hplsql':
+    return [((0, 0), (0, len(hql) - 1), hql)]
+
   statements = []
-  current = ''
-  prev = ''
-  between_quotes = None
-  is_comment = None
-  start_row = 0
-  start_col = 0
-  end_row = 0
-  end_col = len(hql) - 1
+  positions = _TextPositions(hql)
+
+  for start, end in iter_statement_offsets(hql, dialect):
+    first = _NON_WHITESPACE.search(hql, start, end)
+    if first is None:
+      continue
+    first = first.start()
+    statement = hql[first:end].rstrip()
+
+    start_row, start_col = positions.get(first)
+    if hql.find('\n', start, first) == -1:
+      start_col -= first - start
+    else:  # The previous statement ended its line
+      start_col = 0
 
-  if hql.find(';') in (-1, len(hql) - 1) or dialect == 'hplsql':
-    return [((start_row, start_col), (end_row, end_col), hql)]
+    if end < len(hql):
+      end_row, end_col = positions.get(end)
+      end_col += 1  # Semicolon
+    else:
+      end_row, end_col = positions.get(first + len(statement))
 
-  lines = hql.splitlines()
+    statements.append(((start_row, start_col), (end_row, end_col), statement))
 
-  for row, line in enumerate(lines):
-    end_col = 0
-    end_row = row
+  return statements
 
-    if start_row == row and line.strip() == '':  # ignore leading whitespace rows
-      start_row += 1
-    elif current.strip() == '':  # reset start_row
-      start_row = row
-      start_col = 0
 
-    for col, c in enumerate(line):
-      current += c
-
-      if c in ('"', "'") and prev != '\\' and is_comment is None:
-        if between_quotes == c:
-          between_quotes = None
-        elif between_quotes is None:
-          between_quotes = c
-      elif c == '-' and prev == '-' and between_quotes is None and is_comment is None:
-        is_comment = True
-      elif c == ';':
-        if between_quotes is None and is_comment is None:
-          current = current.strip()
-          # Strip off the trailing semicolon
-          current = current[:-1]
-          if len(current) > 1:
-            statements.append(((start_row, start_col), (row, col + 1), current))
-            start_col = col + 1
-          current = ''
-      # This character holds no significance if it was escaped within a string
-      if prev == '\\' and between_quotes is not None:
-        c = ''
-      prev = c
-      end_col = col
-
-    is_comment = None
-    prev = os.linesep
-
-    if current != '':
-      current += os.linesep
-
-  if current and current != ';':
-    current = current.strip()
-    statements.append(((start_row, start_col), (end_row, end_col + 1), current))
+def iter_statement_offsets(sql, dialect=None):
+  """
+  Yields lazily the (start, end) offsets of the statements of `sql`: `end` is the offset of the semicolon separating the statement
+  from the next one or the length of `sql`. The statements are not stripped and can be blank.
 
-  return statements
+  The text is scanned once, skipping over the quoted strings and identifiers and the comments of the dialect.
+  """
+  if dialect == 'hplsql':
+    yield 0, len(sql)
+    return
+
+  rules = _get_dialect_rules(dialect)
+  length = len(sql)
+  start = 0
+  position = 0
+
+  while True:
+    position = rules.statement.match(sql, position).end()
+    if position == length:
+      break
+    if sql[position] == ';':
+      yield start, position
+      position += 1
+      start = position
+    else:  # Nested block comment
+      position = _skip_nested_block_comment(sql, position + 2)
+
+  if start < length:
+    yield start, length
+
+
+class _DialectRules(object):
+  """
+  How the statements of a SQL dialect quote strings and identifiers and comment, compiled into a regular expression matching the
+  text of a statement until its semicolon, so that the scanning happens within the regular expression engine. Unterminated strings
+  and comments last until the end of the text.
+  """
+
+  def __init__(self, hash_comments=False, backslash_escapes=True, escape_strings=False, dollar_quotes=False, nested_comments=False):
+    self.nested_comments = nested_comments
+
+    special = ';\'"`/\\-'
+    units = [
+      _quoted("'", backslash_escapes),
+      _quoted('"', backslash_escapes),
+      _quoted('`', False),
+      r'--[^\n]*',
+      r'/(?!\*)' if nested_comments else r'/\*.*?(?:\*/|\Z)|/',
+      '-',
+    ]
+    if hash_comments:
+      special += '#'
+      units.append(r'#[^\n]*')
+    if escape_strings:  # E'It\'s'
+      special += 'Ee'
+      units.insert(0, r'(?<!\w)[Ee]' + _quoted("'", True))
+      units.append('[Ee]')
+    if dollar_quotes:  # $body$ ... $body$
+      special += '$'
+      units.insert(0, r'(?<![\w$])(?P<tag>\$(?:[A-Za-z_]\w*)?\$).*?(?:(?P=tag)|\Z)')
+      units.append(r'\$')
+    units.insert(0, '[^%s]+' % special)
+
+    self.statement = re.compile('(?:%s)*' % '|'.join(units), re.DOTALL)
+
+
+def _quoted(quote, backslash_escapes):
+  if backslash_escapes:
+    return r'%(quote)s[^%(quote)s\\]*(?:\\(?:.|\Z)[^%(quote)s\\]*)*(?:%(quote)s|\Z)' % {'quote': quote}
+  else:
+    return r'%(quote)s[^%(quote)s]*(?:%(quote)s|\Z)' % {'quote': quote}
+
+
+_DEFAULT_DIALECT_RULES = _DialectRules()
+_DIALECT_RULES = {
+  'mysql': _DialectRules(hash_comments=True),
+  'postgresql': _DialectRules(backslash_escapes=False, escape_strings=True, dollar_quotes=True, nested_comments=True),
+  'redshift': _DialectRules(backslash_escapes=False, escape_strings=True, dollar_quotes=True),
+  'snowflake': _DialectRules(dollar_quotes=True),
+  'presto': _DialectRules(backslash_escapes=False),
+  'trino': _DialectRules(backslash_escapes=False),
+  'athena': _DialectRules(backslash_escapes=False),
+  'oracle': _DialectRules(backslash_escapes=False),
+  'sqlite': _DialectRules(backslash_escapes=False),
+}
+
+_NON_WHITESPACE = re.compile(r'\S')
+_BLOCK_COMMENT_DELIMITERS = re.compile(r'/\*|\*/')
+
+
+def _get_dialect_rules(dialect):
+  return _DIALECT_RULES.get(dialect, _DEFAULT_DIALECT_RULES)
+
+
+def _skip_nested_block_comment(sql, position):
+  """Returns the offset following the end of the block comment opened before `position`, comments being nestable."""
+  depth = 1
+  for delimiter in _BLOCK_COMMENT_DELIMITERS.finditer(sql, position):
+    depth += 1 if delimiter.group() == '/*' else -1
+    if depth == 0:
+      return delimiter.end()
+  return len(sql)
+
+
+class _TextPositions(object):
+  """Converts increasing offsets of a text into (row, column) by only counting the line breaks since the previous offset."""
+
+  def __init__(self, text):
+    self.text = text
+    self.offset = 0
+    self.row = 0
+    self.line_start = 0
+
+  def get(self, offset):
+    line_breaks = self.text.count('\n', self.offset, offset)
+    if line_breaks:
+      self.row += line_breaks
+      self.line_start = self.text.rfind('\n', self.offset, offset) + 1
+    self.offset = offset
+    return self.row, offset - self.line_start
 
 
 _SEMICOLON_WHITESPACE = re.compile(r";\s*$")
@@ -17,7 +17,7 @@
 # limitations under the License.
 
 from beeswax.design import hql_query
-from notebook.sql_utils import strip_trailing_semicolon, split_statements
+from notebook.sql_utils import get_statements, iter_statement_offsets, split_statements, strip_trailing_semicolon
 
 
 def test_split_statements():
@@ -54,3 +54,61 @@ def test_get_hplsql_statements():
   assert (
     "CREATE FUNCTION hello()\n RETURNS STRING\nBEGIN\n RETURN 'Hello, world';\nEND" !=
     split_statements("CREATE FUNCTION hello()\n RETURNS STRING\nBEGIN\n RETURN 'Hello, world';\nEND")[0][2])
+
+
+def test_split_statements_positions():
+  assert [
+    ((0, 0), (0, 9), 'select 1'),
+    ((2, 0), (3, 4), 'select\n  2'),
+    ((3, 4), (3, 14), 'select 3'),
+    ((4, 0), (5, 11), '-- last\nshow tables'),
+  ] == split_statements('select 1;\n\n  select\n  2; select 3;\n-- last\nshow tables')
+
+  assert [
+    {'start': {'row': 0, 'column': 0}, 'end': {'row': 0, 'column': 9}, 'statement': 'select 1'},
+    {'start': {'row': 2, 'column': 0}, 'end': {'row': 3, 'column': 3}, 'statement': 'select\n  2'},
+  ] == get_statements('select 1;\n\n  select\n  2 ;  \n')
+
+
+def test_split_statements_comments_and_quotes():
+  assert ['select 1', '/* a; b */ select 2', 'select `a;b` from t'] == [
+    statement for _start, _end, statement in split_statements('select 1; /* a; b */ select 2;\nselect `a;b` from t')
+  ]
+  assert ['select 1 -- a; b\nfrom t', "select 'unterminated; select 3"] == [
+    statement for _start, _end, statement in split_statements("select 1 -- a; b\nfrom t; select 'unterminated; select 3")
+  ]
+
+
+def test_split_statements_dialects():
+  assert ['select 1 # a;\nfrom t', 'select 2'] == [
+    statement for _start, _end, statement in split_statements('select 1 # a;\nfrom t; select 2', 'mysql')
+  ]
+  assert ["select 'C:\\'", 'select 2'] == [
+    statement for _start, _end, statement in split_statements("select 'C:\\'; select 2", 'presto')
+  ]
+  assert [
+    'CREATE FUNCTION f() RETURNS int AS $body$ BEGIN RETURN 1; END; $body$ LANGUAGE plpgsql',
+    "select E'it\\'s;', 'C:\\'",
+    'select 1 /* outer /* inner; */ comment; */',
+  ] == [
+    statement for _start, _end, statement in split_statements(
+      "CREATE FUNCTION f() RETURNS int AS $body$ BEGIN RETURN 1; END; $body$ LANGUAGE plpgsql;\n"
+      "select E'it\\'s;', 'C:\\';\n"
+      "select 1 /* outer /* inner; */ comment; */",
+      'postgresql'
+    )
+  ]
+
+
+def test_iter_statement_offsets():
+  assert [(0, 8), (9, 19), (20, 20)] == list(iter_statement_offsets('select 1;\n\nselect 2;;'))
+  assert [(0, 26)] == list(iter_statement_offsets("select 'a;b' as c -- d;\n e", 'hive'))
+
+
+def test_split_large_script():
+  script = "INSERT INTO t VALUES (1, 'a;b', \"c\"), (2, 'it\\'s', NULL); -- note\n" * 10000
+
+  statements = split_statements(script)
+
+  assert 10001 == len(statements)
+  assert ((9999, 57), (9999, 65), '-- note') == statements[-1]
@@ -17,11 +17,8 @@
 
 from __future__ import absolute_import, unicode_literals
 
-import csv
-import sys
 import json
 import time
-import codecs
 import logging
 import datetime
 from builtins import next, object
@@ -44,6 +41,7 @@ from desktop.settings import CACHES_CELERY_KEY, CACHES_CELERY_QUERY_RESULT_KEY
 from notebook.api import _get_statement
 from notebook.connectors.base import ExecutionWrapper, QueryError, QueryExpired, get_api
 from notebook.models import MockedDjangoRequest, Notebook, make_notebook
+from notebook.result_store import ResultCache, ResultIndexWriter, load_index, read_headers, read_rows
 from notebook.sql_utils import get_current_statement
 from useradmin.models import User
 
@@ -105,7 +103,7 @@ def download_to_file(notebook, snippet, file_format='csv', max_rows=-1, **kwargs
   request = _get_request(**kwargs)
   api = get_api(request, snippet)
 
-  meta = {'row_counter': 0, 'handle': {}, 'status': '', 'truncated': False}
+  meta = {'row_counter': 0, 'handle': {}, 'status': '', 'truncated': False, 'size': 0}
 
   with storage.open(_log_key(notebook, snippet), 'wb') as f_log:
     result_wrapper = ExecutionWrapper(
@@ -122,19 +120,22 @@ def download_to_file(notebook, snippet, file_format='csv', max_rows=-1, **kwargs
     response = export_csvxls.create_generator(content_generator, file_format)
 
     with storage.open(result_key, 'wb') as f:
+      result_writer = ResultIndexWriter(f)
       for chunk in response:
-        f.write(chunk.encode('utf-8'))
+        result_writer.write(chunk)
+
+    if file_format == 'csv':
+      with storage.open(_index_key(task_id), 'wb') as f:
+        f.write(result_writer.dumps().encode('utf-8'))
 
     if TASK_SERVER.RESULT_CACHE.get():
       with storage.open(result_key, 'rb') as store:
-        with codecs.getreader('utf-8')(store) as text_file:
-          delimiter = ','
-          csv_reader = csv.reader(text_file, delimiter=delimiter)
-          caches[CACHES_CELERY_QUERY_RESULT_KEY].set(result_key, [row for row in csv_reader], 60 * 5)
-          LOG.info('Caching results %s.' % result_key)
+        _get_result_cache().put(result_key, store)
+        LOG.info('Caching results %s.' % result_key)
 
     meta['row_counter'] = content_generator.row_counter
     meta['truncated'] = content_generator.is_truncated
+    meta['size'] = result_writer.size
     download_to_file.update_state(task_id=task_id, state='AVAILABLE', meta=meta)
 
   return meta
@@ -361,24 +362,16 @@ def fetch_result(notebook, snippet, rows, start_over, **kwargs):
   skip = 0
   if not start_over:
     skip = caches[CACHES_CELERY_KEY].get(_fetch_progress_key(notebook, snippet), default=0)
-  target = skip + rows
 
   if info.get('handle', {}).get('has_result_set', False):
-    csv.field_size_limit(sys.maxsize)
-    count = 0
-    headers, csv_reader = _get_data(task_id)
+    headers, rows_data = _get_data(task_id, skip, rows)
 
     for col in headers:
       split = col.split('|')
       split_type = split[1] if len(split) > 1 else 'STRING_TYPE'
       cols.append({'name': split[0], 'type': split_type, 'comment': None})
-    for row in csv_reader:
-      count += 1
-      if count <= skip:  # TODO: seek(skip) or [skip:]
-        continue
-      data.append(row)
-      if count >= target:
-        break
+    data.extend(rows_data)
+    count = skip + len(rows_data)
 
     caches[CACHES_CELERY_KEY].set(_fetch_progress_key(notebook, snippet), count, timeout=None)
 
@@ -387,22 +380,40 @@ def fetch_result(notebook, snippet, rows, start_over, **kwargs):
   return results
 
 
-def _get_data(task_id):
+def _get_data(task_id, skip, rows):
   result_key = _result_key(task_id)
 
   if TASK_SERVER.RESULT_CACHE.get():
-    csv_reader = caches[CACHES_CELERY_QUERY_RESULT_KEY].get(result_key)  # TODO check if expired
-    if csv_reader is None:
-      raise QueryError('Cached results %s not found.' % result_key)
-    headers = csv_reader[0] if csv_reader else []  # TODO check size
-    csv_reader = csv_reader[1:] if csv_reader else []
-  else:
-    f = storage.open(result_key, 'rb')
-    delimiter = ','
-    csv_reader = csv.reader(f, delimiter=delimiter)
-    headers = next(csv_reader, [])
+    cached = _get_result_cache().get_rows(result_key, skip, rows)
+    if cached is not None:
+      return cached
+    LOG.debug('Cached results %s not found, reading them from the storage.' % result_key)
+
+  index = _get_index(task_id)
+  with storage.open(result_key, 'rb') as f:
+    headers = read_headers(f, index)
+    f.seek(0)
+    data = read_rows(f, index, skip, rows)
+
+  return headers, data
+
+
+def _get_result_cache():
+  return ResultCache(
+    caches[CACHES_CELERY_QUERY_RESULT_KEY],
+    block_size=TASK_SERVER.RESULT_CACHE_BLOCK_SIZE.get(),
+    max_size=TASK_SERVER.RESULT_CACHE_MAX_SIZE.get()
+  )
 
-  return headers, csv_reader
+
+def _get_index(task_id):
+  index_key = _index_key(task_id)
+
+  if not storage.exists(index_key):  # Results stored before the index was introduced
+    return None
+
+  with storage.open(index_key, 'rb') as f:
+    return load_index(f)
 
 
 def fetch_result_size(*args, **kwargs):
@@ -419,7 +430,7 @@ def fetch_result_size(*args, **kwargs):
     return {'rows': 0}
 
   info = result.info
-  return {'rows': info.get('row_counter', 0)}
+  return {'rows': info.get('row_counter', 0), 'size': info.get('size')}
 
 
 def cancel(*args, **kwargs):
@@ -479,6 +490,9 @@ def _cleanup(notebook, snippet):
   task_id = _get_query_key(notebook, snippet)
 
   storage.delete(_result_key(task_id))  # TODO: abstract storage + caches
+  storage.delete(_index_key(task_id))
+  if TASK_SERVER.RESULT_CACHE.get():
+    _get_result_cache().delete(_result_key(task_id))
   storage.delete(_log_key(notebook, snippet))
   caches[CACHES_CELERY_KEY].delete(_fetch_progress_key(notebook, snippet))
 
@@ -508,6 +522,10 @@ def _result_key(task_id):
   return task_id + '_result'
 
 
+def _index_key(task_id):
+  return task_id + '_result_index'
+
+
 def _fetch_progress_key(notebook, snippet):
   return _get_query_key(notebook, snippet) + '_fetch_progress'
 